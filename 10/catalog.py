@@ -0,0 +1,704 @@
+"""Columnar, indexed in-memory product catalog.
+
+Products are stored column by column in typed ``array`` buffers instead of a
+list of dicts. Equality filters (category, stock) use bitmaps stored as Python
+ints, so combining them is a single C-level AND. Range filters (price, rating)
+use sorted indexes searched with ``bisect``.
+
+Catalogs can be loaded from a JSON array or a JSON Lines file without reading
+the whole file into memory, and are cached in a binary snapshot next to the
+source file. The snapshot is memory-mapped and its columns are used in place,
+so loading it does not parse or copy any product data.
+"""
+
+import io
+import os
+import csv
+import sys
+import json
+import mmap
+import hashlib
+from array import array
+from bisect import bisect_left, bisect_right
+
+SNAPSHOT_SUFFIX = ".snapshot"
+SNAPSHOT_MAGIC = b"PCATALOG2\n"
+SNAPSHOT_HEADER_SIZE = 4096
+
+# Set bit positions for every possible byte value, used to expand bitmaps
+_BYTE_BITS = [
+    tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)
+]
+
+
+def _bitmap_from_rows(rows, size):
+    """Build a little-endian bitmap with the bits of the given rows set."""
+    data = bytearray((size + 7) // 8)
+    for row in rows:
+        data[row >> 3] |= 1 << (row & 7)
+    return bytes(data)
+
+
+CSV_COLUMNS = ("name", "category", "price", "rating", "in_stock")
+
+
+def _compact_number(value):
+    """Format a price or rating with at most two decimals and no trailing zeros."""
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+
+class ProductCatalog:
+    """Read-only product catalog backed by typed columns and indexes."""
+
+    def __init__(self, columns, indexes):
+        self._names = columns["names"]  # UTF-8 names concatenated into one buffer
+        self._name_offsets = columns["name_offsets"]  # row i: offsets[i]:offsets[i + 1]
+        self.categories = columns["categories"]  # category code -> category name
+        self._category_codes = columns["category_codes"]
+        self._prices = columns["prices"]
+        self._ratings = columns["ratings"]
+        self._in_stock_bits = columns["in_stock_bits"]
+
+        self._category_bits = indexes["category_bits"]
+        self._price_order = indexes["price_order"]
+        self._sorted_prices = indexes["sorted_prices"]
+        self._rating_order = indexes["rating_order"]
+        self._sorted_ratings = indexes["sorted_ratings"]
+
+        self._nbytes = len(self._in_stock_bits)
+        self._in_stock = int.from_bytes(self._in_stock_bits, "little")
+        self._category_bitmaps = [
+            int.from_bytes(bits, "little") for bits in self._category_bits
+        ]
+        self._category_lookup = {
+            name.lower(): code for code, name in enumerate(self.categories)
+        }
+        # Rows removed by apply_changes stay in the columns as tombstones, so
+        # row numbers never change; _live is then the bitmap of the other rows
+        self._live = indexes.get("live")
+        self._size = len(self._prices) - indexes.get("deleted", 0)
+        self._name_index = None
+        self._csv = None
+
+    @classmethod
+    def from_products(cls, products):
+        """Build a catalog from an iterable of product dicts."""
+        names = bytearray()
+        name_offsets = array("Q", [0])
+        categories = []
+        category_lookup = {}
+        category_codes = array("H")
+        prices = array("d")
+        ratings = array("d")
+        in_stock_rows = []
+
+        for row, product in enumerate(products):
+            names += product["name"].encode("utf-8")
+            name_offsets.append(len(names))
+
+            category = product["category"]
+            code = category_lookup.get(category)
+            if code is None:
+                code = category_lookup[category] = len(categories)
+                categories.append(category)
+            category_codes.append(code)
+
+            prices.append(product["price"])
+            ratings.append(product["rating"])
+            if product["in_stock"]:
+                in_stock_rows.append(row)
+
+        size = len(prices)
+        columns = {
+            "names": bytes(names),
+            "name_offsets": name_offsets,
+            "categories": categories,
+            "category_codes": category_codes,
+            "prices": prices,
+            "ratings": ratings,
+            "in_stock_bits": _bitmap_from_rows(in_stock_rows, size),
+        }
+        return cls(columns, cls._build_indexes(columns))
+
+    @staticmethod
+    def _build_indexes(columns):
+        """Build the category bitmaps and sorted range indexes for columns."""
+        prices, ratings = columns["prices"], columns["ratings"]
+        size = len(prices)
+
+        rows_by_category = [[] for _ in columns["categories"]]
+        for row, code in enumerate(columns["category_codes"]):
+            rows_by_category[code].append(row)
+
+        price_order = array("Q", sorted(range(size), key=prices.__getitem__))
+        rating_order = array("Q", sorted(range(size), key=ratings.__getitem__))
+        return {
+            "category_bits": [
+                _bitmap_from_rows(rows, size) for rows in rows_by_category
+            ],
+            "price_order": price_order,
+            "sorted_prices": array("d", (prices[row] for row in price_order)),
+            "rating_order": rating_order,
+            "sorted_ratings": array("d", (ratings[row] for row in rating_order)),
+        }
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        return (self.product(row) for row in self.rows())
+
+    def rows(self):
+        """Return the rows of the catalog's products, in catalog order.
+
+        Rows of deleted products are skipped, so the rows are not always
+        ``range(len(catalog))``.
+        """
+        if self._live is None:
+            return range(len(self._prices))
+        return self._bitmap_rows(self._live)
+
+    def is_live(self, row):
+        """Whether the row holds a product that has not been deleted."""
+        if row >= len(self._prices):
+            return False
+        return self._live is None or bool(self._live >> row & 1)
+
+    def name(self, row):
+        """Return the name of the product in the given row."""
+        start, end = self._name_offsets[row], self._name_offsets[row + 1]
+        return bytes(self._names[start:end]).decode("utf-8")
+
+    def category(self, row):
+        """Return the category of the product in the given row."""
+        return self.categories[self._category_codes[row]]
+
+    def price(self, row):
+        return self._prices[row]
+
+    def rating(self, row):
+        return self._ratings[row]
+
+    def is_in_stock(self, row):
+        return bool(self._in_stock_bits[row >> 3] >> (row & 7) & 1)
+
+    def product(self, row):
+        """Materialize the given row as a product dict."""
+        return {
+            "name": self.name(row),
+            "category": self.category(row),
+            "price": self._prices[row],
+            "rating": self._ratings[row],
+            "in_stock": self.is_in_stock(row),
+        }
+
+    def products(self, rows):
+        """Materialize several rows as a list of product dicts."""
+        return [self.product(row) for row in rows]
+
+    def to_csv(self, rows=None):
+        """Serialize products as compact CSV: a header line, then one line per row.
+
+        Numbers are written without trailing zeros and stock as true/false. The
+        text of the whole catalog is built once and reused.
+        """
+        if rows is None and self._csv is not None:
+            return self._csv
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(CSV_COLUMNS)
+        for row in self.rows() if rows is None else rows:
+            writer.writerow(
+                (
+                    self.name(row),
+                    self.category(row),
+                    _compact_number(self._prices[row]),
+                    _compact_number(self._ratings[row]),
+                    "true" if self.is_in_stock(row) else "false",
+                )
+            )
+        text = buffer.getvalue()
+        if rows is None:
+            self._csv = text
+        return text
+
+    def row_for_name(self, name):
+        """Return the row of the product with the given name, or None."""
+        if self._name_index is None:
+            self._name_index = {self.name(row): row for row in self.rows()}
+        return self._name_index.get(name)
+
+    def names(self):
+        """Return the names of all products, in no particular order."""
+        self.row_for_name("")
+        return self._name_index.keys()
+
+    def rows_for_names(self, names):
+        """Return the rows of the named products, in catalog order."""
+        rows = {self.row_for_name(name) for name in names}
+        rows.discard(None)
+        return sorted(rows)
+
+    def filter_rows(
+        self,
+        category=None,
+        min_price=None,
+        max_price=None,
+        min_rating=None,
+        in_stock_only=None,
+    ):
+        """Return the rows matching all given filters, in catalog order.
+
+        Missing (None) filters mean "no restriction".
+        """
+        mask = self._live
+        if category:
+            code = self._category_lookup.get(category.lower())
+            if code is None:
+                return []
+            bitmap = self._category_bitmaps[code]
+            mask = bitmap if mask is None else mask & bitmap
+        if in_stock_only:
+            mask = self._in_stock if mask is None else mask & self._in_stock
+        if mask == 0:
+            return []
+
+        # Candidate ranges from the sorted indexes, as (size, order, start, end)
+        size = len(self._prices)
+        ranges = []
+        if min_price is not None or max_price is not None:
+            start = (
+                0 if min_price is None else bisect_left(self._sorted_prices, min_price)
+            )
+            end = (
+                size
+                if max_price is None
+                else bisect_right(self._sorted_prices, max_price)
+            )
+            ranges.append((end - start, self._price_order, start, end))
+        if min_rating is not None:
+            start = bisect_left(self._sorted_ratings, min_rating)
+            ranges.append((size - start, self._rating_order, start, size))
+
+        if not ranges:
+            if mask is None:
+                return list(range(size))
+            return self._bitmap_rows(mask)
+
+        # Scan the most selective range and check the remaining filters per row
+        _, order, start, end = min(ranges, key=lambda item: item[0])
+        candidates = order[start:end]
+        if len(ranges) > 1:
+            prices, ratings = self._prices, self._ratings
+            low = float("-inf") if min_price is None else min_price
+            high = float("inf") if max_price is None else max_price
+            rating = float("-inf") if min_rating is None else min_rating
+            candidates = [
+                row
+                for row in candidates
+                if low <= prices[row] <= high and ratings[row] >= rating
+            ]
+        if mask is not None:
+            bits = mask.to_bytes(self._nbytes, "little")
+            candidates = [row for row in candidates if bits[row >> 3] >> (row & 7) & 1]
+
+        return sorted(candidates)
+
+    def _bitmap_rows(self, mask):
+        """Expand an int bitmap into the sorted list of its set rows."""
+        rows = []
+        for index, value in enumerate(mask.to_bytes(self._nbytes, "little")):
+            if value:
+                base = index << 3
+                rows.extend(base + bit for bit in _BYTE_BITS[value])
+        return rows
+
+    def apply_changes(self, changes):
+        """Return a new catalog with ``changes`` applied; this one is unchanged.
+
+        ``changes`` is an iterable of ``("upsert", product)`` and
+        ``("delete", name)`` pairs. An upsert of a known name updates the
+        fields present in ``product``; an unknown name is inserted and needs
+        every field. The update is copy-on-write: only the columns a change
+        touches are copied, unchanged ones are shared with this catalog, and
+        the sorted indexes are patched with bisect instead of being rebuilt.
+        Searches still running on this catalog see a consistent snapshot.
+        Deleted rows are kept as tombstones, so row numbers (and pagination
+        cursors) stay valid across updates.
+        """
+        self.row_for_name("")  # build the name index to copy it
+        name_index = dict(self._name_index)
+        copies = {}
+
+        def column(attr, typecode):
+            # Copy a column the first time a change writes to it
+            if attr not in copies:
+                copies[attr] = array(typecode)
+                copies[attr].frombytes(memoryview(getattr(self, attr)).cast("B"))
+            return copies[attr]
+
+        categories = list(self.categories)
+        category_lookup = {name: code for code, name in enumerate(categories)}
+        category_bitmaps = list(self._category_bitmaps)
+        in_stock, live = self._in_stock, self._live
+        row_count, deleted = len(self._prices), len(self._prices) - self._size
+        names = None
+
+        def category_code(category):
+            code = category_lookup.get(category)
+            if code is None:
+                code = category_lookup[category] = len(categories)
+                categories.append(category)
+                category_bitmaps.append(0)
+            return code
+
+        for op, change in changes:
+            if op == "delete":
+                row = name_index.pop(change, None)
+                if row is not None:
+                    if live is None:
+                        live = (1 << row_count) - 1
+                    live &= ~(1 << row)
+                    deleted += 1
+                continue
+            if op != "upsert":
+                raise ValueError(f"Unknown catalog change: {op}")
+
+            row = name_index.get(change["name"])
+            if row is None:
+                missing = set(CSV_COLUMNS) - set(change)
+                if missing:
+                    raise ValueError(
+                        f"New product {change['name']!r} is missing "
+                        f"{', '.join(sorted(missing))}"
+                    )
+                if names is None:
+                    names = bytearray(self._names)
+                row, row_count = row_count, row_count + 1
+                names += change["name"].encode("utf-8")
+                column("_name_offsets", "Q").append(len(names))
+                code = category_code(change["category"])
+                column("_category_codes", "H").append(code)
+                category_bitmaps[code] |= 1 << row
+                for attr, field, order, typecode in _RANGE_COLUMNS:
+                    value = change[field]
+                    column(attr, typecode).append(value)
+                    _insert_sorted(
+                        column(order, "Q"),
+                        column(f"_sorted{attr}", "d"),
+                        value,
+                        row,
+                    )
+                if change["in_stock"]:
+                    in_stock |= 1 << row
+                if live is not None:
+                    live |= 1 << row
+                name_index[change["name"]] = row
+                continue
+
+            if "category" in change:
+                codes = column("_category_codes", "H")
+                code = category_code(change["category"])
+                if code != codes[row]:
+                    category_bitmaps[codes[row]] &= ~(1 << row)
+                    category_bitmaps[code] |= 1 << row
+                    codes[row] = code
+            for attr, field, order, typecode in _RANGE_COLUMNS:
+                if field not in change:
+                    continue
+                values = column(attr, typecode)
+                if values[row] == change[field]:
+                    continue
+                sorted_values = column(f"_sorted{attr}", "d")
+                _remove_sorted(column(order, "Q"), sorted_values, values[row], row)
+                values[row] = change[field]
+                _insert_sorted(column(order, "Q"), sorted_values, values[row], row)
+            if "in_stock" in change:
+                bit = 1 << row
+                in_stock = in_stock | bit if change["in_stock"] else in_stock & ~bit
+
+        nbytes = (row_count + 7) // 8
+        columns = {
+            "names": self._names if names is None else names,
+            "name_offsets": copies.get("_name_offsets", self._name_offsets),
+            "categories": categories,
+            "category_codes": copies.get("_category_codes", self._category_codes),
+            "prices": copies.get("_prices", self._prices),
+            "ratings": copies.get("_ratings", self._ratings),
+            "in_stock_bits": in_stock.to_bytes(nbytes, "little"),
+        }
+        indexes = {
+            "category_bits": [
+                bitmap.to_bytes(nbytes, "little") for bitmap in category_bitmaps
+            ],
+            "price_order": copies.get("_price_order", self._price_order),
+            "sorted_prices": copies.get("_sorted_prices", self._sorted_prices),
+            "rating_order": copies.get("_rating_order", self._rating_order),
+            "sorted_ratings": copies.get("_sorted_ratings", self._sorted_ratings),
+            "live": live,
+            "deleted": deleted,
+        }
+        catalog = ProductCatalog(columns, indexes)
+        catalog._name_index = name_index
+        catalog._mapped = getattr(self, "_mapped", None)
+        return catalog
+
+    def memory_usage(self):
+        """Approximate size of the columns and indexes, in bytes.
+
+        For a memory-mapped catalog most of this is file-backed pages that the
+        OS loads on demand rather than process-private memory.
+        """
+        buffers = [
+            self._names,
+            self._name_offsets,
+            self._category_codes,
+            self._prices,
+            self._ratings,
+            self._in_stock_bits,
+            self._price_order,
+            self._sorted_prices,
+            self._rating_order,
+            self._sorted_ratings,
+        ]
+        buffers.extend(self._category_bits)
+        total = sum(memoryview(buffer).nbytes for buffer in buffers)
+        total += sys.getsizeof(self._in_stock) + sys.getsizeof(self._live)
+        total += sum(sys.getsizeof(bitmap) for bitmap in self._category_bitmaps)
+        if self._name_index is not None:
+            total += sys.getsizeof(self._name_index)
+            total += sum(sys.getsizeof(name) for name in self._name_index)
+        return total
+
+    def save_snapshot(self, path, source_info):
+        """Write the catalog to a binary snapshot file.
+
+        The snapshot starts with a fixed-size JSON header that records
+        ``source_info`` and the position of every column, followed by the raw
+        column buffers aligned to 8 bytes. The category bitmaps, all of the
+        same length, share one section, so the header has the same size
+        however many categories there are.
+        """
+        if self._live is not None:
+            raise ValueError("A catalog with deleted rows cannot be saved")
+        buffers = {
+            "names": (self._names, "B"),
+            "name_offsets": (self._name_offsets, "Q"),
+            "category_codes": (self._category_codes, "H"),
+            "prices": (self._prices, "d"),
+            "ratings": (self._ratings, "d"),
+            "in_stock_bits": (self._in_stock_bits, "B"),
+            "price_order": (self._price_order, "Q"),
+            "sorted_prices": (self._sorted_prices, "d"),
+            "rating_order": (self._rating_order, "Q"),
+            "sorted_ratings": (self._sorted_ratings, "d"),
+            "categories": (json.dumps(self.categories).encode("utf-8"), "B"),
+            "category_bits": (b"".join(self._category_bits), "B"),
+        }
+
+        sections = {}
+        offset = SNAPSHOT_HEADER_SIZE
+        for key, (buffer, fmt) in buffers.items():
+            nbytes = memoryview(buffer).nbytes
+            sections[key] = [offset, nbytes, fmt]
+            offset += nbytes + (-nbytes % 8)
+
+        header = {"source": source_info, "rows": len(self), "sections": sections}
+        temp_path = f"{path}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(_encode_header(header))
+                for key, (buffer, _) in buffers.items():
+                    nbytes = memoryview(buffer).nbytes
+                    f.write(memoryview(buffer).cast("B"))
+                    f.write(b"\0" * (-nbytes % 8))
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    @classmethod
+    def open_snapshot(cls, path):
+        """Memory-map a snapshot file and use its columns without copying."""
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = _decode_header(mapped[:SNAPSHOT_HEADER_SIZE])
+        view = memoryview(mapped)
+
+        def section(key):
+            offset, nbytes, fmt = header["sections"][key]
+            return view[offset : offset + nbytes].cast(fmt)
+
+        columns = {
+            "names": section("names"),
+            "name_offsets": section("name_offsets"),
+            "categories": json.loads(bytes(section("categories"))),
+            "category_codes": section("category_codes"),
+            "prices": section("prices"),
+            "ratings": section("ratings"),
+            "in_stock_bits": section("in_stock_bits"),
+        }
+        category_bits = section("category_bits")
+        nbytes = len(columns["in_stock_bits"])
+        indexes = {
+            "category_bits": [
+                category_bits[code * nbytes : (code + 1) * nbytes]
+                for code in range(len(columns["categories"]))
+            ],
+            "price_order": section("price_order"),
+            "sorted_prices": section("sorted_prices"),
+            "rating_order": section("rating_order"),
+            "sorted_ratings": section("sorted_ratings"),
+        }
+        catalog = cls(columns, indexes)
+        catalog._mapped = mapped  # keep the mapping alive with the catalog
+        return catalog
+
+
+# Range-filtered columns: (column, product field, sorted row order, typecode)
+_RANGE_COLUMNS = (
+    ("_prices", "price", "_price_order", "d"),
+    ("_ratings", "rating", "_rating_order", "d"),
+)
+
+
+def _insert_sorted(order, sorted_values, value, row):
+    """Insert a row into a sorted index, after the rows with the same value."""
+    position = bisect_right(sorted_values, value)
+    sorted_values.insert(position, value)
+    order.insert(position, row)
+
+
+def _remove_sorted(order, sorted_values, value, row):
+    """Remove a row from a sorted index."""
+    position = bisect_left(sorted_values, value)
+    while order[position] != row:
+        position += 1
+    del sorted_values[position]
+    del order[position]
+
+
+def _encode_header(header):
+    data = SNAPSHOT_MAGIC + json.dumps(header).encode("utf-8")
+    if len(data) > SNAPSHOT_HEADER_SIZE:
+        raise ValueError("Snapshot header does not fit in the reserved space")
+    return data.ljust(SNAPSHOT_HEADER_SIZE, b" ")
+
+
+def _decode_header(data):
+    if not data.startswith(SNAPSHOT_MAGIC):
+        raise ValueError("Not a product catalog snapshot")
+    return json.loads(data[len(SNAPSHOT_MAGIC) :].decode("utf-8"))
+
+
+def read_snapshot_header(path):
+    """Return the header of a snapshot file, or None if it is missing or invalid."""
+    try:
+        with open(path, "rb") as f:
+            return _decode_header(f.read(SNAPSHOT_HEADER_SIZE))
+    except (OSError, ValueError):
+        return None
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """Return the SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def iter_products(path, chunk_size=1 << 20):
+    """Yield product dicts from a JSON array or JSON Lines file one at a time.
+
+    Files ending in ``.jsonl`` or ``.ndjson`` are read line by line; anything
+    else is parsed as a JSON array incrementally, ``chunk_size`` characters at
+    a time, so the whole file is never held in memory.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+
+        decoder = json.JSONDecoder()
+        buffer, pos = f.read(chunk_size), 0
+        expect_item = False
+
+        while True:
+            # Skip whitespace and separators, refilling the buffer as needed
+            while True:
+                while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                    pos += 1
+                if pos < len(buffer):
+                    break
+                buffer, pos = f.read(chunk_size), 0
+                if not buffer:
+                    raise json.JSONDecodeError("Unexpected end of file", "", 0)
+
+            char = buffer[pos]
+            if not expect_item:
+                if char not in "[,":
+                    if char == "]":
+                        return
+                    raise json.JSONDecodeError("Expected '[' or ','", buffer, pos)
+                pos += 1
+                expect_item = True
+                continue
+            if char == "]":
+                return
+
+            try:
+                product, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                more = f.read(chunk_size)
+                if not more:
+                    raise
+                buffer, pos = buffer[pos:] + more, 0
+                continue
+
+            yield product
+            pos = end
+            expect_item = False
+
+
+def load_catalog(path, use_snapshot=True):
+    """Load a catalog, reusing the binary snapshot when it is up to date.
+
+    The snapshot is trusted when the source file's size and modification time
+    match the ones recorded in it. If only the modification time changed, the
+    source is hashed and the snapshot is still reused when the hash matches.
+    Otherwise the source is parsed as a stream and a new snapshot is written.
+    """
+    stat = os.stat(path)
+    if not use_snapshot:
+        return ProductCatalog.from_products(iter_products(path))
+
+    snapshot_path = path + SNAPSHOT_SUFFIX
+    header = read_snapshot_header(snapshot_path)
+    if header is not None:
+        source = header["source"]
+        if source["size"] == stat.st_size and source["mtime_ns"] == stat.st_mtime_ns:
+            return ProductCatalog.open_snapshot(snapshot_path)
+        if source["size"] == stat.st_size and source["sha256"] == file_sha256(path):
+            # Same content with a new timestamp: refresh the header in place
+            header["source"]["mtime_ns"] = stat.st_mtime_ns
+            with open(snapshot_path, "r+b") as f:
+                f.write(_encode_header(header))
+            return ProductCatalog.open_snapshot(snapshot_path)
+
+    catalog = ProductCatalog.from_products(iter_products(path))
+    source_info = {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_sha256(path),
+    }
+    try:
+        catalog.save_snapshot(snapshot_path, source_info)
+    except (OSError, ValueError) as e:
+        print(f"Warning: could not write catalog snapshot: {e}")
+    return catalog
@@ -0,0 +1,220 @@
+"""Hot reload of the product catalog.
+
+``LiveCatalog`` holds the current ``ProductCatalog`` and replaces it with an
+updated copy whenever products change, without reloading the file or
+rebuilding the indexes: ``ProductCatalog.apply_changes`` copies only the
+columns the changes touch and patches the sorted indexes. The swap is a
+single reference assignment, so a search that already picked up the old
+catalog finishes on a consistent snapshot while new searches see the update.
+
+Changes come from two sources, polled by a background thread:
+
+- the product file itself (``--watch``): when its size or modification time
+  changes it is read again and diffed with the catalog by product name, which
+  gives inserts, updates and deletes
+- a change feed (``--changes FILE``): a JSON Lines file that another process
+  appends to, one change per line::
+
+      {"name": "Smartphone", "in_stock": true}
+      {"name": "Smartphone", "price": 749.99}
+      {"name": "Robot Vacuum", "category": "Kitchen", "price": 299.99, "rating": 4.4, "in_stock": true}
+      {"op": "delete", "name": "Men's Socks"}
+
+  A line updates the fields it contains (``"op": "upsert"`` is the default)
+  and inserts the product if the name is new; new products need every field.
+  The feed is read from the start, then only the lines appended since the
+  last poll. Changes set values rather than increment them, so reading a
+  line twice is harmless.
+"""
+
+import os
+import json
+import time
+import threading
+
+from catalog import iter_products
+
+UPDATABLE_FIELDS = ("category", "price", "rating", "in_stock")
+
+
+def diff_catalog(catalog, products):
+    """Return the changes that turn ``catalog`` into the given products."""
+    current = {
+        "category": catalog.category,
+        "price": catalog.price,
+        "rating": catalog.rating,
+        "in_stock": catalog.is_in_stock,
+    }
+    changes = []
+    seen = set()
+    for product in products:
+        name = product["name"]
+        seen.add(name)
+        row = catalog.row_for_name(name)
+        if row is None:
+            changes.append(("upsert", product))
+            continue
+        changed = {
+            field: product[field]
+            for field in UPDATABLE_FIELDS
+            if product[field] != current[field](row)
+        }
+        if changed:
+            changes.append(("upsert", {"name": name, **changed}))
+    changes.extend(("delete", name) for name in catalog.names() if name not in seen)
+    return changes
+
+
+def parse_change(record):
+    """Turn one change feed record into an ``apply_changes`` change."""
+    if not isinstance(record, dict) or not isinstance(record.get("name"), str):
+        raise ValueError("a change needs a product name")
+    op = record.get("op", "upsert")
+    if op == "delete":
+        return ("delete", record["name"])
+    if op != "upsert":
+        raise ValueError(f"unknown op {op!r}")
+    return ("upsert", {key: value for key, value in record.items() if key != "op"})
+
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class LiveCatalog:
+    """The current catalog, kept up to date from a product file or change feed."""
+
+    def __init__(self, catalog, path=None, changes_path=None, interval=1.0):
+        self.catalog = catalog
+        self.path = path
+        self.changes_path = changes_path
+        self.interval = interval
+        self.stats = {
+            "updates": 0,
+            "upserts": 0,
+            "deletes": 0,
+            "rejected": 0,
+            "last_update_ms": 0.0,
+        }
+        self._listeners = []
+        self._signature = _file_signature(path) if path else None
+        self._feed_offset = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def on_update(self, listener, rebuild=None):
+        """Call ``listener(old_catalog, new_catalog, changes)`` on each update.
+
+        Listeners run before the new catalog is published. If one raises,
+        ``rebuild(new_catalog)`` is called to rebuild its state from scratch;
+        without ``rebuild`` the error propagates and the update is dropped.
+        """
+        self._listeners.append((listener, rebuild))
+
+    def apply(self, changes):
+        """Apply a batch of changes and publish the updated catalog."""
+        with self._lock:
+            old = self.catalog
+            started = time.perf_counter()
+            try:
+                new = old.apply_changes(changes)
+            except (ValueError, KeyError, TypeError):
+                # Apply the changes one by one to keep the valid ones
+                new, valid = old, []
+                for change in changes:
+                    try:
+                        new = new.apply_changes([change])
+                        valid.append(change)
+                    except (ValueError, KeyError, TypeError) as e:
+                        self.stats["rejected"] += 1
+                        print(f"Warning: skipped catalog change {change}: {e}")
+                changes = valid
+
+            for listener, rebuild in self._listeners:
+                try:
+                    listener(old, new, changes)
+                except Exception as e:
+                    if rebuild is None:
+                        raise
+                    print(f"Warning: incremental update failed, rebuilding: {e}")
+                    rebuild(new)
+            self.catalog = new
+            self.stats["updates"] += 1
+            self.stats["upserts"] += sum(1 for op, _ in changes if op == "upsert")
+            self.stats["deletes"] += sum(1 for op, _ in changes if op == "delete")
+            self.stats["last_update_ms"] = (time.perf_counter() - started) * 1000
+            return new
+
+    def poll(self):
+        """Apply the changes since the last poll; returns how many there were."""
+        changes = []
+        if self.path:
+            signature = _file_signature(self.path)
+            if signature is not None and signature != self._signature:
+                try:
+                    changes.extend(diff_catalog(self.catalog, iter_products(self.path)))
+                    self._signature = signature
+                except (OSError, ValueError, KeyError) as e:
+                    # Most likely the file is still being written; retry later
+                    print(f"Warning: could not read {self.path}: {e}")
+        if self.changes_path:
+            changes.extend(self._read_feed())
+        if changes:
+            self.apply(changes)
+        return len(changes)
+
+    def _read_feed(self):
+        """Return the changes of the complete lines appended to the feed."""
+        try:
+            if os.path.getsize(self.changes_path) < self._feed_offset:
+                self._feed_offset = 0  # the feed was truncated or replaced
+            with open(self.changes_path, "rb") as f:
+                f.seek(self._feed_offset)
+                data = f.read()
+        except OSError:
+            return []
+        end = data.rfind(b"\n") + 1
+        self._feed_offset += end
+
+        changes = []
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                changes.append(parse_change(json.loads(line)))
+            except ValueError as e:
+                self.stats["rejected"] += 1
+                print(f"Warning: skipped invalid catalog change {line[:80]!r}: {e}")
+        return changes
+
+    def start(self):
+        """Apply pending changes now, then keep polling in a background thread."""
+        self.poll()
+        self._thread = threading.Thread(
+            target=self._run, name="catalog-watch", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Warning: catalog update failed: {e}")
+
+    def summary(self):
+        """One line describing the updates applied so far."""
+        stats = self.stats
+        return (
+            f"Catalog updates: {stats['updates']} batches, {stats['upserts']} "
+            f"upserts, {stats['deletes']} deletes, {stats['rejected']} rejected "
+            f"(last batch applied in {stats['last_update_ms']:.1f} ms)"
+        )
@@ -1,89 +1,310 @@
 import os
+import sys
 import json
+import time
+import argparse
+import functools
 import requests
 from dotenv import load_dotenv
 
+# Shared helpers live in the common/ package at the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.metrics import add_arguments, get_default_metrics, report_at_exit
+from common.response_cache import get_default_cache, make_cache_key
+from common.scheduler import get_default_scheduler
+
+from catalog import ProductCatalog, load_catalog
+from catalog_watch import LiveCatalog
+from query_router import QueryRouter
+from ranking import DEFAULT_PAGE_SIZE, SORT_ORDERS, iter_pages
+from semantic_index import SemanticIndex, changed_rows, load_index
+
 # Load environment variables
 load_dotenv()
 
-# Get API key
-API_KEY = os.getenv("OPENAI_API_KEY")
-API_URL = "https://api.openai.com/v1/chat/completions"
 
+def load_products(path="products.json", use_snapshot=True):
+    """Load products from a JSON or JSON Lines file into a columnar catalog.
 
-def load_products():
-    """Load products from the JSON file."""
+    A binary snapshot of the catalog is kept next to the file and reused on
+    the next start as long as the file has not changed.
+    """
     try:
-        with open("products.json", "r", encoding="utf-8") as f:
-            return json.load(f)
+        return load_catalog(path, use_snapshot=use_snapshot)
     except FileNotFoundError:
-        print("Error: products.json file not found!")
-        return []
-    except json.JSONDecodeError:
-        print("Error: Invalid JSON in products.json file!")
-        return []
+        print(f"Error: {path} file not found!")
+    except (json.JSONDecodeError, KeyError):
+        print(f"Error: Invalid JSON in {path} file!")
+    return ProductCatalog.from_products([])
+
+
+CATEGORIES = ["Electronics", "Fitness", "Kitchen", "Books", "Clothing"]
+
+# Search modes:
+# - "catalog": the whole catalog is sent to the model, which picks the matches
+# - "filters": the model only extracts filter arguments, matching happens locally
+# - "semantic": only the top-k products from the semantic index are sent
+SEARCH_MODES = ["catalog", "filters", "semantic"]
+
+# Semantic mode: number of candidates sent to the model, and the score a single
+# top hit needs (with a clear lead over the next one) to skip the model
+SEMANTIC_TOP_K = 20
+SEMANTIC_CONFIDENCE = 0.8
+SEMANTIC_MARGIN = 0.2
+
+# Function schema used in "filters" mode. It carries no product data, so the
+# prompt stays the same size no matter how large the catalog grows.
+FILTER_SCHEMA = {
+    "name": "extract_filters",
+    "description": "Extract structured product filters from the user's request.",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "category": {
+                "type": "string",
+                "description": "Product category filter (Electronics, Fitness, Kitchen, Books, Clothing, or null for any)",
+                "enum": CATEGORIES + [None],
+            },
+            "min_price": {
+                "type": "number",
+                "description": "Minimum price filter (null for no lower limit)",
+            },
+            "max_price": {
+                "type": "number",
+                "description": "Maximum price filter (null for no limit)",
+            },
+            "min_rating": {
+                "type": "number",
+                "description": "Minimum rating filter (null for no limit). Use 4.5 for 'high ratings'.",
+            },
+            "in_stock_only": {
+                "type": "boolean",
+                "description": "True only if the user requires the product to be in stock or available",
+            },
+            "specific_product": {
+                "type": "string",
+                "description": "If user asks for a specific product (e.g., 'smartphone'), put the product name here. If asking for general category, leave null.",
+            },
+            "keywords": {
+                "type": "array",
+                "description": "Topic words that must appear in the product name (e.g., 'programming' for 'books about programming'). Leave empty for general requests.",
+                "items": {"type": "string"},
+            },
+        },
+    },
+}
+
+
+# Function schema used in "catalog" mode, where the model picks the products
+SEARCH_SCHEMA = {
+    "name": "filter_products",
+    "description": "Filter products based on user preferences and return matching products. CRITICAL: If user asks for a specific product 'if it's in stock' and that product is out of stock, return empty array.",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "category": {
+                "type": "string",
+                "description": "Product category filter (Electronics, Fitness, Kitchen, Books, Clothing, or null for any)",
+                "enum": CATEGORIES + [None],
+            },
+            "max_price": {
+                "type": "number",
+                "description": "Maximum price filter (null for no limit)",
+            },
+            "min_rating": {
+                "type": "number",
+                "description": "Minimum rating filter (null for no limit)",
+            },
+            "in_stock_only": {
+                "type": "boolean",
+                "description": "Whether to show only in-stock items (null for any stock status)",
+            },
+            "specific_product": {
+                "type": "string",
+                "description": "If user asks for a specific product (e.g., 'smartphone'), put the product name here. If asking for general category, leave null.",
+            },
+            "matching_products": {
+                "type": "array",
+                "description": "List of product names that match the criteria. CRITICAL: If user asks for specific product 'if it's in stock' and that product is out of stock, return empty array.",
+                "items": {"type": "string"},
+            },
+        },
+        "required": ["matching_products"],
+    },
+}
+
+SEARCH_SYSTEM_PROMPT = "You are a helpful product search assistant. CRITICAL: When user asks for a specific product 'if it's in stock' and that product is out of stock, return empty array. Never return out-of-stock products when stock availability is explicitly required."
+
+
+def _matches_text(name, term):
+    """Case-insensitive match of a search term against a product name."""
+    name = name.lower()
+    term = term.lower().strip()
+    if not term:
+        return True
+    if term in name or name in term:
+        return True
+    # Tolerate simple plurals ("smartphones" -> "smartphone")
+    return term.endswith("s") and term[:-1] in name
+
+
+def apply_filters(catalog, filters):
+    """Apply structured filters to the product catalog locally.
+
+    ``filters`` uses the argument names of the ``extract_filters`` function
+    schema; missing or null values mean "no restriction".
+    """
+    return catalog.products(matching_rows(catalog, filters))
+
+
+def matching_rows(catalog, filters):
+    """Return the catalog rows matching structured filters, in catalog order."""
+    rows = catalog.filter_rows(
+        category=filters.get("category"),
+        min_price=filters.get("min_price"),
+        max_price=filters.get("max_price"),
+        min_rating=filters.get("min_rating"),
+        in_stock_only=filters.get("in_stock_only"),
+    )
 
+    # Name matching runs only over the rows left by the indexed filters
+    specific_product = filters.get("specific_product")
+    keywords = filters.get("keywords") or []
+    if specific_product:
+        rows = [
+            row for row in rows if _matches_text(catalog.name(row), specific_product)
+        ]
+    if keywords:
+        rows = [
+            row
+            for row in rows
+            if any(_matches_text(catalog.name(row), keyword) for keyword in keywords)
+        ]
 
-def search_products(user_query, products):
-    """Use OpenAI function calling to search products based on user preferences."""
-    print(f"\nAnalyzing your request: '{user_query}'")
-    print("Searching products using AI...")
+    return rows
 
-    # Define the function schema for product filtering
-    function_schema = {
-        "name": "filter_products",
-        "description": "Filter products based on user preferences and return matching products. CRITICAL: If user asks for a specific product 'if it's in stock' and that product is out of stock, return empty array.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "category": {
-                    "type": "string",
-                    "description": "Product category filter (Electronics, Fitness, Kitchen, Books, Clothing, or null for any)",
-                    "enum": [
-                        "Electronics",
-                        "Fitness",
-                        "Kitchen",
-                        "Books",
-                        "Clothing",
-                        None,
-                    ],
-                },
-                "max_price": {
-                    "type": "number",
-                    "description": "Maximum price filter (null for no limit)",
-                },
-                "min_rating": {
-                    "type": "number",
-                    "description": "Minimum rating filter (null for no limit)",
-                },
-                "in_stock_only": {
-                    "type": "boolean",
-                    "description": "Whether to show only in-stock items (null for any stock status)",
-                },
-                "specific_product": {
-                    "type": "string",
-                    "description": "If user asks for a specific product (e.g., 'smartphone'), put the product name here. If asking for general category, leave null.",
-                },
-                "matching_products": {
-                    "type": "array",
-                    "description": "List of product names that match the criteria. CRITICAL: If user asks for specific product 'if it's in stock' and that product is out of stock, return empty array.",
-                    "items": {"type": "string"},
-                },
-            },
-            "required": ["matching_products"],
-        },
+
+def _request_function_call(messages, function_schema, max_tokens):
+    """Send a forced function call request and return the parsed arguments.
+
+    Returns None if the request failed or the model did not call the function.
+    """
+    data = {
+        "model": "gpt-4.1-mini",
+        "messages": messages,
+        "functions": [function_schema],
+        "function_call": {"name": function_schema["name"]},
+        "temperature": 0.1,
+        "max_tokens": max_tokens,
     }
 
-    # Prepare the prompt with product data
-    products_data = json.dumps(products, indent=2)
+    cache = get_default_cache()
+    cache_key = make_cache_key(data)
+    result = cache.get(cache_key)
+    if result is not None:
+        print("Using cached AI response.")
+        get_default_metrics().record_cache_hit(
+            "chat/completions", data["model"], result
+        )
+        return _function_call_arguments(result)
+
+    try:
+        print("Waiting for AI response...")
+        response = get_default_scheduler().post(
+            "chat/completions", json=data, timeout=30
+        )
+        response.raise_for_status()
+
+        result = response.json()
+        cache.set(cache_key, result)
+        return _function_call_arguments(result)
+
+    except requests.exceptions.Timeout:
+        print("Error: Request timed out. Please try again.")
+        return None
+    except requests.exceptions.RequestException as e:
+        print(f"Error occurred: {str(e)}")
+        if hasattr(e, "response") and e.response:
+            print(f"API Error details: {e.response.text}")
+        return None
 
-    prompt = f"""You are a product search assistant. Analyze the user's request and filter products from the available dataset.
 
-Available products:
-{products_data}
+def _function_call_arguments(result):
+    """Return the parsed function call arguments from a chat completion."""
+    # Check if function was called
+    if "function_call" not in result["choices"][0]["message"]:
+        print("AI did not call the function as expected.")
+        return None
+
+    try:
+        return json.loads(result["choices"][0]["message"]["function_call"]["arguments"])
+    except json.JSONDecodeError as e:
+        print(f"Error parsing AI response: {str(e)}")
+        return None
+
+
+def parse_query(user_query):
+    """Use OpenAI function calling to turn a request into structured filters.
+
+    Only the query and the list of categories are sent, never the catalog.
+    """
+    prompt = f"""Extract product search filters from the user's request.
+
+Available categories: {", ".join(CATEGORIES)}
 
 User request: {user_query}
 
+RULES:
+1. Only set a filter if the user's request implies it; leave everything else null
+2. Set in_stock_only to true only if the user mentions stock or availability
+3. Set specific_product only when the user asks for one particular kind of product
+4. Put topic words (e.g. "programming") in keywords, not category names or filler words
+"""
+
+    messages = [
+        {
+            "role": "system",
+            "content": "You are a helpful product search assistant. You convert requests into structured filters and never invent products.",
+        },
+        {"role": "user", "content": prompt},
+    ]
+
+    return _request_function_call(messages, FILTER_SCHEMA, max_tokens=200)
+
+
+def search_rows_locally(user_query, products, filters):
+    """Answer a query the router parsed locally, without calling the model."""
+    print(f"\nAnalyzing your request: '{user_query}'")
+    print(f"Answered locally with filters: {filters}")
+    return matching_rows(products, filters)
+
+
+def search_products_with_filters(user_query, products):
+    """Search products by letting the model extract filters and matching locally."""
+    return products.products(search_rows_with_filters(user_query, products))
+
+
+def search_rows_with_filters(user_query, products):
+    """Like ``search_products_with_filters``, returning catalog rows."""
+    print(f"\nAnalyzing your request: '{user_query}'")
+    print("Extracting filters using AI...")
+
+    filters = parse_query(user_query)
+    if filters is None:
+        return []
+
+    active_filters = {k: v for k, v in filters.items() if v not in (None, [], "")}
+    print(f"AI extracted filters: {active_filters}")
+
+    return matching_rows(products, filters)
+
+
+def _search_instructions(products_csv):
+    """The instructions and product data of a catalog search, without the query."""
+    return f"""You are a product search assistant. Analyze the user's request and filter products from the available dataset.
+
+Available products (CSV with a header line; in_stock is true or false):
+{products_csv}
 CRITICAL RULES - READ CAREFULLY:
 1. If the user asks for a SPECIFIC product (like "smartphone", "laptop", "treadmill") AND mentions "if it's in stock" or similar stock requirement, ONLY return that exact product IF it is actually in stock (in_stock: true)
 2. If the user asks for a specific product with stock requirement but that product is out of stock, return EMPTY array (no products)
@@ -97,108 +318,212 @@ EXAMPLES:
 - "I want a smartphone" → Return smartphone regardless of stock status
 - "Show me electronics under $200" → Return all electronics under $200
 
-Based on the user's request, determine the appropriate filters and return the matching products using the filter_products function.
+The user's request follows in the next message. Based on it, determine the appropriate filters and return the matching products using the filter_products function.
 """
 
-    headers = {"Authorization": f"Bearer {API_KEY}", "Content-Type": "application/json"}
 
-    data = {
-        "model": "gpt-4.1-mini",
-        "messages": [
-            {
-                "role": "system",
-                "content": "You are a helpful product search assistant. CRITICAL: When user asks for a specific product 'if it's in stock' and that product is out of stock, return empty array. Never return out-of-stock products when stock availability is explicitly required.",
-            },
-            {"role": "user", "content": prompt},
-        ],
-        "functions": [function_schema],
-        "function_call": {"name": "filter_products"},
-        "temperature": 0.1,
-        "max_tokens": 1000,
-    }
+@functools.lru_cache(maxsize=4)
+def catalog_prompt_prefix(products):
+    """Return the static messages of a whole-catalog search.
 
-    try:
-        print("Waiting for AI response...")
-        response = requests.post(API_URL, headers=headers, json=data, timeout=30)
-        response.raise_for_status()
+    They are built once per catalog and are identical for every query, so
+    together with the function schema they form a long, stable prompt
+    prefix that the API can serve from its prompt cache. Only the final
+    user message with the query changes.
+    """
+    return (
+        {"role": "system", "content": SEARCH_SYSTEM_PROMPT},
+        {"role": "user", "content": _search_instructions(products.to_csv())},
+    )
 
-        result = response.json()
 
-        # Check if function was called
-        if "function_call" in result["choices"][0]["message"]:
-            function_args = json.loads(
-                result["choices"][0]["message"]["function_call"]["arguments"]
-            )
-            matching_product_names = function_args.get("matching_products", [])
-            specific_product = function_args.get("specific_product")
-            in_stock_only = function_args.get("in_stock_only")
-
-            # Debug: Print what the AI returned
-            print(f"AI returned: {matching_product_names}")
-            if specific_product:
-                print(f"Specific product requested: {specific_product}")
-            if in_stock_only is not None:
-                print(f"In stock only: {in_stock_only}")
-
-            # Find the actual product objects
-            filtered_products = []
-            for product in products:
-                if product["name"] in matching_product_names:
-                    filtered_products.append(product)
-
-            # Additional safety check: If user asked for specific product with stock requirement
-            if specific_product and in_stock_only:
-                # Check if the specific product is actually in stock
-                specific_product_obj = None
-                for product in filtered_products:
-                    if product["name"] == specific_product:
-                        specific_product_obj = product
-                        break
-
-                if specific_product_obj and not specific_product_obj["in_stock"]:
-                    print(
-                        f"Safety check: {specific_product} is out of stock, removing from results"
-                    )
-                    filtered_products = [
-                        p for p in filtered_products if p["name"] != specific_product
-                    ]
-
-            return filtered_products
-        else:
-            print("AI did not call the function as expected.")
-            return []
+def build_search_messages(user_query, products, rows=None):
+    """Return the chat messages of a search: static prefix first, query last.
 
-    except requests.exceptions.Timeout:
-        print("Error: Request timed out. Please try again.")
-        return []
-    except requests.exceptions.RequestException as e:
-        print(f"Error occurred: {str(e)}")
-        if hasattr(e, "response") and e.response:
-            print(f"API Error details: {e.response.text}")
-        return []
-    except json.JSONDecodeError as e:
-        print(f"Error parsing AI response: {str(e)}")
-        return []
+    If ``rows`` is given, only those catalog rows are included.
+    """
+    if rows is None:
+        prefix = list(catalog_prompt_prefix(products))
+    else:
+        prefix = [
+            {"role": "system", "content": SEARCH_SYSTEM_PROMPT},
+            {"role": "user", "content": _search_instructions(products.to_csv(rows))},
+        ]
+    return prefix + [{"role": "user", "content": f"User request: {user_query}"}]
+
+
+def search_products(user_query, products, rows=None):
+    """Use OpenAI function calling to search products based on user preferences.
+
+    If ``rows`` is given, only those catalog rows are sent to the model.
+    """
+    return products.products(search_rows(user_query, products, rows))
+
+
+def search_rows(user_query, products, rows=None):
+    """Like ``search_products``, returning catalog rows in catalog order."""
+    print(f"\nAnalyzing your request: '{user_query}'")
+    print("Searching products using AI...")
 
+    messages = build_search_messages(user_query, products, rows)
+
+    function_args = _request_function_call(messages, SEARCH_SCHEMA, max_tokens=1000)
+    if function_args is None:
+        return []
 
-def display_results(products):
-    """Display the filtered products in a formatted way."""
+    matching_product_names = function_args.get("matching_products", [])
+    specific_product = function_args.get("specific_product")
+    in_stock_only = function_args.get("in_stock_only")
+
+    # Debug: Print what the AI returned
+    print(f"AI returned: {matching_product_names}")
+    if specific_product:
+        print(f"Specific product requested: {specific_product}")
+    if in_stock_only is not None:
+        print(f"In stock only: {in_stock_only}")
+
+    # Find the actual products through the catalog's name index
+    matched_rows = products.rows_for_names(matching_product_names)
+
+    # Additional safety check: If user asked for specific product with stock requirement
+    if specific_product and in_stock_only:
+        # Check if the specific product is actually in stock
+        specific_row = products.row_for_name(specific_product)
+        if specific_row in matched_rows and not products.is_in_stock(specific_row):
+            print(
+                f"Safety check: {specific_product} is out of stock, removing from results"
+            )
+            matched_rows.remove(specific_row)
+
+    return matched_rows
+
+
+def search_products_semantic(user_query, products, index):
+    """Search products by sending only the closest semantic matches to the model."""
+    rows, _ = search_rows_semantic(user_query, products, index)
+    return products.products(rows)
+
+
+def search_rows_semantic(user_query, products, index):
+    """Like ``search_products_semantic``, returning (rows, row -> similarity)."""
+    hits = [
+        (row, score)
+        for row, score in index.search(user_query, k=SEMANTIC_TOP_K)
+        if products.is_live(row)
+    ]
+    if not hits:
+        print(f"\nAnalyzing your request: '{user_query}'")
+        print("No products are similar to your request.")
+        return [], {}
+    scores = dict(hits)
+
+    top_row, top_score = hits[0]
+    runner_up_score = hits[1][1] if len(hits) > 1 else 0.0
+    if (
+        top_score >= SEMANTIC_CONFIDENCE
+        and top_score - runner_up_score >= SEMANTIC_MARGIN
+    ):
+        print(f"\nAnalyzing your request: '{user_query}'")
+        print(f"Confident semantic match (score {top_score:.2f}), skipping AI")
+        return [top_row], scores
+
+    print(f"Sending {len(hits)} closest products to AI (top score {top_score:.2f})")
+    return search_rows(user_query, products, rows=sorted(scores)), scores
+
+
+def display_results(products, start=1, total=None):
+    """Display a page of products in a formatted way.
+
+    ``start`` is the number of the first product on the page and ``total``
+    the number of products found (defaults to the page size).
+    """
+    total = len(products) if total is None else total
     if not products:
         print("\nNo products found matching your criteria.")
         return
 
-    print(f"\nFiltered Products ({len(products)} found):")
+    if start == 1:
+        print(f"\nFiltered Products ({total} found):")
+    else:
+        print(f"\nFiltered Products ({start}-{start + len(products) - 1} of {total}):")
     print("-" * 60)
 
-    for i, product in enumerate(products, 1):
+    for i, product in enumerate(products, start):
         stock_status = "In Stock" if product["in_stock"] else "Out of Stock"
         print(
             f"{i}. {product['name']} - ${product['price']:.2f}, Rating: {product['rating']}, {stock_status}"
         )
+    remaining = total - (start + len(products) - 1)
+    if remaining > 0:
+        print(f"... type 'more' for the next {min(remaining, len(products))} products")
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="AI-Powered Product Search Tool")
+    parser.add_argument(
+        "--mode",
+        choices=SEARCH_MODES,
+        default="catalog",
+        help="catalog: send the catalog to the model (default); "
+        "filters: the model only extracts filters, matching is done locally",
+    )
+    parser.add_argument(
+        "--catalog",
+        default="products.json",
+        help="Product file to load, as a JSON array or JSON Lines (.jsonl)",
+    )
+    parser.add_argument(
+        "--no-snapshot",
+        action="store_true",
+        help="Always parse the product file instead of using the binary snapshot",
+    )
+    parser.add_argument(
+        "--sort",
+        choices=SORT_ORDERS,
+        default="relevance",
+        help="Order of the results (default: relevance, i.e. semantic similarity "
+        "in semantic mode and catalog order otherwise)",
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=DEFAULT_PAGE_SIZE,
+        help=f"Products shown per page (default: {DEFAULT_PAGE_SIZE})",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Apply changes of the product file while running, without a restart",
+    )
+    parser.add_argument(
+        "--changes",
+        metavar="FILE",
+        help="Apply product changes appended to this JSON Lines change feed",
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=1.0,
+        help="Seconds between checks for catalog changes (default: 1)",
+    )
+    parser.add_argument(
+        "--no-router",
+        action="store_true",
+        help="Send every query to the model instead of answering simple ones locally",
+    )
+    add_arguments(parser)
+    args = parser.parse_args()
+    if args.page_size < 1:
+        parser.error("--page-size must be at least 1")
+    return args
 
 
 def main():
     """Main function to run the product search application."""
+    args = parse_args()
+    report_at_exit(args)
+
     print("=" * 60)
     print("AI-Powered Product Search Tool")
     print("=" * 60)
@@ -214,12 +539,43 @@ def main():
     print("- 'I want a smartphone if it's in stock'")
 
     # Load products
-    products = load_products()
+    products = load_products(args.catalog, use_snapshot=not args.no_snapshot)
     if not products:
         print("Failed to load products. Exiting...")
         return
 
     print(f"\nLoaded {len(products)} products from database.")
+    print(f"Search mode: {args.mode}")
+
+    index = None
+    if args.mode == "semantic":
+        index = load_index(args.catalog, products)
+    router = None if args.no_router else QueryRouter(products)
+    pages, total, shown = None, 0, 0
+
+    # With --watch or --changes the catalog is updated in the background;
+    # every search runs on the catalog that is current when it starts
+    live = LiveCatalog(
+        products,
+        path=args.catalog if args.watch else None,
+        changes_path=args.changes,
+        interval=args.watch_interval,
+    )
+    if router is not None:
+        live.on_update(lambda old, new, changes: router.update(new, changes))
+    if index is not None:
+
+        def update_index(old, new, changes):
+            nonlocal index
+            index = index.updated(old, new, changed_rows(old, new, changes))
+
+        def rebuild_index(new):
+            nonlocal index
+            index = SemanticIndex.build(new)
+
+        live.on_update(update_index, rebuild=rebuild_index)
+    if args.watch or args.changes:
+        live.start()
 
     while True:
         print("\n" + "=" * 60)
@@ -228,6 +584,12 @@ def main():
         ).strip()
 
         if user_query.lower() in ["quit", "exit", "q"]:
+            stats = get_default_cache().stats()
+            print(f"\nResponse cache: {stats['hits']} hits, {stats['misses']} misses")
+            if router is not None:
+                print(router.summary())
+            if args.watch or args.changes:
+                print(live.summary())
             print("\nThank you for using the AI Product Search Tool!")
             break
 
@@ -235,11 +597,43 @@ def main():
             print("Please enter a search request.")
             continue
 
-        # Search products using AI
-        filtered_products = search_products(user_query, products)
+        if user_query.lower() == "more":
+            page = next(pages, None) if pages is not None else None
+            if page is None:
+                print("No more results. Please enter a new search request.")
+                continue
+            display_results(page, start=shown + 1, total=total)
+            shown += len(page)
+            continue
+
+        # Simple queries are answered locally, the rest with AI
+        products = live.catalog
+        started = time.perf_counter()
+        scores = None
+        filters = router.parse(user_query) if router is not None else None
+        if filters is not None:
+            with get_default_metrics().stage("search_local"):
+                rows = search_rows_locally(user_query, products, filters)
+        else:
+            with get_default_metrics().stage(f"search_{args.mode}"):
+                if args.mode == "filters":
+                    rows = search_rows_with_filters(user_query, products)
+                elif args.mode == "semantic":
+                    rows, scores = search_rows_semantic(user_query, products, index)
+                else:
+                    rows = search_rows(user_query, products)
+        if router is not None:
+            router.record(
+                "local" if filters is not None else "model",
+                time.perf_counter() - started,
+            )
 
-        # Display results
-        display_results(filtered_products)
+        # Display the first page; the others are ranked when asked for
+        pages = iter_pages(products, rows, args.sort, args.page_size, scores)
+        total = len(rows)
+        page = next(pages, [])
+        display_results(page, total=total)
+        shown = len(page)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Measure the prompt tokens of a catalog search before and after the compact,
+cache-friendly prompt layout.
+
+The previous prompt embedded the catalog as pretty-printed JSON and put the
+user request in the middle of the instructions. The current prompt sends the
+catalog as CSV in a static prefix that is the same for every query, followed
+by a short message with the request. For each sample query this script
+prints the prompt tokens of both layouts, how many of them form the static
+prefix that the API can serve from its prompt cache, and the estimated cost.
+
+Tokens are counted with tiktoken (o200k_base) when it is installed, and
+estimated as characters / 4 otherwise. No API calls are made.
+
+Usage:
+    python prompt_report.py
+    python prompt_report.py --catalog products.jsonl --model gpt-4.1-mini
+"""
+
+import os
+import sys
+import json
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.metrics import TOKEN_PRICES
+
+from product_search import (
+    SEARCH_SCHEMA,
+    SEARCH_SYSTEM_PROMPT,
+    build_search_messages,
+    load_products,
+)
+
+SAMPLE_QUERIES = [
+    "I need electronics under $200",
+    "Show me fitness equipment with high ratings",
+    "I want a smartphone if it's in stock",
+    "Find kitchen appliances that are in stock and cost less than $100",
+    "Books about programming rated above 4.5",
+]
+
+# The API caches prompt prefixes of at least 1024 tokens, in steps of 128
+PROMPT_CACHE_MINIMUM = 1024
+PROMPT_CACHE_STEP = 128
+
+# The user message of the previous prompt layout, for comparison
+LEGACY_PROMPT = """You are a product search assistant. Analyze the user's request and filter products from the available dataset.
+
+Available products:
+{products_data}
+
+User request: {user_query}
+
+CRITICAL RULES - READ CAREFULLY:
+1. If the user asks for a SPECIFIC product (like "smartphone", "laptop", "treadmill") AND mentions "if it's in stock" or similar stock requirement, ONLY return that exact product IF it is actually in stock (in_stock: true)
+2. If the user asks for a specific product with stock requirement but that product is out of stock, return EMPTY array (no products)
+3. If the user asks for a specific product WITHOUT mentioning stock, you can return it regardless of stock status
+4. If the user asks for general categories (like "electronics", "fitness equipment"), return all matching products in that category
+5. Always respect price, rating, and stock availability filters
+6. If no products match the criteria, return an empty array
+
+EXAMPLES:
+- "I want a smartphone if it's in stock" → Check if smartphone exists and is in stock. If out of stock, return empty array.
+- "I want a smartphone" → Return smartphone regardless of stock status
+- "Show me electronics under $200" → Return all electronics under $200
+
+Based on the user's request, determine the appropriate filters and return the matching products using the filter_products function.
+"""
+
+
+def token_counter():
+    """Return a function counting the tokens of a string, and its description."""
+    try:
+        import tiktoken
+    except ImportError:
+        return (lambda text: (len(text) + 3) // 4), "estimated as characters / 4"
+    encoding = tiktoken.get_encoding("o200k_base")
+    return (lambda text: len(encoding.encode(text))), "tiktoken o200k_base"
+
+
+def cached_tokens(prefix_tokens):
+    """Return how many tokens of a static prefix the prompt cache can serve."""
+    if prefix_tokens < PROMPT_CACHE_MINIMUM:
+        return 0
+    return prefix_tokens - (prefix_tokens - PROMPT_CACHE_MINIMUM) % PROMPT_CACHE_STEP
+
+
+def legacy_prompt(user_query, products):
+    """Return the (static prefix, rest) of the previous prompt layout."""
+    prompt = LEGACY_PROMPT.format(
+        products_data=json.dumps(list(products), indent=2), user_query=user_query
+    )
+    split = prompt.index("User request:")
+    return prompt[:split], prompt[split:]
+
+
+def measure(user_query, products, count):
+    """Return the prompt and prefix tokens of both layouts for one query."""
+    schema_tokens = count(json.dumps(SEARCH_SCHEMA))
+    system_tokens = count(SEARCH_SYSTEM_PROMPT)
+
+    legacy_prefix, legacy_rest = legacy_prompt(user_query, products)
+    legacy_prefix_tokens = schema_tokens + system_tokens + count(legacy_prefix)
+    legacy_total = legacy_prefix_tokens + count(legacy_rest)
+
+    messages = build_search_messages(user_query, products)
+    prefix_tokens = schema_tokens + sum(count(m["content"]) for m in messages[:-1])
+    total = prefix_tokens + count(messages[-1]["content"])
+    return {
+        "legacy_tokens": legacy_total,
+        "legacy_prefix_tokens": legacy_prefix_tokens,
+        "tokens": total,
+        "prefix_tokens": prefix_tokens,
+    }
+
+
+def prompt_cost(model, total, cached):
+    """Return the estimated input cost in USD of a prompt."""
+    prices = TOKEN_PRICES[model]
+    return ((total - cached) * prices[0] + cached * prices[2]) / 1_000_000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Compare the prompt tokens of the previous and current search prompt"
+    )
+    parser.add_argument(
+        "--catalog",
+        default="products.json",
+        help="Product catalog file (default: products.json)",
+    )
+    parser.add_argument(
+        "--model",
+        choices=sorted(TOKEN_PRICES),
+        default="gpt-4.1-mini",
+        help="Model whose prices are used for the cost estimate (default: gpt-4.1-mini)",
+    )
+    parser.add_argument(
+        "queries", nargs="*", help="Queries to measure (default: sample queries)"
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    products = load_products(args.catalog)
+    if not products:
+        sys.exit(1)
+    count, method = token_counter()
+    queries = args.queries or SAMPLE_QUERIES
+
+    print(f"{len(products)} products, tokens {method}\n")
+    print(
+        f"{'query':<40} {'before':>8} {'after':>8} {'saved':>7} "
+        f"{'prefix':>8} {'cached':>8}"
+    )
+    results = []
+    for query in queries:
+        result = measure(query, products, count)
+        results.append(result)
+        saved = 1 - result["tokens"] / result["legacy_tokens"]
+        print(
+            f"{query[:40]:<40} {result['legacy_tokens']:>8,} {result['tokens']:>8,} "
+            f"{saved:>7.0%} {result['prefix_tokens']:>8,} "
+            f"{cached_tokens(result['prefix_tokens']):>8,}"
+        )
+
+    legacy = sum(r["legacy_tokens"] for r in results) / len(results)
+    current = sum(r["tokens"] for r in results) / len(results)
+    prefix = sum(r["prefix_tokens"] for r in results) / len(results)
+    print("-" * 84)
+    print(
+        f"Average prompt: {legacy:,.0f} -> {current:,.0f} tokens per query "
+        f"({legacy - current:,.0f} saved, {1 - current / legacy:.0%})"
+    )
+    print(
+        f"Static prefix: {prefix:,.0f} tokens ({prefix / current:.0%} of the prompt), "
+        f"identical for every query"
+    )
+    if prefix < PROMPT_CACHE_MINIMUM:
+        print(
+            f"The prefix is below the {PROMPT_CACHE_MINIMUM}-token minimum of the "
+            f"API's prompt cache, so this catalog is too small to be cached"
+        )
+
+    legacy_cost = sum(
+        prompt_cost(
+            args.model, r["legacy_tokens"], cached_tokens(r["legacy_prefix_tokens"])
+        )
+        for r in results
+    )
+    cost = sum(
+        prompt_cost(args.model, r["tokens"], cached_tokens(r["prefix_tokens"]))
+        for r in results
+    )
+    print(
+        f"Estimated input cost per 1,000 queries with {args.model} and a warm "
+        f"prompt cache: ${legacy_cost / len(results) * 1000:.2f} -> "
+        f"${cost / len(results) * 1000:.2f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""Deterministic local router for simple product search queries.
+
+Most requests follow a few patterns ("Clothing items under $50", "Find
+kitchen appliances that are in stock") that can be parsed without a model.
+The router has two levels: a local parser recognizes category words, price
+bounds, rating thresholds, stock phrases and words of product names, and
+turns the query into the same filters the ``extract_filters`` function
+returns. Only a query with anything the parser does not understand (an
+unknown word, a negation, an "or", a bare price) escalates to the model.
+
+The parser is strict on purpose: every word of the query has to be either
+part of a recognized phrase, a filler word or a word of a product name, so a
+query is answered locally only when the answer cannot depend on how the
+model would have read it.
+"""
+
+import re
+import math
+import threading
+from collections import deque
+
+# Latencies kept per path for the percentiles in ``stats``
+LATENCIES_KEPT = 10000
+
+# Rating used for "high ratings", like the extract_filters schema describes
+HIGH_RATING = 4.5
+
+CATEGORY_WORDS = {
+    "electronics": "Electronics",
+    "electronic": "Electronics",
+    "gadgets": "Electronics",
+    "gadget": "Electronics",
+    "tech": "Electronics",
+    "fitness equipment": "Fitness",
+    "fitness gear": "Fitness",
+    "exercise equipment": "Fitness",
+    "workout equipment": "Fitness",
+    "workout gear": "Fitness",
+    "gym equipment": "Fitness",
+    "fitness": "Fitness",
+    "workout": "Fitness",
+    "gym": "Fitness",
+    "kitchen appliances": "Kitchen",
+    "kitchen appliance": "Kitchen",
+    "kitchen": "Kitchen",
+    "appliances": "Kitchen",
+    "appliance": "Kitchen",
+    "cookware": "Kitchen",
+    "books": "Books",
+    "book": "Books",
+    "clothing items": "Clothing",
+    "clothing": "Clothing",
+    "clothes": "Clothing",
+    "apparel": "Clothing",
+}
+
+FILLER_WORDS = {
+    "a", "about", "all", "an", "and", "any", "anything", "are", "buy", "can",
+    "category", "do", "find", "for", "from", "get", "give", "have", "i", "i'd",
+    "i'm", "if", "in", "is", "it", "it's", "item", "items", "its", "like",
+    "list", "look", "looking", "me", "my", "need", "of", "on", "only", "please",
+    "product", "products", "search", "see", "show", "some", "something",
+    "stuff", "that", "the", "there", "thing", "things", "to", "want", "what",
+    "which", "with", "would", "you",
+}  # fmt: skip
+
+# Words that change the meaning of the rest of the query
+ESCALATE_WORDS = {
+    "aren't", "but", "don't", "dont", "except", "excluding", "isn't", "never",
+    "no", "not", "or", "out", "unless", "without",
+}  # fmt: skip
+
+_NUMBER = r"\$?\s*(\d+(?:,\d{3})*(?:\.\d+)?)(?:\s*(?:dollars|usd|bucks))?"
+_RATING = r"(\d(?:\.\d+)?)"
+
+# (pattern, fields set from the captured numbers); applied in order, and each
+# match is removed from the query before the next pattern is tried
+PATTERNS = [
+    (
+        rf"\b(?:rated|ratings?|reviews?)\s+(?:of\s+)?(?:at least|above|over|"
+        rf"more than|greater than|>=?)?\s*{_RATING}(?:\s*(?:stars?|\+))?"
+        rf"(?:\s+(?:and up|or (?:more|higher|better|above)))?",
+        ("min_rating",),
+    ),
+    (
+        rf"\b{_RATING}\s*\+?\s*stars?(?:\s+(?:and up|or (?:more|higher|better)))?"
+        rf"(?:\s+(?:ratings?|rated|reviews?))?",
+        ("min_rating",),
+    ),
+    (
+        rf"\b(?:between|from)\s+{_NUMBER}\s+(?:and|to|-)\s+{_NUMBER}",
+        ("min_price", "max_price"),
+    ),
+    (rf"\$\s*(\d+(?:\.\d+)?)\s*(?:-|to)\s*{_NUMBER}", ("min_price", "max_price")),
+    (
+        rf"(?:\b(?:for\s+)?(?:under|below|less than|cheaper than|up to|at most|"
+        rf"no more than|max(?:imum)?(?: of)?|within|budget of)|<=?)\s*{_NUMBER}",
+        ("max_price",),
+    ),
+    (rf"{_NUMBER}\s+(?:or less|or under|or below|max)\b", ("max_price",)),
+    (
+        rf"(?:\b(?:over|above|more than|at least|starting at|min(?:imum)?(?: of)?)"
+        rf"|>=?)\s*{_NUMBER}",
+        ("min_price",),
+    ),
+    (rf"{_NUMBER}\s*(?:\+|(?:or more|and up)\b)", ("min_price",)),
+]
+PATTERNS = [(re.compile(pattern), fields) for pattern, fields in PATTERNS]
+
+HIGH_RATING_PATTERN = re.compile(
+    r"\b(?:with\s+)?(?:high(?:ly)?|top|best)[\s-]+(?:rated|ratings?|reviews?)\b"
+)
+STOCK_PATTERN = re.compile(
+    r"\b(?:(?:if|when|that|which)\s+(?:it's|it is|its|they're|they are|are|is)\s+)?"
+    r"(?:(?:only|currently)\s+)?(?:in[\s-]stock|available)(?:\s+only)?\b"
+)
+CATEGORY_PATTERN = re.compile(
+    r"\b(?:"
+    + "|".join(re.escape(w) for w in sorted(CATEGORY_WORDS, key=len, reverse=True))
+    + r")\b"
+)
+WORD_PATTERN = re.compile(r"[a-z0-9$][a-z0-9'$.+-]*")
+
+
+def normalize(query):
+    """Lowercase a query and drop punctuation that does not carry meaning."""
+    query = query.lower().replace("’", "'")
+    query = re.sub(r"[?!;:\"()]|,(?!\d{3})|\.(?!\d)", " ", query)
+    return " ".join(query.split())
+
+
+def _number(text):
+    return float(text.replace(",", ""))
+
+
+def _singular(word):
+    return word[:-1] if len(word) > 3 and word.endswith("s") else word
+
+
+class QueryRouter:
+    """Answers simple queries with local filters; escalates the rest."""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        # Words of product names; the words of a local query must be among them
+        self.vocabulary = set()
+        self._add_words(catalog.name(row) for row in catalog.rows())
+        self.counts = {"local": 0, "model": 0}
+        self.latencies = {
+            "local": deque(maxlen=LATENCIES_KEPT),
+            "model": deque(maxlen=LATENCIES_KEPT),
+        }
+        self._lock = threading.Lock()
+
+    def _add_words(self, names):
+        for name in names:
+            for word in WORD_PATTERN.findall(name.lower()):
+                self.vocabulary.add(word)
+                self.vocabulary.add(_singular(word))
+
+    def update(self, catalog, changes):
+        """Switch to an updated catalog (see ``ProductCatalog.apply_changes``).
+
+        Words of new products are added to the vocabulary. Words of deleted
+        products are kept; a query using them simply matches nothing.
+        """
+        self._add_words(change["name"] for op, change in changes if op == "upsert")
+        self.catalog = catalog
+
+    def parse(self, query):
+        """Return the ``extract_filters`` arguments of a query, or None.
+
+        None means the query is not simple enough to be answered locally and
+        should be sent to the model.
+        """
+        text = normalize(query)
+        filters = {}
+
+        def claim(field, value):
+            # A field set twice ("under $50 ... under $80") is ambiguous
+            if field in filters and filters[field] != value:
+                raise ValueError(field)
+            filters[field] = value
+
+        try:
+            for pattern, fields in PATTERNS:
+                for match in list(pattern.finditer(text)):
+                    for field, value in zip(fields, match.groups()):
+                        claim(field, _number(value))
+                text = pattern.sub(" ", text)
+            if HIGH_RATING_PATTERN.search(text):
+                claim("min_rating", HIGH_RATING)
+                text = HIGH_RATING_PATTERN.sub(" ", text)
+            if STOCK_PATTERN.search(text):
+                claim("in_stock_only", True)
+                text = STOCK_PATTERN.sub(" ", text)
+            for match in CATEGORY_PATTERN.finditer(text):
+                claim("category", CATEGORY_WORDS[match.group()])
+            text = CATEGORY_PATTERN.sub(" ", text)
+        except ValueError:
+            return None
+
+        if filters.get("min_rating", 0) > 5:
+            return None
+        if filters.get("min_price", 0) > filters.get("max_price", math.inf):
+            return None
+
+        product_words = []
+        for word in text.split():
+            if word in ESCALATE_WORDS:
+                return None
+            if word in FILLER_WORDS:
+                continue
+            if word in self.vocabulary or _singular(word) in self.vocabulary:
+                product_words.append(word)
+                continue
+            return None
+
+        if product_words:
+            phrase = " ".join(product_words)
+            if len(product_words) > 1 and not self._names_contain(phrase):
+                return None
+            filters["specific_product"] = phrase
+        return filters or None
+
+    def _names_contain(self, phrase):
+        """Whether a multi-word phrase appears in any product name."""
+        singular = _singular(phrase)
+        catalog = self.catalog
+        for row in catalog.rows():
+            name = catalog.name(row).lower()
+            if phrase in name or singular in name:
+                return True
+        return False
+
+    def record(self, path, seconds):
+        """Count a query answered on ``path`` ("local" or "model")."""
+        with self._lock:
+            self.counts[path] += 1
+            self.latencies[path].append(seconds)
+
+    def stats(self):
+        """Return the hit rate and the p50/p95 latency in ms of each path."""
+        with self._lock:
+            counts = dict(self.counts)
+            latencies = {
+                path: sorted(values) for path, values in self.latencies.items()
+            }
+        total = sum(counts.values())
+        stats = {
+            "queries": total,
+            "local": counts["local"],
+            "model": counts["model"],
+            "hit_rate": counts["local"] / total if total else 0.0,
+        }
+        for path, values in latencies.items():
+            stats[f"{path}_p50_ms"] = _percentile(values, 0.50) * 1000
+            stats[f"{path}_p95_ms"] = _percentile(values, 0.95) * 1000
+        return stats
+
+    def summary(self):
+        """One line describing the hit rate and latency of both paths."""
+        stats = self.stats()
+        return (
+            f"Query router: {stats['local']} of {stats['queries']} queries answered "
+            f"locally ({stats['hit_rate']:.0%}); p50/p95 latency local "
+            f"{stats['local_p50_ms']:.2f}/{stats['local_p95_ms']:.2f} ms, model "
+            f"{stats['model_p50_ms']:.0f}/{stats['model_p95_ms']:.0f} ms"
+        )
+
+
+def _percentile(sorted_values, fraction):
+    """Nearest-rank percentile of a sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(fraction * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
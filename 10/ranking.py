@@ -0,0 +1,125 @@
+"""Ranked, paginated search results.
+
+Searches return catalog rows, not product dicts. A page is selected from the
+rows with a partial top-k (``heapq.nsmallest``), which keeps only ``k`` rows
+in memory and takes O(n log k) instead of sorting every match, and only the
+rows of that page are materialized as product dicts.
+
+Pages are addressed by cursors: a cursor holds the sort key of the last row
+of a page, and the next page is the top-k of the rows ranking after it. Sort
+keys end with the row number, so they are unique and no row is skipped or
+repeated between pages. Cursors stay valid as long as the catalog does not
+change.
+"""
+
+import json
+import heapq
+import base64
+
+SORT_ORDERS = ["relevance", "rating", "price", "price_desc"]
+DEFAULT_PAGE_SIZE = 10
+
+
+def sort_key(catalog, sort="relevance", scores=None):
+    """Return a function mapping a row to its sort key; smaller keys rank first.
+
+    ``relevance`` orders by ``scores`` (row -> score, higher is better) and
+    keeps catalog order among equal scores, so without scores it is catalog
+    order. The other orders break ties by rating, then by row.
+    """
+    price, rating = catalog.price, catalog.rating
+    if sort == "relevance":
+        scores = scores or {}
+        return lambda row: (-scores.get(row, 0.0), row)
+    if sort == "rating":
+        return lambda row: (-rating(row), price(row), row)
+    if sort == "price":
+        return lambda row: (price(row), -rating(row), row)
+    if sort == "price_desc":
+        return lambda row: (-price(row), -rating(row), row)
+    raise ValueError(f"Unknown sort order: {sort}")
+
+
+def encode_cursor(sort, key):
+    """Return an opaque cursor for the page after the row with sort ``key``."""
+    data = json.dumps({"sort": sort, "after": list(key)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode("utf-8")).decode("ascii")
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def decode_cursor(cursor, sort):
+    """Return the sort key stored in a cursor; ValueError if it is invalid.
+
+    The key must have the shape ``sort_key`` gives ``sort``: numbers ending
+    with a row number, so it can be compared with the keys of the rows.
+    """
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        after = tuple(data["after"])
+        cursor_sort = data["sort"]
+    except (ValueError, TypeError, KeyError, UnicodeError):
+        raise ValueError("Invalid cursor") from None
+    if cursor_sort != sort:
+        raise ValueError(f"The cursor belongs to a '{cursor_sort}' ordering")
+    if (
+        len(after) != (2 if sort == "relevance" else 3)
+        or not all(_is_number(value) for value in after)
+        or not isinstance(after[-1], int)
+    ):
+        raise ValueError("Invalid cursor")
+    return after
+
+
+def top_k(rows, key, k, after=None):
+    """Return the ``k`` best rows, best first, skipping rows up to ``after``."""
+    if after is not None:
+        rows = (row for row in rows if key(row) > after)
+    return heapq.nsmallest(k, rows, key=key)
+
+
+def get_page(
+    catalog,
+    rows,
+    sort="relevance",
+    page_size=DEFAULT_PAGE_SIZE,
+    cursor=None,
+    scores=None,
+):
+    """Return one page of ranked results.
+
+    The page is ``{"products", "next_cursor"}``; ``next_cursor`` is None on
+    the last page. ``rows`` can be any iterable of catalog rows.
+    """
+    if page_size < 1:
+        raise ValueError("The page size must be at least 1")
+    key = sort_key(catalog, sort, scores)
+    after = decode_cursor(cursor, sort) if cursor else None
+    # One extra row tells whether there is a next page
+    page = top_k(rows, key, page_size + 1, after)
+    next_cursor = None
+    if len(page) > page_size:
+        page = page[:page_size]
+        next_cursor = encode_cursor(sort, key(page[-1]))
+    return {"products": catalog.products(page), "next_cursor": next_cursor}
+
+
+def iter_pages(
+    catalog, rows, sort="relevance", page_size=DEFAULT_PAGE_SIZE, scores=None
+):
+    """Yield the pages of ranked results lazily, as lists of product dicts.
+
+    Each page is selected only when it is requested, so reading the first
+    page of a large result costs one top-k pass. ``rows`` must be a sequence
+    (it is scanned again for every page).
+    """
+    cursor = None
+    while True:
+        page = get_page(catalog, rows, sort, page_size, cursor, scores)
+        if page["products"]:
+            yield page["products"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return
@@ -0,0 +1,324 @@
+"""Vector retrieval index over product names and categories.
+
+Products are embedded once, offline, and stored in an inverted-file index
+(feature -> rows and weights, sorted by row). A query is embedded with the
+same embedder and scored only against the rows that share at least one
+feature with it. To keep the latency bounded on large catalogs, where common
+words and character trigrams are shared by a large part of the catalog, at
+most ``MAX_SCANNED_POSTINGS`` posting entries are walked per query, rarest
+features first. The candidates found that way are then scored exactly: the
+weights of the remaining, common features are looked up by binary search in
+their postings. The top-k is exact whenever the query's postings fit in the
+budget, which is always the case for small catalogs.
+
+The embedder is pluggable: any object with ``fit(texts)``, ``embed(text)``
+returning a sparse ``{feature: weight}`` dict with unit L2 norm, and
+``to_dict()``/``from_dict()`` for persistence can be used. The default
+``HashingEmbedder`` is deterministic and needs no network access or model
+files: it hashes words and character trigrams into a fixed feature space and
+weights them by TF-IDF.
+"""
+
+import os
+import re
+import sys
+import json
+import math
+import heapq
+import zlib
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+INDEX_SUFFIX = ".index.json"
+
+STOPWORDS = {
+    "a", "about", "an", "and", "any", "are", "as", "for", "find", "from", "get",
+    "give", "i", "in", "is", "it", "items", "looking", "me", "my", "need", "of",
+    "on", "or", "please", "product", "products", "show", "some", "that", "the",
+    "to", "want", "with",
+}  # fmt: skip
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Posting entries walked per query, and candidates rescored per result
+MAX_SCANNED_POSTINGS = 50000
+RESCORED_PER_RESULT = 50
+
+
+def tokenize(text):
+    """Split text into lowercase word tokens without stopwords or plural 's'."""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class HashingEmbedder:
+    """Deterministic TF-IDF embedder over hashed words and character trigrams."""
+
+    def __init__(self, dimensions=1 << 20, idf=None, default_idf=1.0):
+        self.dimensions = dimensions
+        self.idf = idf or {}
+        self.default_idf = default_idf  # weight of features unseen in fit()
+
+    def _features(self, text):
+        """Return the hashed feature counts of a text."""
+        features = Counter()
+        for token in tokenize(text):
+            features[f"w:{token}"] += 1
+            padded = f"<{token}>"
+            for i in range(len(padded) - 2):
+                features[f"c:{padded[i:i + 3]}"] += 1
+        return Counter(
+            {
+                zlib.crc32(feature.encode("utf-8")) % self.dimensions: count
+                for feature, count in features.items()
+            }
+        )
+
+    def fit(self, texts):
+        """Compute inverse document frequencies from the indexed texts."""
+        document_frequency = Counter()
+        total = 0
+        for text in texts:
+            document_frequency.update(self._features(text).keys())
+            total += 1
+        self.idf = {
+            feature: math.log((1 + total) / (1 + count)) + 1
+            for feature, count in document_frequency.items()
+        }
+        self.default_idf = math.log(1 + total) + 1
+
+    def embed(self, text):
+        """Return the unit-length sparse TF-IDF vector of a text."""
+        vector = {
+            feature: (1 + math.log(count)) * self.idf.get(feature, self.default_idf)
+            for feature, count in self._features(text).items()
+        }
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        if norm == 0:
+            return {}
+        return {feature: weight / norm for feature, weight in vector.items()}
+
+    def to_dict(self):
+        return {
+            "type": "hashing",
+            "dimensions": self.dimensions,
+            "default_idf": self.default_idf,
+            "idf": {str(feature): value for feature, value in self.idf.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        idf = {int(feature): value for feature, value in data["idf"].items()}
+        return cls(data["dimensions"], idf, data["default_idf"])
+
+
+EMBEDDERS = {"hashing": HashingEmbedder}
+
+
+def product_text(catalog, row):
+    """Return the text that is embedded for a catalog row."""
+    return f"{catalog.name(row)} {catalog.category(row)}"
+
+
+def _by_score(item):
+    """Sort key of a (row, score) pair: higher score first, then lower row."""
+    return item[1], -item[0]
+
+
+class SemanticIndex:
+    """Inverted-file index of sparse product vectors with bounded top-k search."""
+
+    def __init__(self, embedder, postings, size, source=None):
+        self.embedder = embedder
+        self.postings = postings  # feature -> (array of rows, array of weights)
+        self.size = size
+        self.source = source
+
+    @classmethod
+    def build(cls, catalog, embedder=None, source=None):
+        """Embed every product of the catalog and build the index."""
+        embedder = embedder or HashingEmbedder()
+        rows = list(catalog.rows())
+        texts = [product_text(catalog, row) for row in rows]
+        embedder.fit(texts)
+
+        postings = defaultdict(lambda: (array("Q"), array("f")))
+        for row, text in zip(rows, texts):
+            for feature, weight in embedder.embed(text).items():
+                rows, weights = postings[feature]
+                rows.append(row)
+                weights.append(weight)
+        return cls(embedder, dict(postings), len(catalog), source)
+
+    def updated(self, old_catalog, catalog, rows):
+        """Return a copy of the index with ``rows`` re-embedded from ``catalog``.
+
+        ``rows`` are the rows whose text changed between ``old_catalog`` and
+        ``catalog`` (inserted, deleted or moved to another category). Only
+        the postings of their features are copied; the rest are shared with
+        this index, which stays usable by searches that are still running.
+        The embedder is not refitted, so words that are new to the catalog
+        get the default weight until the index is rebuilt.
+        """
+        postings = dict(self.postings)
+        copied = set()
+
+        def posting(feature):
+            if feature not in copied:
+                rows_, weights = postings.get(feature, ((), ()))
+                postings[feature] = (array("Q", rows_), array("f", weights))
+                copied.add(feature)
+            return postings[feature]
+
+        # Postings stay sorted by row, so search can look rows up by bisection
+        for row in rows:
+            if old_catalog.is_live(row):
+                for feature in self.embedder.embed(product_text(old_catalog, row)):
+                    feature_rows, weights = posting(feature)
+                    position = bisect_left(feature_rows, row)
+                    del feature_rows[position]
+                    del weights[position]
+            if catalog.is_live(row):
+                text = product_text(catalog, row)
+                for feature, weight in self.embedder.embed(text).items():
+                    feature_rows, weights = posting(feature)
+                    position = bisect_left(feature_rows, row)
+                    feature_rows.insert(position, row)
+                    weights.insert(position, weight)
+        return SemanticIndex(self.embedder, postings, len(catalog), self.source)
+
+    def search(self, query, k=20, max_postings=MAX_SCANNED_POSTINGS):
+        """Return up to ``k`` (row, score) pairs ordered by cosine similarity.
+
+        Walks at most ``max_postings`` posting entries, rarest features
+        first, and scores the best candidates exactly with the features
+        that did not fit (see the module docstring).
+        """
+        features = []
+        for feature, query_weight in self.embedder.embed(query).items():
+            posting = self.postings.get(feature)
+            if posting is not None:
+                features.append((len(posting[0]), query_weight, posting))
+        features.sort(key=lambda feature: feature[0])
+
+        scores = defaultdict(float)
+        skipped = []
+        scanned = 0
+        for length, query_weight, (rows, weights) in features:
+            if scanned and scanned + length > max_postings:
+                skipped.append((query_weight, rows, weights))
+                continue
+            # Only the rarest feature can be longer than the budget
+            for row, weight in zip(rows[:max_postings], weights[:max_postings]):
+                scores[row] += query_weight * weight
+            scanned += min(length, max_postings)
+
+        if skipped:
+            candidates = heapq.nlargest(
+                RESCORED_PER_RESULT * k, scores.items(), key=_by_score
+            )
+            scores = dict(candidates)
+            for row in scores:
+                for query_weight, rows, weights in skipped:
+                    position = bisect_left(rows, row)
+                    if position < len(rows) and rows[position] == row:
+                        scores[row] += query_weight * weights[position]
+        return heapq.nlargest(k, scores.items(), key=_by_score)
+
+    def save(self, path):
+        """Write the index to a JSON file."""
+        data = {
+            "size": self.size,
+            "source": self.source,
+            "embedder": self.embedder.to_dict(),
+            "postings": {
+                str(feature): [rows.tolist(), weights.tolist()]
+                for feature, (rows, weights) in self.postings.items()
+            },
+        }
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read an index written by ``save``."""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        embedder_data = data["embedder"]
+        embedder = EMBEDDERS[embedder_data["type"]].from_dict(embedder_data)
+        postings = {
+            int(feature): (array("Q", rows), array("f", weights))
+            for feature, (rows, weights) in data["postings"].items()
+        }
+        return cls(embedder, postings, data["size"], data.get("source"))
+
+
+def changed_rows(old_catalog, catalog, changes):
+    """Return the rows whose embedded text differs after catalog ``changes``."""
+    rows = set()
+    for op, change in changes:
+        if op == "delete":
+            row = old_catalog.row_for_name(change)
+            if row is not None:
+                rows.add(row)
+            continue
+        row = catalog.row_for_name(change["name"])
+        old_row = old_catalog.row_for_name(change["name"])
+        if row is None:
+            continue
+        if old_row != row:
+            # Inserted, or deleted and inserted again in the same batch
+            rows.add(row)
+            if old_row is not None:
+                rows.add(old_row)
+        elif catalog.category(row) != old_catalog.category(row):
+            rows.add(row)
+    return sorted(rows)
+
+
+def _source_info(catalog_path):
+    stat = os.stat(catalog_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def load_index(catalog_path, catalog):
+    """Load the index built for ``catalog_path``, rebuilding it if it is stale."""
+    index_path = catalog_path + INDEX_SUFFIX
+    source = _source_info(catalog_path)
+    try:
+        index = SemanticIndex.load(index_path)
+        if index.source == source and index.size == len(catalog):
+            return index
+    except (OSError, ValueError, KeyError):
+        pass
+
+    index = SemanticIndex.build(catalog, source=source)
+    try:
+        index.save(index_path)
+    except OSError as e:
+        print(f"Warning: could not write semantic index: {e}")
+    return index
+
+
+def main():
+    """Build the semantic index for a product file ahead of time."""
+    from catalog import load_catalog
+
+    catalog_path = sys.argv[1] if len(sys.argv) > 1 else "products.json"
+    catalog = load_catalog(catalog_path)
+    index = SemanticIndex.build(catalog, source=_source_info(catalog_path))
+    index.save(catalog_path + INDEX_SUFFIX)
+    print(f"Indexed {index.size} products into {catalog_path + INDEX_SUFFIX}")
+
+
+if __name__ == "__main__":
+    main()
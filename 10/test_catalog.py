@@ -0,0 +1,55 @@
+"""Binary catalog snapshots.
+
+python -m pytest 10/test_catalog.py
+"""
+
+import os
+import json
+
+import catalog
+from catalog import SNAPSHOT_SUFFIX, load_catalog
+
+
+def _write_products(path, count, categories):
+    products = [
+        {
+            "name": f"Product {row}",
+            "category": f"Category {row % categories}",
+            "price": 10.0 + row,
+            "rating": 3.0 + row % 20 / 10,
+            "in_stock": row % 3 != 0,
+        }
+        for row in range(count)
+    ]
+    path.write_text(json.dumps(products), encoding="utf-8")
+    return products
+
+
+def test_snapshot_with_many_categories_round_trips(tmp_path):
+    path = tmp_path / "products.json"
+    products = _write_products(path, 1000, categories=150)
+
+    built = load_catalog(str(path))
+    assert os.path.exists(str(path) + SNAPSHOT_SUFFIX)
+    assert not os.path.exists(str(path) + SNAPSHOT_SUFFIX + ".tmp")
+
+    mapped = load_catalog(str(path))
+    assert mapped._mapped is not None
+    assert list(mapped) == list(built) == products
+    for category in ("Category 0", "Category 149"):
+        expected = [p["name"] for p in products if p["category"] == category]
+        rows = mapped.filter_rows(category=category)
+        assert [mapped.name(row) for row in rows] == expected
+
+
+def test_snapshot_that_cannot_be_written_is_skipped(tmp_path, monkeypatch, capsys):
+    path = tmp_path / "products.json"
+    products = _write_products(path, 10, categories=2)
+
+    def fail(header):
+        raise ValueError("Snapshot header does not fit in the reserved space")
+
+    monkeypatch.setattr(catalog, "_encode_header", fail)
+    assert list(load_catalog(str(path))) == products
+    assert "could not write catalog snapshot" in capsys.readouterr().out
+    assert sorted(os.listdir(tmp_path)) == ["products.json"]
@@ -0,0 +1,94 @@
+"""Hot catalog updates and the semantic index that follows them.
+
+python -m pytest 10/test_catalog_watch.py
+"""
+
+import pytest
+
+from catalog import ProductCatalog
+from catalog_watch import LiveCatalog
+from semantic_index import SemanticIndex, changed_rows
+
+PRODUCTS = [
+    {
+        "name": "Robot Vacuum",
+        "category": "Home",
+        "price": 299.99,
+        "rating": 4.4,
+        "in_stock": True,
+    },
+    {
+        "name": "Espresso Machine",
+        "category": "Kitchen",
+        "price": 149.0,
+        "rating": 4.6,
+        "in_stock": True,
+    },
+    {
+        "name": "Trail Running Shoes",
+        "category": "Sports",
+        "price": 89.5,
+        "rating": 4.2,
+        "in_stock": False,
+    },
+]
+
+
+@pytest.fixture
+def catalog():
+    return ProductCatalog.from_products(PRODUCTS)
+
+
+def test_delete_and_reinsert_moves_the_product_to_a_new_row(catalog):
+    product = dict(PRODUCTS[0], category="Kitchen")
+    changes = [("delete", product["name"]), ("upsert", product)]
+    new = catalog.apply_changes(changes)
+    old_row = catalog.row_for_name(product["name"])
+    row = new.row_for_name(product["name"])
+    assert row != old_row
+
+    assert changed_rows(catalog, new, changes) == sorted({old_row, row})
+
+    index = SemanticIndex.build(catalog)
+    updated = index.updated(catalog, new, changed_rows(catalog, new, changes))
+    found = [found_row for found_row, _ in updated.search("robot vacuum kitchen")]
+    assert found[0] == row
+    assert old_row not in found
+
+
+def test_category_change_reembeds_the_row(catalog):
+    changes = [("upsert", {"name": "Espresso Machine", "category": "Home"})]
+    new = catalog.apply_changes(changes)
+    assert changed_rows(catalog, new, changes) == [
+        catalog.row_for_name("Espresso Machine")
+    ]
+
+    price_only = [("upsert", {"name": "Espresso Machine", "price": 129.0})]
+    assert changed_rows(catalog, catalog.apply_changes(price_only), price_only) == []
+
+
+def test_failed_listener_is_rebuilt_before_the_catalog_is_published(catalog):
+    live = LiveCatalog(catalog)
+    seen = []
+
+    def listener(old, new, changes):
+        assert live.catalog is old  # not published yet
+        raise IndexError("stale row")
+
+    live.on_update(listener, rebuild=seen.append)
+    new = live.apply([("delete", "Robot Vacuum")])
+
+    assert seen == [new]
+    assert live.catalog is new
+
+
+def test_failed_listener_without_rebuild_keeps_the_old_catalog(catalog):
+    live = LiveCatalog(catalog)
+
+    def listener(old, new, changes):
+        raise IndexError("stale row")
+
+    live.on_update(listener)
+    with pytest.raises(IndexError):
+        live.apply([("delete", "Robot Vacuum")])
+    assert live.catalog is catalog
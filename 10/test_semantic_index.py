@@ -0,0 +1,83 @@
+"""Semantic index search with a bounded number of scanned postings.
+
+python -m pytest 10/test_semantic_index.py
+"""
+
+import random
+from collections import defaultdict
+
+import pytest
+
+from catalog import ProductCatalog
+from semantic_index import SemanticIndex
+
+WORDS = ["premium", "wireless", "smart", "compact", "classic", "pro", "ultra"]
+NOUNS = {
+    "Electronics": ["Headphones", "Smart Watch", "Speaker", "Tablet"],
+    "Fitness": ["Yoga Mat", "Dumbbell Set", "Treadmill", "Running Belt"],
+    "Kitchen": ["Blender", "Air Fryer", "Coffee Maker", "Knife Set"],
+}
+QUERIES = ["premium blender", "cheap yoga mat", "smart watch 42", "knife", "tablet"]
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    rng = random.Random(0)
+    products = []
+    for number in range(3000):
+        category = rng.choice(sorted(NOUNS))
+        products.append(
+            {
+                "name": f"{rng.choice(WORDS)} {rng.choice(NOUNS[category])} {number}",
+                "category": category,
+                "price": round(rng.uniform(5, 500), 2),
+                "rating": round(rng.uniform(3.0, 5.0), 1),
+                "in_stock": rng.random() < 0.7,
+            }
+        )
+    return ProductCatalog.from_products(products)
+
+
+def _exact_scores(index, query):
+    scores = defaultdict(float)
+    for feature, query_weight in index.embedder.embed(query).items():
+        rows, weights = index.postings.get(feature, ((), ()))
+        for row, weight in zip(rows, weights):
+            scores[row] += query_weight * weight
+    return scores
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_search_within_budget_is_exact(catalog, query):
+    index = SemanticIndex.build(catalog)
+    scores = _exact_scores(index, query)
+    expected = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:20]
+    results = index.search(query)
+    assert [row for row, _ in results] == [row for row, _ in expected]
+    assert [score for _, score in results] == pytest.approx(
+        [score for _, score in expected]
+    )
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_bounded_search_scores_candidates_exactly(catalog, query):
+    index = SemanticIndex.build(catalog)
+    scores = _exact_scores(index, query)
+    best = sorted(scores.values(), reverse=True)[:20]
+
+    results = index.search(query, max_postings=1500)
+    assert len(results) == 20
+    for row, score in results:
+        assert score == pytest.approx(scores[row])
+    # Same quality as the exact search on this catalog
+    assert [score for _, score in results] == pytest.approx(best)
+
+
+def test_updated_postings_stay_sorted_by_row(catalog):
+    index = SemanticIndex.build(catalog)
+    changes = [("upsert", {"name": catalog.name(0), "category": "Fitness"})]
+    new = catalog.apply_changes(changes)
+    updated = index.updated(catalog, new, [0])
+    for rows, _ in updated.postings.values():
+        assert list(rows) == sorted(rows)
+    assert updated.search(f"{catalog.name(0)} fitness", max_postings=500)[0][0] == 0
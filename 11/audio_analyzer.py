@@ -1,48 +1,340 @@
 import os
+import sys
 import json
 import time
-import requests
+import hashlib
+import tempfile
+import threading
+import argparse
+import mimetypes
+import contextvars
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 from dotenv import load_dotenv
 import re
 
+# Shared helpers live in the common/ package at the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.metrics import add_arguments, get_default_metrics, report_at_exit
+from common.rate_limit import RateLimiter
+from common.response_cache import file_digest, get_default_cache, make_cache_key
+from common.scheduler import create_scheduler
+
+from audio_chunker import split_audio, stitch_transcripts
+from audio_preprocess import can_preprocess, describe, preprocess_audio
+from checkpoint_store import (
+    CheckpointStore,
+    checkpoint_key,
+    code_fingerprint,
+    get_default_store,
+)
+from text_chunker import estimate_text_tokens, split_text
+from text_stats import compute_text_stats
+from topic_extractor import extract_topics
+from batch_runner import expand_inputs, run_batch
+from live_stream import LiveAnalyzer
+
+# A pipeline stage: ``func`` is called with the results of the ``deps`` stages,
+# in order, and can start as soon as all of them have finished
+Stage = namedtuple("Stage", ["name", "func", "deps"])
+
 
 class AudioAnalyzer:
-    def __init__(self):
+    # Read timeouts in seconds; uploads and long completions need more time
+    transcription_timeout = 300
+    chat_timeout = 120
+
+    def __init__(
+        self,
+        max_workers=4,
+        rate_limiter=None,
+        chunk_seconds=600,
+        overlap_seconds=5,
+        text_chunk_tokens=2000,
+        chunk_workers=8,
+        llm_topic_labels=False,
+        checkpoints=None,
+        preprocess=False,
+        upload_mbps=20,
+    ):
         load_dotenv()
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
         if not self.openai_api_key:
             raise ValueError("OPENAI_API_KEY not found in environment variables")
 
-        self.base_url = "https://api.openai.com/v1"
-        self.headers = {
-            "Authorization": f"Bearer {self.openai_api_key}",
-            "Content-Type": "application/json",
+        # Every API call goes through the retrying, rate-limited scheduler
+        self.client = create_scheduler(rate_limiter)
+        self.cache = get_default_cache()
+        self.metrics = get_default_metrics()
+        self.max_workers = max_workers
+        self.rate_limiter = rate_limiter
+        self.chunk_seconds = chunk_seconds
+        self.overlap_seconds = overlap_seconds
+        self.text_chunk_tokens = text_chunk_tokens
+        self.chunk_workers = chunk_workers
+        self.llm_topic_labels = llm_topic_labels
+        self.checkpoints = (
+            checkpoints if checkpoints is not None else get_default_store()
+        )
+        self.preprocess = preprocess
+        self.upload_mbps = upload_mbps
+        self.preprocess_stats = {"files": 0, "original_bytes": 0, "bytes": 0}
+        self._preprocess_lock = threading.Lock()
+
+    def run_stages(self, stages):
+        """Run a DAG of stages, starting each stage as soon as its dependencies finish
+
+        Independent stages run concurrently on a thread pool. Returns the result
+        of every stage by name and the wall time of every stage by name. Both
+        are local to the call, so several files can be processed at once.
+        """
+        pending = {stage.name: stage for stage in stages}
+        running = {}
+        results = {}
+        timings = {}
+
+        def run(stage):
+            start = time.perf_counter()
+            with self.metrics.stage(stage.name):
+                value = stage.func(*(results[dep] for dep in stage.deps))
+            return value, time.perf_counter() - start
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    if all(dep in results for dep in stage.deps):
+                        del pending[name]
+                        # The stage's API calls are attributed to it in the metrics
+                        context = contextvars.copy_context()
+                        running[pool.submit(context.run, run, stage)] = name
+
+                if not running:
+                    raise ValueError(
+                        f"Stages with unsatisfiable dependencies: {', '.join(pending)}"
+                    )
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    results[name], timings[name] = future.result()
+
+        return results, timings
+
+    def _chat_completion(self, payload, error_message):
+        """Send a chat completion request, reusing a cached response if possible"""
+        cache_key = make_cache_key(payload)
+        result = self.cache.get(cache_key)
+        if result is not None:
+            print("   (using cached response)")
+            self.metrics.record_cache_hit("chat/completions", payload["model"], result)
+            return result
+
+        response = self.client.post(
+            "chat/completions", json=payload, timeout=self.chat_timeout
+        )
+
+        if response.status_code != 200:
+            raise Exception(
+                f"{error_message}: {response.status_code} - {response.text}"
+            )
+
+        result = response.json()
+        self.cache.set(cache_key, result)
+        return result
+
+    def checkpointed(self, name, func, params):
+        """Wrap a stage function so its result is reused from a checkpoint
+
+        The checkpoint key covers the stage name, ``params`` and the content
+        of the stage inputs, so a result is only reused for the same inputs
+        produced by the same settings and code.
+        """
+
+        def run(*inputs):
+            key = checkpoint_key(name, params, inputs)
+            result = self.checkpoints.get(key)
+            if result is not None:
+                print(f"♻️  Reusing checkpoint of stage '{name}'")
+                return result
+            result = func(*inputs)
+            self.checkpoints.set(key, result)
+            return result
+
+        return run
+
+    def stage_params(self, audio_file_path):
+        """Parameters of each checkpointed stage, including a code fingerprint"""
+        return {
+            "transcribe": {
+                "audio_sha256": file_digest(audio_file_path),
+                "chunk_seconds": self.chunk_seconds,
+                "overlap_seconds": self.overlap_seconds,
+                "preprocess": self.preprocess,
+                "code": code_fingerprint(
+                    self.transcribe_audio_segments,
+                    self._transcribe_file,
+                    self._transcribe_bytes,
+                    preprocess_audio,
+                ),
+            },
+            "improve": {
+                "text_chunk_tokens": self.text_chunk_tokens,
+                "code": code_fingerprint(self.improve_transcript, self._improve_chunk),
+            },
+            "summarize": {
+                "text_chunk_tokens": self.text_chunk_tokens,
+                "code": code_fingerprint(
+                    self.summarize_transcript,
+                    self._summarize,
+                    self._summarize_part,
+                    self._group_summaries,
+                    self._combine_summaries,
+                ),
+            },
+            "analyze": {
+                "llm_topic_labels": self.llm_topic_labels,
+                "code": code_fingerprint(
+                    self.analyze_transcript,
+                    self.label_topics,
+                    compute_text_stats,
+                    extract_topics,
+                ),
+            },
         }
 
+    def _map_chunks(self, func, chunks):
+        """Apply ``func`` to every chunk in parallel, keeping the chunk order"""
+        if len(chunks) <= 1:
+            return [func(chunk) for chunk in chunks]
+        workers = min(len(chunks), self.chunk_workers)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # Each chunk runs in a copy of the caller's context, so its API
+            # calls are attributed to the caller's stage
+            futures = [
+                pool.submit(contextvars.copy_context().run, func, chunk)
+                for chunk in chunks
+            ]
+            return [future.result() for future in futures]
+
     def transcribe_audio(self, audio_file_path):
-        """Transcribe audio using OpenAI Whisper API"""
+        """Transcribe audio using OpenAI Whisper API
+
+        Recordings longer than ``chunk_seconds`` (or above the upload limit)
+        are split into chunks that are transcribed in parallel and stitched
+        back together.
+        """
+        transcript, duration, _ = self.transcribe_audio_segments(audio_file_path)
+        return transcript, duration
+
+    def transcribe_audio_segments(self, audio_file_path):
+        """Transcribe audio, also returning the timestamped Whisper segments"""
         print(f"Transcribing audio file: {audio_file_path}")
 
         # Check if file exists
         if not os.path.exists(audio_file_path):
             raise FileNotFoundError(f"Audio file not found: {audio_file_path}")
 
-        # Prepare the file for upload
-        with open(audio_file_path, "rb") as audio_file:
-            files = {
-                "file": (os.path.basename(audio_file_path), audio_file, "audio/mpeg")
+        if not self.preprocess:
+            return self._transcribe_file(audio_file_path)
+
+        with tempfile.TemporaryDirectory() as work_dir:
+            prepared = self.prepare_upload(audio_file_path, work_dir)
+            if prepared is None:
+                return self._transcribe_file(audio_file_path)
+            transcript, _, segments = self._transcribe_file(prepared.path)
+
+        # Timestamps refer to the original recording, before the trimmed start
+        segments = [
+            {
+                **segment,
+                "start": segment["start"] + prepared.offset,
+                "end": segment["end"] + prepared.offset,
             }
-            data = {"model": "whisper-1", "response_format": "verbose_json"}
+            for segment in segments
+        ]
+        return transcript, prepared.original_seconds, segments
 
-            headers = {"Authorization": f"Bearer {self.openai_api_key}"}
+    def prepare_upload(self, audio_file_path, work_dir):
+        """Write a smaller copy of the audio to ``work_dir`` for upload
 
-            response = requests.post(
-                f"{self.base_url}/audio/transcriptions",
-                headers=headers,
-                files=files,
-                data=data,
+        Returns the ``Preprocessed`` copy, or None if the original should be
+        uploaded instead.
+        """
+        if not can_preprocess(audio_file_path):
+            ext = os.path.splitext(audio_file_path)[1] or "these"
+            print(
+                f"   Warning: preprocessing has no effect on {ext} files without "
+                "pydub and ffmpeg, uploading the original file"
             )
+            return None
+        try:
+            prepared = preprocess_audio(audio_file_path, work_dir)
+        except Exception as e:
+            print(f"   Preprocessing skipped, uploading the original file: {e}")
+            return None
+
+        print(f"   {describe(prepared, self.upload_mbps)}")
+        with self._preprocess_lock:
+            self.preprocess_stats["files"] += 1
+            self.preprocess_stats["original_bytes"] += prepared.original_bytes
+            self.preprocess_stats["bytes"] += prepared.bytes
+        return prepared
+
+    def _transcribe_file(self, audio_file_path):
+        """Transcribe a file as it is, in parallel chunks if it is long"""
+        chunks = split_audio(
+            audio_file_path,
+            window_seconds=self.chunk_seconds,
+            overlap_seconds=self.overlap_seconds,
+        )
+        if len(chunks) == 1:
+            with open(audio_file_path, "rb") as audio_file:
+                result = self._transcribe_bytes(
+                    audio_file.read(), os.path.basename(audio_file_path)
+                )
+            return (
+                result["text"],
+                result.get("duration", 0),
+                result.get("segments") or [],
+            )
+
+        print(
+            f"   Splitting into {len(chunks)} chunks of up to "
+            f"{self.chunk_seconds}s, transcribed in parallel"
+        )
+        results = self._map_chunks(
+            lambda chunk: self._transcribe_bytes(chunk.data, chunk.filename), chunks
+        )
+
+        transcript, segments = stitch_transcripts(chunks, results)
+        return transcript, chunks[-1].end, segments
+
+    def _transcribe_bytes(self, audio_bytes, filename):
+        """Upload audio bytes to the Whisper API and return the verbose_json result"""
+        data = {"model": "whisper-1", "response_format": "verbose_json"}
+
+        # Identical audio content with identical settings reuses the transcript
+        cache_key = make_cache_key(
+            {**data, "file_sha256": hashlib.sha256(audio_bytes).hexdigest()},
+            endpoint="audio/transcriptions",
+        )
+        result = self.cache.get(cache_key)
+        if result is not None:
+            print(f"   (using cached transcription of {filename})")
+            self.metrics.record_cache_hit("audio/transcriptions", data["model"], result)
+            return result
+
+        # Prepare the file for upload
+        content_type = mimetypes.guess_type(filename)[0] or "audio/mpeg"
+        files = {"file": (filename, audio_bytes, content_type)}
+
+        response = self.client.post(
+            "audio/transcriptions",
+            files=files,
+            data=data,
+            timeout=self.transcription_timeout,
+        )
 
         if response.status_code != 200:
             raise Exception(
@@ -50,12 +342,25 @@ class AudioAnalyzer:
             )
 
         result = response.json()
-        return result["text"], result.get("duration", 0)
+        self.cache.set(cache_key, result)
+        return result
 
     def improve_transcript(self, transcript):
-        """Improve transcript quality using GPT-4.1-mini"""
+        """Improve transcript quality using GPT-4.1-mini
+
+        Long transcripts are split into chunks of about ``text_chunk_tokens``
+        tokens on paragraph or sentence boundaries, which are improved in
+        parallel so that none of them is cut off by the output limit.
+        """
         print("Improving transcript quality...")
 
+        chunks = split_text(transcript, self.text_chunk_tokens)
+        if len(chunks) > 1:
+            print(f"   Improving {len(chunks)} chunks in parallel")
+        return "\n\n".join(self._map_chunks(self._improve_chunk, chunks))
+
+    def _improve_chunk(self, transcript):
+        """Improve one transcript chunk"""
         prompt = f"""
         Please analyze and improve the following transcript. Fix any issues while preserving the original meaning and content:
 
@@ -74,10 +379,8 @@ class AudioAnalyzer:
         Improved transcript:
         """
 
-        response = requests.post(
-            f"{self.base_url}/chat/completions",
-            headers=self.headers,
-            json={
+        result = self._chat_completion(
+            {
                 "model": "gpt-4.1-mini",
                 "messages": [
                     {
@@ -89,14 +392,9 @@ class AudioAnalyzer:
                 "max_tokens": 4000,
                 "temperature": 0.1,
             },
+            "Transcript improvement failed",
         )
 
-        if response.status_code != 200:
-            raise Exception(
-                f"Transcript improvement failed: {response.status_code} - {response.text}"
-            )
-
-        result = response.json()
         improved_transcript = result["choices"][0]["message"]["content"].strip()
 
         # Remove any potential markdown formatting that might have been added
@@ -106,9 +404,35 @@ class AudioAnalyzer:
         return improved_transcript
 
     def summarize_transcript(self, transcript):
-        """Summarize transcript using GPT-4.1-mini"""
+        """Summarize transcript using GPT-4.1-mini
+
+        A transcript longer than ``text_chunk_tokens`` is summarized with a
+        map-reduce: every chunk is summarized in parallel, then the partial
+        summaries are combined level by level until one summary remains.
+        """
         print("Generating summary...")
 
+        chunks = split_text(transcript, self.text_chunk_tokens)
+        if len(chunks) <= 1:
+            return self._summarize(transcript)
+
+        print(f"   Summarizing {len(chunks)} chunks in parallel")
+        summaries = self._map_chunks(self._summarize_part, chunks)
+
+        # Combine groups of partial summaries until they fit in one request
+        while estimate_text_tokens("\n\n".join(summaries)) > self.text_chunk_tokens:
+            groups = self._group_summaries(summaries)
+            if len(groups) == 1:
+                break  # the final combine below handles the last group
+            print(f"   Combining {len(summaries)} partial summaries into {len(groups)}")
+            summaries = self._map_chunks(
+                lambda group: self._combine_summaries(group, max_tokens=500), groups
+            )
+
+        return self._combine_summaries(summaries, max_tokens=1000)
+
+    def _summarize(self, transcript):
+        """Summarize a transcript that fits in one request"""
         prompt = f"""
         Please provide a comprehensive summary of the following transcript. 
         Focus on the main points, key insights, and important details.
@@ -120,10 +444,8 @@ class AudioAnalyzer:
         Summary:
         """
 
-        response = requests.post(
-            f"{self.base_url}/chat/completions",
-            headers=self.headers,
-            json={
+        result = self._chat_completion(
+            {
                 "model": "gpt-4.1-mini",
                 "messages": [
                     {
@@ -135,121 +457,231 @@ class AudioAnalyzer:
                 "max_tokens": 1000,
                 "temperature": 0.3,
             },
+            "Summarization failed",
         )
 
-        if response.status_code != 200:
-            raise Exception(
-                f"Summarization failed: {response.status_code} - {response.text}"
-            )
-
-        result = response.json()
         return result["choices"][0]["message"]["content"].strip()
 
-    def analyze_transcript(self, transcript, duration_seconds):
-        """Extract analytics from transcript using GPT-4.1-mini"""
-        print("Extracting analytics...")
+    def _summarize_part(self, transcript):
+        """Summarize one chunk of a longer transcript (map step)"""
+        prompt = f"""
+        The following is one part of a longer transcript.
+        Summarize this part, keeping its main points, key insights, names, numbers and decisions,
+        so that it can later be combined with the summaries of the other parts.
 
-        # Calculate word count using a more robust method
-        def count_words(text):
-            """Count words more accurately and consistently"""
-            # Remove extra whitespace and normalize
-            text = re.sub(r"\s+", " ", text.strip())
+        Transcript part:
+        {transcript}
 
-            # Split by whitespace and filter out empty strings
-            words = [word for word in text.split() if word.strip()]
+        Summary of this part:
+        """
 
-            # Additional filtering to remove common non-words
-            filtered_words = []
-            for word in words:
-                # Remove punctuation from word boundaries
-                clean_word = re.sub(r"^[^\w]+|[^\w]+$", "", word)
-                # Only count if it contains at least one letter or number
-                if re.search(r"[a-zA-Z0-9]", clean_word):
-                    filtered_words.append(clean_word)
+        result = self._chat_completion(
+            {
+                "model": "gpt-4.1-mini",
+                "messages": [
+                    {
+                        "role": "system",
+                        "content": "You are a professional summarizer. Create clear, concise, and comprehensive summaries that capture the essence and key points of the content.",
+                    },
+                    {"role": "user", "content": prompt},
+                ],
+                "max_tokens": 500,
+                "temperature": 0.3,
+            },
+            "Summarization failed",
+        )
+
+        return result["choices"][0]["message"]["content"].strip()
 
-            return len(filtered_words), filtered_words
+    def _group_summaries(self, summaries):
+        """Pack consecutive summaries into groups that fit in one request"""
+        groups = [[]]
+        for summary in summaries:
+            group = groups[-1]
+            # At least two summaries per group, so every level shrinks the list
+            if (
+                len(group) >= 2
+                and estimate_text_tokens("\n\n".join(group + [summary]))
+                > self.text_chunk_tokens
+            ):
+                groups.append([])
+            groups[-1].append(summary)
+        return groups
+
+    def _combine_summaries(self, summaries, max_tokens):
+        """Combine the summaries of consecutive transcript parts (reduce step)"""
+        parts = "\n\n".join(
+            f"Part {number}:\n{summary}" for number, summary in enumerate(summaries, 1)
+        )
+        prompt = f"""
+        The following are summaries of consecutive parts of one transcript, in order.
+        Combine them into a single comprehensive summary of the whole transcript.
+        Focus on the main points, key insights, and important details, and avoid repetition.
+        Make the summary clear, well-structured, and informative.
 
-        word_count, word_list = count_words(transcript)
+        {parts}
 
-        # Debug: Show word count details (first 20 words as sample)
-        print(f"   📊 Word count calculation:")
-        print(f"      • Total words found: {word_count}")
-        if word_count > 0:
-            sample_words = word_list[:20]
-            print(f"      • Sample words: {', '.join(sample_words)}")
-            if len(word_list) > 20:
-                print(f"      • ... and {len(word_list) - 20} more words")
-
-        # Calculate speaking speed (WPM)
-        speaking_speed_wpm = (
-            int(word_count / (duration_seconds / 60)) if duration_seconds > 0 else 0
+        Summary:
+        """
+
+        result = self._chat_completion(
+            {
+                "model": "gpt-4.1-mini",
+                "messages": [
+                    {
+                        "role": "system",
+                        "content": "You are a professional summarizer. Create clear, concise, and comprehensive summaries that capture the essence and key points of the content.",
+                    },
+                    {"role": "user", "content": prompt},
+                ],
+                "max_tokens": max_tokens,
+                "temperature": 0.3,
+            },
+            "Summarization failed",
         )
 
-        # Extract frequently mentioned topics
-        topics_prompt = f"""
-        Analyze the following transcript and extract the top 3-5 most frequently mentioned topics or themes.
-        Return the results as a JSON array with objects containing "topic" and "mentions" fields.
-        Only include topics that are mentioned at least 2 times.
-        
-        Transcript:
+        return result["choices"][0]["message"]["content"].strip()
+
+    def update_summary(self, summary, transcript):
+        """Extend a rolling summary with the transcript that followed it
+
+        Used by the streaming mode: the prompt holds the current summary and
+        only the new part of the transcript, so it stays small however long
+        the recording gets.
+        """
+        if not summary:
+            return self._summarize(transcript)
+
+        prompt = f"""
+        The following is the summary of a conversation so far, and the transcript of what was said next.
+        Update the summary so that it covers the whole conversation up to now.
+        Keep the main points, key insights, names, numbers and decisions, and avoid repetition.
+        Make the summary clear, well-structured, and informative.
+
+        Summary so far:
+        {summary}
+
+        New transcript:
         {transcript}
-        
-        Return only valid JSON in this exact format:
-        [
-            {{"topic": "Topic Name", "mentions": number}},
-            {{"topic": "Another Topic", "mentions": number}}
-        ]
+
+        Updated summary:
         """
 
-        response = requests.post(
-            f"{self.base_url}/chat/completions",
-            headers=self.headers,
-            json={
+        result = self._chat_completion(
+            {
                 "model": "gpt-4.1-mini",
                 "messages": [
                     {
                         "role": "system",
-                        "content": "You are a data analyst. Extract structured information and return only valid JSON.",
+                        "content": "You are a professional summarizer. Create clear, concise, and comprehensive summaries that capture the essence and key points of the content.",
                     },
-                    {"role": "user", "content": topics_prompt},
+                    {"role": "user", "content": prompt},
                 ],
-                "max_tokens": 500,
-                "temperature": 0.1,
+                "max_tokens": 1000,
+                "temperature": 0.3,
             },
+            "Summarization failed",
         )
 
-        if response.status_code != 200:
-            raise Exception(
-                f"Analytics extraction failed: {response.status_code} - {response.text}"
-            )
+        return result["choices"][0]["message"]["content"].strip()
 
-        result = response.json()
-        topics_text = result["choices"][0]["message"]["content"].strip()
+    def analyze_transcript(self, transcript, duration_seconds, segments=None):
+        """Extract analytics from transcript
 
-        # Parse the JSON response
-        try:
-            # Extract JSON from the response (in case there's extra text)
-            json_match = re.search(r"\[.*\]", topics_text, re.DOTALL)
-            if json_match:
-                frequently_mentioned_topics = json.loads(json_match.group())
-            else:
-                frequently_mentioned_topics = []
-        except json.JSONDecodeError:
-            print("Warning: Could not parse topics JSON, using empty list")
-            frequently_mentioned_topics = []
+        Everything is computed locally; only the optional topic labeling
+        (``llm_topic_labels``) calls GPT-4.1-mini.
+        """
+        print("Extracting analytics...")
+
+        # Word count, speaking speed and the other statistics in one pass
+        stats = compute_text_stats(transcript, duration_seconds, segments)
+        word_count = stats["word_count"]
+        speaking_speed_wpm = stats["speaking_speed_wpm"]
+
+        # Debug: Show word count details (first 20 words as sample)
+        print(f"   📊 Word count calculation:")
+        print(f"      • Total words found: {word_count}")
+        if word_count > 0:
+            print(f"      • Sample words: {', '.join(stats['sample_words'])}")
+            if word_count > 20:
+                print(f"      • ... and {word_count - 20} more words")
+
+        # Frequently mentioned topics are counted locally, so the counts are exact
+        topics = extract_topics(transcript, with_related=True)
+        if self.llm_topic_labels and topics:
+            topics = self.label_topics(topics)
+        frequently_mentioned_topics = [
+            {"topic": topic["topic"], "mentions": topic["mentions"]} for topic in topics
+        ]
 
         analytics = {
             "word_count": word_count,
             "speaking_speed_wpm": speaking_speed_wpm,
             "frequently_mentioned_topics": frequently_mentioned_topics,
+            "text_statistics": {
+                "sentence_count": stats["sentence_count"],
+                "vocabulary_size": stats["vocabulary_size"],
+                "top_bigrams": stats["top_2grams"],
+                "segment_speeds": stats.get("segment_speeds", []),
+            },
         }
 
         return analytics
 
-    def save_transcription(self, transcript, audio_file_path):
+    def label_topics(self, topics):
+        """Name locally found topic clusters using GPT-4.1-mini
+
+        Only the topic names change; the mention counts stay the exact local
+        counts. If the reply cannot be parsed the local names are kept.
+        """
+        clusters = "\n".join(
+            f"{number}. {', '.join([topic['topic']] + topic.get('related', []))}"
+            for number, topic in enumerate(topics, 1)
+        )
+        labels_prompt = f"""
+        Each numbered line below is a cluster of related key phrases found in a transcript.
+        Give each cluster a short, descriptive topic name of 1-4 words.
+
+        {clusters}
+
+        Return only a JSON array with one name per line, in the same order, for example:
+        ["Topic Name", "Another Topic"]
+        """
+
+        result = self._chat_completion(
+            {
+                "model": "gpt-4.1-mini",
+                "messages": [
+                    {
+                        "role": "system",
+                        "content": "You are a data analyst. Extract structured information and return only valid JSON.",
+                    },
+                    {"role": "user", "content": labels_prompt},
+                ],
+                "max_tokens": 100,
+                "temperature": 0.1,
+            },
+            "Topic labeling failed",
+        )
+
+        labels_text = result["choices"][0]["message"]["content"].strip()
+        try:
+            json_match = re.search(r"\[.*\]", labels_text, re.DOTALL)
+            labels = json.loads(json_match.group()) if json_match else []
+        except json.JSONDecodeError:
+            labels = []
+        if len(labels) != len(topics) or not all(
+            isinstance(label, str) for label in labels
+        ):
+            print("Warning: Could not parse topic labels, keeping local names")
+            return topics
+
+        return [{**topic, "topic": label} for topic, label in zip(topics, labels)]
+
+    def save_transcription(self, transcript, audio_file_path, output_dir="."):
         """Save transcription to a timestamped file"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"transcription_{timestamp}.md"
+        filename = os.path.join(output_dir, f"transcription_{timestamp}.md")
 
         with open(filename, "w", encoding="utf-8") as f:
             f.write(f"# Audio Transcription\n\n")
@@ -263,10 +695,10 @@ class AudioAnalyzer:
         print(f"Transcription saved to: {filename}")
         return filename
 
-    def save_summary(self, summary, audio_file_path):
+    def save_summary(self, summary, audio_file_path, output_dir="."):
         """Save summary to a file"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"summary_{timestamp}.md"
+        filename = os.path.join(output_dir, f"summary_{timestamp}.md")
 
         with open(filename, "w", encoding="utf-8") as f:
             f.write(f"# Audio Summary\n\n")
@@ -280,10 +712,10 @@ class AudioAnalyzer:
         print(f"Summary saved to: {filename}")
         return filename
 
-    def save_analytics(self, analytics, audio_file_path):
+    def save_analytics(self, analytics, audio_file_path, output_dir="."):
         """Save analytics to a JSON file"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"analysis_{timestamp}.json"
+        filename = os.path.join(output_dir, f"analysis_{timestamp}.json")
 
         analytics_with_metadata = {
             "metadata": {
@@ -299,39 +731,94 @@ class AudioAnalyzer:
         print(f"Analytics saved to: {filename}")
         return filename
 
-    def process_audio(self, audio_file_path):
+    def process_audio(self, audio_file_path, output_dir="."):
         """Main method to process audio file"""
         try:
+            os.makedirs(output_dir, exist_ok=True)
             print("=" * 60)
             print("AUDIO TRANSCRIPTION AND ANALYSIS TOOL")
             print("=" * 60)
 
-            # Step 1: Transcribe audio
-            raw_transcript, duration = self.transcribe_audio(audio_file_path)
-            print(f"✓ Raw transcription completed ({len(raw_transcript)} characters)")
+            started = time.perf_counter()
 
-            # Step 2: Improve transcript quality
-            improved_transcript = self.improve_transcript(raw_transcript)
-            print(
-                f"✓ Transcript quality improved ({len(improved_transcript)} characters)"
-            )
+            def transcribe():
+                transcription = self.transcribe_audio_segments(audio_file_path)
+                print(
+                    f"✓ Raw transcription completed ({len(transcription[0])} characters)"
+                )
+                return transcription
+
+            def improve(transcription):
+                improved_transcript = self.improve_transcript(transcription[0])
+                print(
+                    f"✓ Transcript quality improved ({len(improved_transcript)} characters)"
+                )
+                return improved_transcript
 
-            # Step 3: Generate summary
-            summary = self.summarize_transcript(improved_transcript)
-            print(f"✓ Summary generated ({len(summary)} characters)")
+            def summarize(improved_transcript):
+                summary = self.summarize_transcript(improved_transcript)
+                print(f"✓ Summary generated ({len(summary)} characters)")
+                return summary
 
-            # Step 4: Extract analytics
-            analytics = self.analyze_transcript(improved_transcript, duration)
-            print(f"✓ Analytics extracted")
+            def analyze(improved_transcript, transcription):
+                analytics = self.analyze_transcript(
+                    improved_transcript, transcription[1], transcription[2]
+                )
+                print(f"✓ Analytics extracted")
+                return analytics
 
-            # Step 5: Save results
-            transcription_file = self.save_transcription(
-                improved_transcript, audio_file_path
+            # Completed stages of an earlier run on the same audio are reused
+            params = self.stage_params(audio_file_path)
+            transcribe = self.checkpointed(
+                "transcribe", transcribe, params["transcribe"]
             )
-            summary_file = self.save_summary(summary, audio_file_path)
-            analytics_file = self.save_analytics(analytics, audio_file_path)
+            improve = self.checkpointed("improve", improve, params["improve"])
+            summarize = self.checkpointed("summarize", summarize, params["summarize"])
+            analyze = self.checkpointed("analyze", analyze, params["analyze"])
+
+            # Summary and analytics only depend on the improved transcript, so
+            # they run concurrently, and each file is saved as soon as it is ready
+            with self.metrics.stage("process_audio"):
+                results, timings = self.run_stages(
+                    [
+                        Stage("transcribe", transcribe, []),
+                        Stage("improve", improve, ["transcribe"]),
+                        Stage("summarize", summarize, ["improve"]),
+                        Stage("analyze", analyze, ["improve", "transcribe"]),
+                        Stage(
+                            "save_transcription",
+                            lambda improved: self.save_transcription(
+                                improved, audio_file_path, output_dir
+                            ),
+                            ["improve"],
+                        ),
+                        Stage(
+                            "save_summary",
+                            lambda summary: self.save_summary(
+                                summary, audio_file_path, output_dir
+                            ),
+                            ["summarize"],
+                        ),
+                        Stage(
+                            "save_analytics",
+                            lambda analytics: self.save_analytics(
+                                analytics, audio_file_path, output_dir
+                            ),
+                            ["analyze"],
+                        ),
+                    ]
+                )
+            total_time = time.perf_counter() - started
+
+            raw_transcript, duration, _ = results["transcribe"]
+            improved_transcript = results["improve"]
+            summary = results["summarize"]
+            analytics = results["analyze"]
+            transcription_file = results["save_transcription"]
+            summary_file = results["save_summary"]
+            analytics_file = results["save_analytics"]
 
-            # Step 6: Display results
+            # Display results
             print("\n" + "=" * 60)
             print("RESULTS")
             print("=" * 60)
@@ -355,6 +842,22 @@ class AudioAnalyzer:
             print(summary[:300] + "..." if len(summary) > 300 else summary)
             print("-" * 40)
 
+            print(f"\n⏱️  STAGE TIMINGS:")
+            for name, seconds in timings.items():
+                print(f"   • {name}: {seconds:.2f}s")
+            print(f"   • Total wall time: {total_time:.2f}s")
+
+            cache_stats = self.cache.stats()
+            print(
+                f"\n💾 Response cache: {cache_stats['hits']} hits, "
+                f"{cache_stats['misses']} misses"
+            )
+            checkpoint_stats = self.checkpoints.stats()
+            print(
+                f"♻️  Stage checkpoints: {checkpoint_stats['hits']} reused, "
+                f"{checkpoint_stats['stores']} saved"
+            )
+
             # Show improvement comparison if there are significant differences
             if len(improved_transcript) != len(raw_transcript):
                 print(f"\n🔧 TRANSCRIPT IMPROVEMENT:")
@@ -369,6 +872,8 @@ class AudioAnalyzer:
                 "improved_transcript": improved_transcript,
                 "summary": summary,
                 "analytics": analytics,
+                "duration": duration,
+                "timings": timings,
                 "files": {
                     "transcription": transcription_file,
                     "summary": summary_file,
@@ -381,24 +886,211 @@ class AudioAnalyzer:
             raise
 
 
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description="Transcribe, summarize and analyze audio files",
+        epilog="Example: python audio_analyzer.py sample_audio.mp3",
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="+",
+        help="Audio file, or several files, directories or glob patterns (batch mode)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Number of files processed in parallel in batch mode (default: 4)",
+    )
+    parser.add_argument(
+        "--output-dir",
+        default="batch_results",
+        help="Batch mode output directory with the manifest and index (default: batch_results)",
+    )
+    parser.add_argument(
+        "--chunk-seconds",
+        type=int,
+        default=600,
+        help="Split longer recordings into chunks of this length, transcribed in parallel (default: 600)",
+    )
+    parser.add_argument(
+        "--overlap-seconds",
+        type=float,
+        default=5,
+        help="Overlap between consecutive MP3 chunks, to avoid cutting words (default: 5)",
+    )
+    parser.add_argument(
+        "--text-chunk-tokens",
+        type=int,
+        default=2000,
+        help="Improve and summarize longer transcripts in chunks of about this many tokens (default: 2000)",
+    )
+    parser.add_argument(
+        "--llm-topic-labels",
+        action="store_true",
+        help="Let GPT-4.1-mini name the locally found topics (one extra short API call)",
+    )
+    parser.add_argument(
+        "--no-checkpoints",
+        action="store_true",
+        help="Recompute every stage instead of reusing stage checkpoints of earlier runs",
+    )
+    parser.add_argument(
+        "--preprocess",
+        action="store_true",
+        help="Shrink recordings before upload: mono, 16 kHz, silence trimmed, re-encoded",
+    )
+    parser.add_argument(
+        "--upload-mbps",
+        type=float,
+        default=20,
+        help="Upload bandwidth used to estimate the upload time saved by --preprocess (default: 20)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Analyze a recording while it is being written: follow a growing file, or read stdin with -",
+    )
+    parser.add_argument(
+        "--window-seconds",
+        type=int,
+        default=15,
+        help="Streaming mode: transcribe the audio in windows of this length (default: 15)",
+    )
+    parser.add_argument(
+        "--summary-seconds",
+        type=int,
+        default=60,
+        help="Streaming mode: update the rolling summary after this much audio (default: 60)",
+    )
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=10,
+        help="Streaming mode: stop when the file has not grown for this many seconds (default: 10)",
+    )
+    parser.add_argument(
+        "--rpm", type=int, help="Maximum API requests per minute across all workers"
+    )
+    parser.add_argument(
+        "--tpm", type=int, help="Maximum API tokens per minute across all workers"
+    )
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.stream:
+        # These only apply to complete files; streams are cut into windows
+        ignored = [
+            flag
+            for flag, dest in [
+                ("--preprocess", "preprocess"),
+                ("--no-checkpoints", "no_checkpoints"),
+                ("--chunk-seconds", "chunk_seconds"),
+                ("--overlap-seconds", "overlap_seconds"),
+            ]
+            if getattr(args, dest) != parser.get_default(dest)
+        ]
+        if ignored:
+            parser.error(
+                f"{', '.join(ignored)} cannot be used with --stream, "
+                "which reads the audio in --window-seconds windows"
+            )
+    return args
+
+
 def main():
     """Main function to run the application"""
-    import sys
+    args = parse_args()
+    report_at_exit(args)
 
-    if len(sys.argv) != 2:
-        print("Usage: python audio_analyzer.py <audio_file_path>")
-        print("Example: python audio_analyzer.py sample_audio.mp3")
-        sys.exit(1)
+    rate_limiter = None
+    if args.rpm or args.tpm:
+        rate_limiter = RateLimiter(
+            requests_per_minute=args.rpm, tokens_per_minute=args.tpm
+        )
+
+    checkpoints = None
+    if args.no_checkpoints:
+        checkpoints = CheckpointStore(enabled=False)
+
+    if args.stream:
+        if len(args.inputs) != 1:
+            print("❌ --stream takes one audio file, or - for stdin")
+            sys.exit(1)
+        try:
+            analyzer = AudioAnalyzer(
+                rate_limiter=rate_limiter,
+                text_chunk_tokens=args.text_chunk_tokens,
+                llm_topic_labels=args.llm_topic_labels,
+            )
+            live = LiveAnalyzer(
+                analyzer,
+                window_seconds=args.window_seconds,
+                summary_seconds=args.summary_seconds,
+            )
+            live.run(args.inputs[0], idle_timeout=args.idle_timeout)
+            print("\n✅ Processing completed successfully!")
+
+        except Exception as e:
+            print(f"\n❌ Failed to process audio stream: {str(e)}")
+            sys.exit(1)
+        return
+
+    # A single existing file keeps the original one-file behaviour
+    if len(args.inputs) == 1 and os.path.isfile(args.inputs[0]):
+        try:
+            analyzer = AudioAnalyzer(
+                rate_limiter=rate_limiter,
+                chunk_seconds=args.chunk_seconds,
+                overlap_seconds=args.overlap_seconds,
+                text_chunk_tokens=args.text_chunk_tokens,
+                llm_topic_labels=args.llm_topic_labels,
+                checkpoints=checkpoints,
+                preprocess=args.preprocess,
+                upload_mbps=args.upload_mbps,
+            )
+            results = analyzer.process_audio(args.inputs[0])
+            print("\n✅ Processing completed successfully!")
 
-    audio_file_path = sys.argv[1]
+        except Exception as e:
+            print(f"\n❌ Failed to process audio: {str(e)}")
+            sys.exit(1)
+        return
+
+    files = expand_inputs(args.inputs)
+    if not files:
+        print("❌ No audio files found for the given inputs")
+        sys.exit(1)
+    unchanged = [path for path in files if not can_preprocess(path)]
+    if args.preprocess and unchanged:
+        print(
+            f"Warning: --preprocess has no effect on {len(unchanged)} of {len(files)} "
+            "files, which need pydub and ffmpeg (pip install pydub); "
+            "they are uploaded unchanged"
+        )
 
     try:
-        analyzer = AudioAnalyzer()
-        results = analyzer.process_audio(audio_file_path)
-        print("\n✅ Processing completed successfully!")
+        analyzer = AudioAnalyzer(
+            rate_limiter=rate_limiter,
+            chunk_seconds=args.chunk_seconds,
+            overlap_seconds=args.overlap_seconds,
+            text_chunk_tokens=args.text_chunk_tokens,
+            llm_topic_labels=args.llm_topic_labels,
+            checkpoints=checkpoints,
+            preprocess=args.preprocess,
+            upload_mbps=args.upload_mbps,
+        )
+    except ValueError as e:
+        print(f"\n❌ {str(e)}")
+        sys.exit(1)
 
-    except Exception as e:
-        print(f"\n❌ Failed to process audio: {str(e)}")
+    entries = run_batch(
+        analyzer, files, output_dir=args.output_dir, concurrency=args.concurrency
+    )
+    if any(entry["status"] != "done" for entry in entries):
         sys.exit(1)
 
 
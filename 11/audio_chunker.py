@@ -0,0 +1,572 @@
+"""Split long audio files into chunks that can be transcribed in parallel.
+
+MP3 files are cut on frame boundaries into fixed windows that overlap by a
+few seconds, so words at a cut are heard in full by one of the two chunks.
+16-bit PCM WAV files are cut at the quietest point near each window boundary
+instead, which needs no overlap. Both use only the standard library; other
+formats are sent as a single chunk.
+
+``stitch_transcripts`` merges the transcription of every chunk back into one
+transcript with timestamps relative to the whole file, dropping the text that
+was transcribed twice in the overlaps.
+
+Audio that is still being written is cut while it arrives: ``stream_windows``
+reads MP3 frames or WAV samples from a stream of byte blocks and yields
+overlapping windows of a fixed length, and ``StreamStitcher`` stitches their
+transcriptions window by window.
+"""
+
+import io
+import os
+import re
+import wave
+import struct
+from array import array
+from collections import deque, namedtuple
+
+# Whisper rejects uploads above 25 MB; stay a little below it
+MAX_UPLOAD_BYTES = 24 * 1024 * 1024
+
+# ``start``/``end`` are seconds in the original file, ``data`` the chunk bytes
+AudioChunk = namedtuple("AudioChunk", ["index", "start", "end", "data", "filename"])
+
+# MPEG audio frame header tables (Layer III only)
+_MP3_BITRATES = {
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_MP3_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG 1
+    2: [22050, 24000, 16000],  # MPEG 2
+    0: [11025, 12000, 8000],  # MPEG 2.5
+}
+
+Mp3Frame = namedtuple("Mp3Frame", ["offset", "length", "duration"])
+
+
+def _parse_mp3_header(header):
+    """Return (frame length, duration) of an MPEG Layer III header, or None."""
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = header[1] >> 3 & 0x03
+    layer = header[1] >> 1 & 0x03
+    bitrate_index = header[2] >> 4
+    sample_rate_index = header[2] >> 2 & 0x03
+    padding = header[2] >> 1 & 0x01
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    bitrate = _MP3_BITRATES[1 if version == 3 else 2][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][sample_rate_index]
+    samples = 1152 if version == 3 else 576
+    length = samples // 8 * bitrate // sample_rate + padding
+    return length, samples / sample_rate
+
+
+def read_mp3_frames(data):
+    """Return the audio frames of an MP3 file's bytes, skipping tags and junk."""
+    pos = 0
+    if data[:3] == b"ID3" and len(data) >= 10:
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        pos = 10 + size + (10 if data[5] & 0x10 else 0)
+
+    frames = []
+    end = len(data)
+    while pos + 4 <= end:
+        parsed = _parse_mp3_header(data[pos : pos + 4])
+        if parsed is None or pos + parsed[0] > end:
+            pos += 1  # resynchronize on the next possible frame header
+            continue
+        length, duration = parsed
+        # Outside the first frame, require the next header to be valid as well,
+        # so that sync-like bytes inside audio data are not taken for a frame
+        next_pos = pos + length
+        if (
+            frames
+            or next_pos + 4 > end
+            or _parse_mp3_header(data[next_pos : next_pos + 4])
+        ):
+            frames.append(Mp3Frame(pos, length, duration))
+            pos = next_pos
+        else:
+            pos += 1
+    return frames
+
+
+def split_mp3(data, name, window_seconds, overlap_seconds, max_bytes):
+    """Cut MP3 bytes into overlapping windows on frame boundaries."""
+    frames = read_mp3_frames(data)
+    if not frames:
+        return [AudioChunk(0, 0.0, 0.0, data, name)]
+
+    starts = [0.0]
+    for frame in frames:
+        starts.append(starts[-1] + frame.duration)
+    total = starts[-1]
+
+    chunks = []
+    first = 0
+    while first < len(frames):
+        window_start = starts[first]
+        last = first
+        size = 0
+        # Grow the chunk until it covers the window plus the overlap, or hits
+        # the upload limit
+        while (
+            last < len(frames)
+            and starts[last] < window_start + window_seconds + overlap_seconds
+            and size + frames[last].length <= max_bytes
+        ):
+            size += frames[last].length
+            last += 1
+
+        begin = frames[first].offset
+        finish = frames[last - 1].offset + frames[last - 1].length
+        stem, ext = os.path.splitext(name)
+        chunks.append(
+            AudioChunk(
+                len(chunks),
+                window_start,
+                starts[last],
+                data[begin:finish],
+                f"{stem}_part{len(chunks):03d}{ext}",
+            )
+        )
+        if last >= len(frames):
+            break
+
+        # The next chunk starts ``overlap_seconds`` before this one ends
+        next_start = max(starts[last] - overlap_seconds, window_start + 1e-6)
+        next_first = first
+        while next_first < last and starts[next_first] < next_start:
+            next_first += 1
+        first = max(next_first, first + 1)
+
+    if abs(chunks[-1].end - total) > 1e-6:
+        chunks[-1] = chunks[-1]._replace(end=total)
+    return chunks
+
+
+def _quietest_frame(samples, channels, frame_rate, low, high, block_seconds=0.05):
+    """Return the frame index of the quietest block between frames low and high."""
+    block = max(1, int(frame_rate * block_seconds))
+    best_frame, best_energy = (low + high) // 2, None
+    for start in range(low, max(low + 1, high - block), block):
+        values = samples[start * channels : (start + block) * channels]
+        if not values:
+            break
+        energy = sum(value * value for value in values) / len(values)
+        if best_energy is None or energy < best_energy:
+            best_frame, best_energy = start + block // 2, energy
+    return best_frame
+
+
+def split_wav(data, name, window_seconds, max_bytes, search_seconds=15.0):
+    """Cut WAV bytes near each window boundary at the quietest point."""
+    with wave.open(io.BytesIO(data), "rb") as source:
+        params = source.getparams()
+        raw = source.readframes(params.nframes)
+
+    frame_size = params.sampwidth * params.nchannels
+    frame_rate = params.framerate
+    total_frames = len(raw) // frame_size
+    window_frames = int(
+        min(window_seconds * frame_rate, (max_bytes - 1024) // frame_size)
+    )
+    search_frames = int(min(search_seconds, window_seconds / 4) * frame_rate)
+
+    samples = None
+    if params.sampwidth == 2:
+        samples = array("h")
+        samples.frombytes(raw)
+
+    cuts = [0]
+    while total_frames - cuts[-1] > window_frames:
+        target = cuts[-1] + window_frames
+        if samples is not None:
+            target = _quietest_frame(
+                samples,
+                params.nchannels,
+                frame_rate,
+                max(cuts[-1] + 1, target - search_frames),
+                target,
+            )
+        cuts.append(target)
+    cuts.append(total_frames)
+
+    chunks = []
+    stem, ext = os.path.splitext(name)
+    for index, (start, end) in enumerate(zip(cuts, cuts[1:])):
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as target:
+            target.setparams(params)
+            target.writeframes(raw[start * frame_size : end * frame_size])
+        chunks.append(
+            AudioChunk(
+                index,
+                start / frame_rate,
+                end / frame_rate,
+                buffer.getvalue(),
+                f"{stem}_part{index:03d}{ext}",
+            )
+        )
+    return chunks
+
+
+def split_audio(
+    path, window_seconds=300, overlap_seconds=5, max_bytes=MAX_UPLOAD_BYTES
+):
+    """Split an audio file into chunks of at most ``window_seconds`` each.
+
+    Returns a list of ``AudioChunk``; a file that does not need splitting, or
+    whose format cannot be split, is returned as a single chunk.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    name = os.path.basename(path)
+    ext = os.path.splitext(name)[1].lower()
+
+    if ext == ".mp3":
+        return split_mp3(data, name, window_seconds, overlap_seconds, max_bytes)
+    if ext == ".wav":
+        try:
+            return split_wav(data, name, window_seconds, max_bytes)
+        except (wave.Error, EOFError):
+            pass
+
+    if len(data) > max_bytes:
+        raise ValueError(
+            f"{name} is larger than the {max_bytes // (1024 * 1024)} MB upload limit "
+            "and only MP3 and WAV files can be split; convert it to MP3 first"
+        )
+    return [AudioChunk(0, 0.0, 0.0, data, name)]
+
+
+class Mp3StreamReader:
+    """Split MP3 bytes that arrive in pieces into complete frames."""
+
+    extension = ".mp3"
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.synced = False
+        self.skip = None  # bytes of the leading ID3 tag still to skip
+
+    def feed(self, data, final=False):
+        """Add bytes; returns the frames completed so far as (bytes, seconds).
+
+        A frame cut at the end of ``data`` is kept until its rest arrives;
+        ``final`` marks the end of the stream.
+        """
+        buffer = self.buffer
+        buffer += data
+        if self.skip is None:
+            if len(buffer) < 10 and not final:
+                return []
+            self.skip = 0
+            if buffer[:3] == b"ID3" and len(buffer) >= 10:
+                tag = buffer[:10]
+                size = (tag[6] << 21) | (tag[7] << 14) | (tag[8] << 7) | tag[9]
+                self.skip = 10 + size + (10 if tag[5] & 0x10 else 0)
+        if self.skip:
+            skipped = min(self.skip, len(buffer))
+            del buffer[:skipped]
+            self.skip -= skipped
+
+        frames = []
+        pos = 0
+        end = len(buffer)
+        while pos + 4 <= end:
+            parsed = _parse_mp3_header(buffer[pos : pos + 4])
+            if parsed is None:
+                self.synced = False
+                pos += 1
+                continue
+            length, duration = parsed
+            next_pos = pos + length
+            if next_pos > end:
+                break
+            # Like read_mp3_frames, a frame found after junk needs a valid next
+            # header, which may not have arrived yet
+            if not self.synced:
+                if next_pos + 4 > end:
+                    if not final:
+                        break
+                elif not _parse_mp3_header(buffer[next_pos : next_pos + 4]):
+                    pos += 1
+                    continue
+            frames.append((bytes(buffer[pos:next_pos]), duration))
+            self.synced = True
+            pos = next_pos
+        del buffer[:pos]
+        if final:
+            buffer.clear()
+        return frames
+
+    def encode(self, pieces):
+        """Return a playable file made of consecutive frames."""
+        return b"".join(pieces)
+
+
+class WavStreamReader:
+    """Split PCM WAV bytes that arrive in pieces into blocks of samples.
+
+    The sizes in the header of a file that is still being written are wrong
+    or zero, so everything after the ``data`` chunk header is taken as
+    samples.
+    """
+
+    extension = ".wav"
+
+    # Windows are cut on block boundaries
+    block_seconds = 0.25
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.params = None  # (channels, sample width, frame rate)
+
+    def _read_header(self):
+        buffer = self.buffer
+        if len(buffer) < 12:
+            return False
+        if buffer[:4] != b"RIFF" or buffer[8:12] != b"WAVE":
+            raise ValueError("The stream is not a WAV file")
+        pos = 12
+        fmt = None
+        while pos + 8 <= len(buffer):
+            chunk_id = bytes(buffer[pos : pos + 4])
+            size = int.from_bytes(buffer[pos + 4 : pos + 8], "little")
+            if chunk_id == b"data":
+                if fmt is None:
+                    raise ValueError("The WAV stream has no fmt chunk")
+                self.params = fmt
+                del buffer[: pos + 8]
+                return True
+            if pos + 8 + size > len(buffer):
+                return False
+            if chunk_id == b"fmt ":
+                audio_format, channels, rate = struct.unpack_from(
+                    "<HHI", buffer, pos + 8
+                )
+                (bits,) = struct.unpack_from("<H", buffer, pos + 22)
+                if audio_format not in (1, 0xFFFE):
+                    raise ValueError("Only PCM WAV streams are supported")
+                fmt = (channels, bits // 8, rate)
+            pos += 8 + size + size % 2
+        return False
+
+    def feed(self, data, final=False):
+        """Add bytes; returns the complete blocks of samples as (bytes, seconds)."""
+        self.buffer += data
+        if self.params is None and not self._read_header():
+            return []
+        channels, width, rate = self.params
+        frame_size = channels * width
+        block = max(1, int(rate * self.block_seconds)) * frame_size
+        usable = len(self.buffer) - len(self.buffer) % frame_size
+        if not final:
+            usable -= usable % block
+        blocks = []
+        for start in range(0, usable, block):
+            data = bytes(self.buffer[start : min(start + block, usable)])
+            blocks.append((data, len(data) / frame_size / rate))
+        del self.buffer[:usable]
+        return blocks
+
+    def encode(self, pieces):
+        """Return a WAV file holding consecutive blocks of samples."""
+        channels, width, rate = self.params
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as target:
+            target.setnchannels(channels)
+            target.setsampwidth(width)
+            target.setframerate(rate)
+            target.writeframes(b"".join(pieces))
+        return buffer.getvalue()
+
+
+def stream_windows(blocks, name, window_seconds=15, overlap_seconds=2):
+    """Cut audio arriving as byte blocks into overlapping windows.
+
+    ``blocks`` is any iterable of bytes, such as a file that is still being
+    written or a pipe, in MP3 or PCM WAV format. Yields an ``AudioChunk`` of
+    ``window_seconds`` as soon as enough audio has arrived; each window
+    starts at most ``overlap_seconds`` before the previous one ends. The last
+    window holds whatever is left when the stream ends.
+    """
+    reader = None
+    head = b""
+    pieces = deque()
+    start = 0.0
+    seconds = 0.0
+    new_seconds = 0.0  # audio not sent in a window yet
+    stem = os.path.splitext(name)[0]
+
+    def window(index):
+        return AudioChunk(
+            index,
+            start,
+            start + seconds,
+            reader.encode([data for data, _ in pieces]),
+            f"{stem}_live{index:04d}{reader.extension}",
+        )
+
+    index = 0
+    for data in blocks:
+        if reader is None:
+            # The format is known from the first bytes
+            head += data
+            if len(head) < 4:
+                continue
+            reader = WavStreamReader() if head[:4] == b"RIFF" else Mp3StreamReader()
+            data, head = head, b""
+        for piece in reader.feed(data):
+            pieces.append(piece)
+            seconds += piece[1]
+            new_seconds += piece[1]
+            if seconds < window_seconds:
+                continue
+            yield window(index)
+            index += 1
+            new_seconds = 0.0
+            # Keep the end of the window as the start of the next one
+            while pieces and seconds > overlap_seconds:
+                start += pieces[0][1]
+                seconds -= pieces.popleft()[1]
+
+    if reader is None:
+        return
+    for piece in reader.feed(b"", final=True):
+        pieces.append(piece)
+        seconds += piece[1]
+        new_seconds += piece[1]
+    if new_seconds > 0:
+        yield window(index)
+
+
+def mp3_duration(path):
+    """Return the duration of an MP3 file in seconds, from its frame headers."""
+    with open(path, "rb") as f:
+        return sum(frame.duration for frame in read_mp3_frames(f.read()))
+
+
+def _words(text):
+    return re.findall(r"\w+", text.lower())
+
+
+def _drop_repeated_prefix(previous_text, text, max_words=30):
+    """Remove the start of ``text`` that repeats the end of ``previous_text``."""
+    previous = _words(previous_text)[-max_words:]
+    current = _words(text)
+    best = 0
+    for size in range(min(len(previous), len(current), max_words), 0, -1):
+        if previous[-size:] == current[:size]:
+            best = size
+            break
+    if not best:
+        return text
+
+    # Skip ``best`` words in the original text, keeping its punctuation after
+    matches = list(re.finditer(r"\w+", text))
+    return text[matches[best - 1].end() :].lstrip(" ,.;:!?-")
+
+
+def stitch_transcripts(chunks, results):
+    """Merge per-chunk verbose_json transcriptions into one transcript.
+
+    Segment timestamps are shifted by each chunk's start. In the overlap
+    between two chunks, a segment is kept by the chunk that contains its
+    midpoint furthest from a cut, and any words still repeated at the seam
+    are removed. Returns (text, segments).
+    """
+    segments = []
+    for position, (chunk, result) in enumerate(zip(chunks, results)):
+        # The seam between two overlapping chunks is the middle of the overlap
+        low = 0.0
+        if position > 0:
+            low = (chunk.start + chunks[position - 1].end) / 2
+        high = float("inf")
+        if position + 1 < len(chunks):
+            high = (chunks[position + 1].start + chunk.end) / 2
+
+        chunk_segments = result.get("segments") or [
+            {"start": 0.0, "end": chunk.end - chunk.start, "text": result["text"]}
+        ]
+        for segment in chunk_segments:
+            start = chunk.start + segment["start"]
+            end = chunk.start + segment["end"]
+            if not low <= (start + end) / 2 < high:
+                continue
+            text = segment["text"].strip()
+            if segments and segments[-1]["chunk"] != chunk.index:
+                text = _drop_repeated_prefix(segments[-1]["text"], text)
+            if text:
+                segments.append(
+                    {"start": start, "end": end, "text": text, "chunk": chunk.index}
+                )
+
+    return " ".join(segment["text"] for segment in segments), segments
+
+
+class StreamStitcher:
+    """Stitch the transcriptions of rolling windows while the audio still grows.
+
+    Windows arrive in order, each overlapping the previous one by about
+    ``overlap_seconds``. ``add`` returns the segments that can no longer change:
+    a segment ending in the last ``overlap_seconds`` of a window may be
+    transcribed again, and better, by the next window, so it waits for it.
+    The segments are the ones ``stitch_transcripts`` returns for all windows.
+    """
+
+    def __init__(self, overlap_seconds):
+        self.overlap_seconds = overlap_seconds
+        self.segments = []
+        self._previous = None  # (chunk, segments not returned yet, seam before)
+
+    def _take(self, chunk, segments, low, high):
+        taken = []
+        for segment in segments:
+            start = chunk.start + segment["start"]
+            end = chunk.start + segment["end"]
+            if not low <= (start + end) / 2 < high:
+                continue
+            text = segment["text"].strip()
+            previous = taken or self.segments
+            if previous and previous[-1]["chunk"] != chunk.index:
+                text = _drop_repeated_prefix(previous[-1]["text"], text)
+            if text:
+                taken.append(
+                    {"start": start, "end": end, "text": text, "chunk": chunk.index}
+                )
+        self.segments.extend(taken)
+        return taken
+
+    def add(self, chunk, result):
+        """Add the verbose_json result of the next window; returns new segments."""
+        segments = result.get("segments") or [
+            {"start": 0.0, "end": chunk.end - chunk.start, "text": result["text"]}
+        ]
+        settled = []
+        low = 0.0
+        if self._previous is not None:
+            previous, pending, previous_low = self._previous
+            # The seam between two overlapping windows is the middle of the overlap
+            low = (chunk.start + previous.end) / 2
+            settled = self._take(previous, pending, previous_low, low)
+
+        # Segments well before the end of this window cannot be claimed by the
+        # next one, whose seam is at least half an overlap before this end
+        limit = chunk.end - chunk.start - self.overlap_seconds
+        ready = [s for s in segments if (s["start"] + s["end"]) / 2 < limit]
+        pending = [s for s in segments if (s["start"] + s["end"]) / 2 >= limit]
+        settled += self._take(chunk, ready, low, float("inf"))
+        self._previous = (chunk, pending, low)
+        return settled
+
+    def finish(self):
+        """Return the segments still held back at the end of the stream."""
+        if self._previous is None:
+            return []
+        chunk, pending, low = self._previous
+        self._previous = None
+        return self._take(chunk, pending, low, float("inf"))
@@ -0,0 +1,181 @@
+"""Shrink recordings before they are uploaded for transcription.
+
+Whisper works on 16 kHz mono audio, so extra channels, a higher sample rate
+and silence at the start and end of a recording only make the upload bigger
+and slower. ``preprocess_audio`` downmixes to mono, resamples to 16 kHz
+(never up), trims the leading and trailing silence and re-encodes:
+
+- with pydub (``pip install pydub``, which needs ffmpeg), any format ffmpeg
+  reads is re-encoded to a low-bitrate mono MP3, which ``audio_chunker`` can
+  still split on frame boundaries
+- without pydub, WAV files are converted with the standard library
+  (``audioop``) to 16 kHz mono 16-bit WAV, which is still uncompressed PCM;
+  compressed formats such as MP3 cannot be preprocessed (``can_preprocess``)
+
+Timestamps of the trimmed audio start ``offset`` seconds after those of the
+original.
+"""
+
+import os
+import wave
+import warnings
+from collections import namedtuple
+
+try:
+    from pydub import AudioSegment
+    from pydub.silence import detect_leading_silence
+except ImportError:  # pydub is optional, WAV files are converted without it
+    AudioSegment = None
+
+try:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        import audioop
+except ImportError:  # removed from the standard library in Python 3.13
+    audioop = None
+
+TARGET_SAMPLE_RATE = 16000
+DEFAULT_BITRATE = "24k"
+# Blocks quieter than this (dBFS) count as silence
+SILENCE_THRESHOLD_DB = -40.0
+# Silence kept before the first and after the last sound, in seconds
+KEEP_SILENCE_SECONDS = 0.25
+
+Preprocessed = namedtuple(
+    "Preprocessed",
+    [
+        "path",
+        "original_bytes",
+        "bytes",
+        "original_seconds",
+        "seconds",
+        "offset",
+        "method",
+    ],
+)
+
+
+def _trim_with_pydub(path, output_path, bitrate, threshold_db):
+    audio = AudioSegment.from_file(path)
+    original_seconds = len(audio) / 1000
+    audio = audio.set_channels(1)
+    audio = audio.set_frame_rate(min(audio.frame_rate, TARGET_SAMPLE_RATE))
+
+    keep = int(KEEP_SILENCE_SECONDS * 1000)
+    lead = max(detect_leading_silence(audio, threshold_db) - keep, 0)
+    tail = max(detect_leading_silence(audio.reverse(), threshold_db) - keep, 0)
+    if lead + tail >= len(audio):
+        lead = tail = 0  # nothing but silence; leave it to Whisper
+    audio = audio[lead : len(audio) - tail]
+
+    audio.export(output_path, format="mp3", bitrate=bitrate)
+    return original_seconds, len(audio) / 1000, lead / 1000
+
+
+def _silence_frames(raw, frame_rate, threshold_db, reverse=False):
+    """Return the number of silent frames at the start (or end) of 16-bit mono PCM."""
+    block = max(frame_rate // 100, 1) * 2  # 10 ms
+    threshold = 32768 * 10 ** (threshold_db / 20)
+    starts = range(0, len(raw), block)
+    silent = 0
+    for start in reversed(starts) if reverse else starts:
+        if audioop.rms(raw[start : start + block], 2) > threshold:
+            break
+        silent += len(raw[start : start + block]) // 2
+    return silent
+
+
+def _trim_wav(path, output_path, threshold_db):
+    with wave.open(path, "rb") as source:
+        params = source.getparams()
+        raw = source.readframes(params.nframes)
+    original_seconds = params.nframes / params.framerate
+
+    width = params.sampwidth
+    if width == 1:
+        raw = audioop.bias(raw, 1, -128)  # 8-bit WAV samples are unsigned
+    if params.nchannels == 2:
+        raw = audioop.tomono(raw, width, 0.5, 0.5)
+    elif params.nchannels != 1:
+        raise ValueError(f"{params.nchannels}-channel WAV files need pydub")
+    if width != 2:
+        raw = audioop.lin2lin(raw, width, 2)
+    rate = min(params.framerate, TARGET_SAMPLE_RATE)
+    if rate != params.framerate:
+        raw, _ = audioop.ratecv(raw, 2, 1, params.framerate, rate, None)
+
+    frames = len(raw) // 2
+    keep = int(KEEP_SILENCE_SECONDS * rate)
+    lead = max(_silence_frames(raw, rate, threshold_db) - keep, 0)
+    tail = max(_silence_frames(raw, rate, threshold_db, reverse=True) - keep, 0)
+    if lead + tail >= frames:
+        lead = tail = 0
+    raw = raw[lead * 2 : (frames - tail) * 2]
+
+    with wave.open(output_path, "wb") as target:
+        target.setnchannels(1)
+        target.setsampwidth(2)
+        target.setframerate(rate)
+        target.writeframes(raw)
+    return original_seconds, len(raw) / 2 / rate, lead / rate
+
+
+def can_preprocess(path):
+    """Whether ``preprocess_audio`` can convert this file with what is installed"""
+    if AudioSegment is not None:
+        return True
+    return os.path.splitext(path)[1].lower() == ".wav" and audioop is not None
+
+
+def preprocess_audio(
+    path,
+    output_dir,
+    bitrate=DEFAULT_BITRATE,
+    threshold_db=SILENCE_THRESHOLD_DB,
+):
+    """Write a smaller copy of a recording for upload to ``output_dir``.
+
+    Returns a ``Preprocessed`` with the new path, the byte counts and
+    durations before and after, and the seconds trimmed at the start. The
+    copy keeps the file name stem, so chunk names stay recognizable. Raises
+    ValueError if the file cannot be preprocessed here or the copy would not
+    be smaller; the original should then be uploaded as it is.
+    """
+    stem, ext = os.path.splitext(os.path.basename(path))
+    if AudioSegment is not None:
+        output_path = os.path.join(output_dir, f"{stem}.mp3")
+        result = _trim_with_pydub(path, output_path, bitrate, threshold_db)
+        method = f"pydub, mono {bitrate}bps MP3"
+    elif can_preprocess(path):
+        output_path = os.path.join(output_dir, f"{stem}.wav")
+        try:
+            result = _trim_wav(path, output_path, threshold_db)
+        except (wave.Error, EOFError) as e:
+            raise ValueError(f"cannot read {os.path.basename(path)}: {e}") from None
+        method = "standard library, mono 16-bit WAV"
+    else:
+        raise ValueError(
+            f"install pydub and ffmpeg to preprocess {ext or 'these'} files"
+        )
+
+    original_bytes = os.path.getsize(path)
+    size = os.path.getsize(output_path)
+    if size >= original_bytes:
+        raise ValueError("the preprocessed audio is not smaller than the original")
+    original_seconds, seconds, offset = result
+    return Preprocessed(
+        output_path, original_bytes, size, original_seconds, seconds, offset, method
+    )
+
+
+def describe(prepared, upload_mbps):
+    """One line with the bytes and the estimated upload time saved."""
+    saved = prepared.original_bytes - prepared.bytes
+    return (
+        f"Preprocessed audio ({prepared.method}): "
+        f"{prepared.original_bytes / 1e6:.2f} MB -> {prepared.bytes / 1e6:.2f} MB "
+        f"({saved / prepared.original_bytes:.0%} smaller, "
+        f"{prepared.original_seconds - prepared.seconds:.1f}s of silence trimmed), "
+        f"about {saved * 8 / (upload_mbps * 1e6):.1f}s less upload at "
+        f"{upload_mbps:g} Mbit/s"
+    )
@@ -0,0 +1,197 @@
+"""Batch processing of many audio files with bounded parallelism.
+
+Files are processed by a pool of worker threads that share one
+``AudioAnalyzer`` (and with it the pooled HTTP client, the response cache and
+the rate limiter). Every finished file is appended to a JSON Lines manifest in
+the output directory, so an interrupted run can be restarted and will skip
+the files that were already processed. At the end a consolidated
+``index.json`` lists the results of every file in the batch.
+"""
+
+import os
+import glob
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+AUDIO_EXTENSIONS = {
+    ".mp3", ".mp4", ".mpeg", ".mpga", ".m4a", ".wav", ".webm", ".ogg", ".flac"
+}  # fmt: skip
+
+MANIFEST_NAME = "manifest.jsonl"
+INDEX_NAME = "index.json"
+
+
+def expand_inputs(inputs):
+    """Expand files, directories and glob patterns into a sorted list of audio files."""
+    files = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, names in os.walk(item):
+                for name in names:
+                    if os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS:
+                        files.add(os.path.abspath(os.path.join(root, name)))
+        elif os.path.isfile(item):
+            files.add(os.path.abspath(item))
+        else:
+            for path in glob.glob(item, recursive=True):
+                if os.path.isfile(path):
+                    files.add(os.path.abspath(path))
+    return sorted(files)
+
+
+def file_fingerprint(path):
+    """Identify a file version cheaply by its path, size and modification time."""
+    stat = os.stat(path)
+    return f"{path}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def file_output_dir(output_root, path):
+    """Return a per-file output directory that is unique for each source path."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    suffix = hashlib.sha1(path.encode("utf-8")).hexdigest()[:8]
+    return os.path.join(output_root, f"{stem}_{suffix}")
+
+
+class BatchManifest:
+    """Append-only JSON Lines record of processed files, used to resume a batch."""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}  # fingerprint -> latest entry
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # a line cut short by an interrupted run
+                    self.entries[entry["fingerprint"]] = entry
+
+    def is_done(self, fingerprint):
+        entry = self.entries.get(fingerprint)
+        return entry is not None and entry["status"] == "done"
+
+    def record(self, entry):
+        with self._lock:
+            self.entries[entry["fingerprint"]] = entry
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def run_batch(analyzer, files, output_dir="batch_results", concurrency=4):
+    """Process audio files concurrently, resuming from the manifest in ``output_dir``.
+
+    Returns the list of manifest entries for every file in the batch.
+    """
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = BatchManifest(os.path.join(output_dir, MANIFEST_NAME))
+
+    todo = []
+    for path in files:
+        if manifest.is_done(file_fingerprint(path)):
+            print(f"⏭️  Skipping already processed file: {path}")
+        else:
+            todo.append(path)
+
+    print(
+        f"\n📦 Batch: {len(files)} files, {len(files) - len(todo)} already done, "
+        f"{len(todo)} to process with concurrency {concurrency}"
+    )
+
+    def process(path):
+        entry = {
+            "file": path,
+            "fingerprint": file_fingerprint(path),
+            "finished": None,
+        }
+        started = time.perf_counter()
+        try:
+            results = analyzer.process_audio(
+                path, output_dir=file_output_dir(output_dir, path)
+            )
+            entry.update(
+                status="done",
+                files=results["files"],
+                duration=results["duration"],
+                analytics=results["analytics"],
+                timings=results["timings"],
+            )
+        except Exception as e:
+            entry.update(status="failed", error=str(e))
+        entry["seconds"] = round(time.perf_counter() - started, 3)
+        entry["finished"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        manifest.record(entry)
+        return entry
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(process, path) for path in todo]
+        for future in as_completed(futures):
+            entry = future.result()
+            mark = "✅" if entry["status"] == "done" else "❌"
+            print(f"{mark} {entry['file']} ({entry['seconds']:.1f}s)")
+    elapsed = time.perf_counter() - started
+
+    entries = [
+        manifest.entries[file_fingerprint(path)]
+        for path in files
+        if file_fingerprint(path) in manifest.entries
+    ]
+    write_index(output_dir, entries)
+
+    processed = sum(1 for path in todo if manifest.is_done(file_fingerprint(path)))
+    failed = len(todo) - processed
+    print("\n" + "=" * 60)
+    print("BATCH SUMMARY")
+    print("=" * 60)
+    print(
+        f"   • Processed: {processed}, failed: {failed}, skipped: {len(files) - len(todo)}"
+    )
+    print(f"   • Wall time: {elapsed:.1f}s")
+    if elapsed > 0 and processed:
+        print(f"   • Throughput: {processed / elapsed * 60:.1f} files/minute")
+    scheduler = analyzer.client
+    print(
+        f"   • API retries: {scheduler.counters['retries']} "
+        f"({scheduler.counters['throttled']} rate limited)"
+    )
+    if analyzer.rate_limiter is not None:
+        print(
+            "   • Time spent waiting on rate limits: "
+            f"{scheduler.rate_limiter.waited_seconds:.1f}s"
+        )
+    uploads = analyzer.preprocess_stats
+    if uploads["files"]:
+        saved = uploads["original_bytes"] - uploads["bytes"]
+        print(
+            f"   • Preprocessed uploads: {uploads['original_bytes'] / 1e6:.1f} MB -> "
+            f"{uploads['bytes'] / 1e6:.1f} MB for {uploads['files']} files, about "
+            f"{saved * 8 / (analyzer.upload_mbps * 1e6):.0f}s less upload at "
+            f"{analyzer.upload_mbps:g} Mbit/s"
+        )
+    print(f"   • Results index: {os.path.join(output_dir, INDEX_NAME)}")
+
+    return entries
+
+
+def write_index(output_dir, entries):
+    """Write the consolidated results index of a batch."""
+    index = {
+        "generated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "total": len(entries),
+        "done": sum(1 for entry in entries if entry["status"] == "done"),
+        "failed": sum(1 for entry in entries if entry["status"] == "failed"),
+        "files": entries,
+    }
+    path = os.path.join(output_dir, INDEX_NAME)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+    return path
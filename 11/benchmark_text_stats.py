@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of the transcript statistics in text_stats.py.
+
+Compares the word counter that analyze_transcript used before (kept below as
+legacy_count_words) with text_stats.count_words and the full
+text_stats.compute_text_stats, on synthetic transcripts of growing size or on
+a transcript file, and checks that both counters agree. It exits with an
+error if compute_text_stats takes longer than --max-ms-per-mb on a text of
+100 KB or more.
+
+Usage:
+    python benchmark_text_stats.py
+    python benchmark_text_stats.py --file transcription.md --repeat 5
+    python benchmark_text_stats.py --max-ms-per-mb 100
+"""
+
+import re
+import sys
+import time
+import random
+import argparse
+
+from text_stats import compute_text_stats, count_words
+
+SAMPLE_WORDS = (
+    "the customer said that our delivery was late again and the driver did not "
+    "call before arriving so we need to review the schedule for next week's "
+    "routes it's a 3-step process: check, confirm, and dispatch"
+).split()
+SAMPLE_PUNCTUATION = ["", "", "", "", ",", ".", "?", "!", " -", '"']
+
+
+def legacy_count_words(text):
+    """The original nested count_words from analyze_transcript"""
+    # Remove extra whitespace and normalize
+    text = re.sub(r"\s+", " ", text.strip())
+
+    # Split by whitespace and filter out empty strings
+    words = [word for word in text.split() if word.strip()]
+
+    # Additional filtering to remove common non-words
+    filtered_words = []
+    for word in words:
+        # Remove punctuation from word boundaries
+        clean_word = re.sub(r"^[^\w]+|[^\w]+$", "", word)
+        # Only count if it contains at least one letter or number
+        if re.search(r"[a-zA-Z0-9]", clean_word):
+            filtered_words.append(clean_word)
+
+    return len(filtered_words), filtered_words
+
+
+def synthetic_transcript(size_bytes, seed=0):
+    """Build a transcript-like text of about ``size_bytes`` characters"""
+    rng = random.Random(seed)
+    parts = []
+    size = 0
+    while size < size_bytes:
+        word = rng.choice(SAMPLE_WORDS) + rng.choice(SAMPLE_PUNCTUATION)
+        if rng.random() < 0.01:
+            word += "\n\n"
+        parts.append(word)
+        size += len(word) + 1
+    return " ".join(parts)
+
+
+def best_time(func, text, repeat):
+    """Return the best wall time of ``repeat`` runs, in milliseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def benchmark(label, text, repeat):
+    legacy_words, _ = legacy_count_words(text)
+    stats = compute_text_stats(text, duration_seconds=600)
+    if legacy_words != stats["word_count"] or legacy_words != count_words(text):
+        raise AssertionError(
+            f"{label}: word counts differ "
+            f"({legacy_words} legacy vs {stats['word_count']} new)"
+        )
+
+    legacy_ms = best_time(legacy_count_words, text, repeat)
+    count_ms = best_time(count_words, text, repeat)
+    stats_ms = best_time(compute_text_stats, text, repeat)
+    ms_per_mb = stats_ms / (len(text.encode("utf-8")) / 1e6)
+    print(
+        f"{label:>12} {legacy_words:>10,} {legacy_ms:>10.1f} {count_ms:>10.1f} "
+        f"{stats_ms:>10.1f} {ms_per_mb:>9.1f} {legacy_ms / count_ms:>8.1f}x"
+    )
+    return ms_per_mb
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the transcript statistics against the original word counter"
+    )
+    parser.add_argument("--file", help="Benchmark a transcript file instead")
+    parser.add_argument(
+        "--sizes",
+        default="10000,100000,1000000,4000000",
+        help="Comma-separated synthetic transcript sizes in characters",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Runs per measurement (default: 3)"
+    )
+    parser.add_argument(
+        "--max-ms-per-mb",
+        type=float,
+        default=300,
+        help="Fail if compute_text_stats is slower than this on texts of 100 KB or more (default: 300)",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    print(
+        f"{'size':>12} {'words':>10} {'legacy ms':>10} {'count ms':>10} "
+        f"{'stats ms':>10} {'ms per MB':>9} {'speedup':>9}"
+    )
+    if args.file:
+        with open(args.file, "r", encoding="utf-8") as f:
+            texts = [f.read()]
+    else:
+        texts = [synthetic_transcript(int(size)) for size in args.sizes.split(",")]
+
+    slowest = 0.0
+    for text in texts:
+        ms_per_mb = benchmark(f"{len(text):,}", text, args.repeat)
+        if len(text) >= 100000:
+            slowest = max(slowest, ms_per_mb)
+    print(
+        "\nlegacy = original count_words, count = text_stats.count_words, "
+        "stats = text_stats.compute_text_stats (all statistics)"
+    )
+    if slowest > args.max_ms_per_mb:
+        print(
+            f"FAIL: compute_text_stats took {slowest:.1f} ms per MB, "
+            f"more than --max-ms-per-mb {args.max_ms_per_mb:g}"
+        )
+        sys.exit(1)
+    if slowest:
+        print(
+            f"OK: compute_text_stats took at most {slowest:.1f} ms per MB "
+            f"(limit {args.max_ms_per_mb:g})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Content-addressed checkpoints of AudioAnalyzer pipeline stages.
+
+Every stage result is stored under a key derived from what produced it: the
+stage name, its parameters (settings and a fingerprint of the code, which
+includes the prompt templates) and the content of its inputs. A rerun after a
+failure finds the stages that already completed and skips them, and a change
+to one stage (say, the summary prompt) only changes the keys of that stage
+and of the stages that consume its output.
+
+Checkpoints are JSON files under ``~/.cache/edu-ai-challenge/checkpoints``,
+configured through environment variables:
+
+- ``AUDIO_CHECKPOINTS_DISABLED=1`` turns checkpointing off
+- ``AUDIO_CHECKPOINT_DIR`` sets the directory
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+import threading
+
+DEFAULT_CHECKPOINT_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "edu-ai-challenge", "checkpoints"
+)
+
+
+def value_digest(value):
+    """Return the content address of a JSON-serializable value."""
+    canonical = json.dumps(value, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def code_fingerprint(*funcs):
+    """Fingerprint the code of functions, including their string constants.
+
+    Any edit to the body of one of the functions, such as a prompt template,
+    changes the fingerprint; nested functions and lambdas are included.
+    """
+    digest = hashlib.sha256()
+
+    def add_code(code):
+        digest.update(code.co_code)
+        digest.update(repr(code.co_names).encode("utf-8"))
+        for const in code.co_consts:
+            if hasattr(const, "co_code"):
+                add_code(const)
+            else:
+                digest.update(repr(const).encode("utf-8"))
+
+    for func in funcs:
+        add_code(func.__code__)
+    return digest.hexdigest()
+
+
+def checkpoint_key(stage, params, inputs=()):
+    """Return the key of a stage run with ``params`` on ``inputs``."""
+    return value_digest(
+        {
+            "stage": stage,
+            "params": params,
+            "inputs": [value_digest(value) for value in inputs],
+        }
+    )
+
+
+class CheckpointStore:
+    """Directory of JSON stage results, keyed by ``checkpoint_key``."""
+
+    def __init__(self, root=DEFAULT_CHECKPOINT_DIR, enabled=True):
+        self.root = root
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "stores": 0}
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], f"{key}.json")
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def get(self, key):
+        """Return the stored result for ``key``, or None."""
+        if not self.enabled:
+            return None
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                value = json.load(f)["value"]
+        except (OSError, ValueError, KeyError):
+            self._count("misses")
+            return None
+        self._count("hits")
+        return value
+
+    def set(self, key, value):
+        """Store a result; the file is replaced atomically."""
+        if not self.enabled:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"value": value}, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        self._count("stores")
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters)
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_default_store():
+    """Return the process-wide checkpoint store configured from the environment."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = CheckpointStore(
+                root=os.getenv("AUDIO_CHECKPOINT_DIR", DEFAULT_CHECKPOINT_DIR),
+                enabled=os.getenv("AUDIO_CHECKPOINTS_DISABLED") != "1",
+            )
+        return _default_store
@@ -0,0 +1,284 @@
+"""Streaming analysis of recordings that are still being made.
+
+``LiveAnalyzer`` reads a growing audio file (or stdin) while it is written
+and shows results within seconds of the speech instead of after the call
+ends. The audio is cut into overlapping windows of ``window_seconds`` as it
+arrives (``audio_chunker.stream_windows``), and every window goes through
+the same steps as a complete file, one window at a time:
+
+- it is transcribed as soon as it is cut, several windows in parallel
+- its transcription is stitched to the previous windows
+  (``audio_chunker.StreamStitcher``) and the new text is improved
+- word count and speaking speed are updated with the improved text
+- every ``summary_seconds`` of audio, the rolling summary is updated with
+  the text since the previous update (``AudioAnalyzer.update_summary``), so
+  each update costs the same however long the call gets
+
+When the stream ends (stdin is closed, or the file has not grown for
+``idle_timeout`` seconds, or Ctrl+C is pressed) the transcript, summary and
+analytics are saved like those of a complete file.
+"""
+
+import os
+import sys
+import time
+import queue
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from audio_chunker import StreamStitcher, stream_windows
+from text_stats import count_words, words_per_minute
+
+
+def read_blocks(source, follow=True, idle_timeout=10.0, stop=None, block_size=65536):
+    """Yield the bytes of ``source`` as they are written.
+
+    ``source`` is a file path, or ``-`` for stdin, which is read until it is
+    closed. A file is followed until it has not grown for ``idle_timeout``
+    seconds (read once to the end if ``follow`` is False), or until the
+    ``stop`` event is set.
+    """
+    if source == "-":
+        stream = sys.stdin.buffer
+        while not (stop and stop.is_set()):
+            # read1 returns what is available instead of waiting for a full block
+            data = stream.read1(block_size)
+            if not data:
+                return
+            yield data
+        return
+
+    with open(source, "rb") as f:
+        last_data = time.monotonic()
+        while not (stop and stop.is_set()):
+            data = f.read(block_size)
+            if data:
+                last_data = time.monotonic()
+                yield data
+            elif not follow or time.monotonic() - last_data >= idle_timeout:
+                return
+            else:
+                time.sleep(0.2)
+
+
+class LiveAnalyzer:
+    """Transcribes, improves and summarizes a recording while it grows."""
+
+    def __init__(
+        self,
+        analyzer,
+        window_seconds=15,
+        overlap_seconds=2,
+        summary_seconds=60,
+        workers=4,
+    ):
+        self.analyzer = analyzer
+        self.window_seconds = window_seconds
+        self.overlap_seconds = overlap_seconds
+        self.summary_seconds = summary_seconds
+        self.workers = workers
+        self._stop = threading.Event()
+
+    def stop(self):
+        """Stop reading; the audio read so far is still processed."""
+        self._stop.set()
+
+    def _read_windows(self, source, follow, idle_timeout, windows):
+        """Put the windows of the stream on a queue, then None (reader thread)."""
+        name = "stdin.mp3" if source == "-" else os.path.basename(source)
+        try:
+            blocks = read_blocks(source, follow, idle_timeout, self._stop)
+            for chunk in stream_windows(
+                blocks, name, self.window_seconds, self.overlap_seconds
+            ):
+                windows.put((chunk, time.perf_counter()))
+        except Exception as e:
+            windows.put(e)
+        windows.put(None)
+
+    def run(self, source, output_dir=".", follow=True, idle_timeout=10.0):
+        """Process ``source`` (a path or ``-``) until its stream ends"""
+        os.makedirs(output_dir, exist_ok=True)
+        analyzer = self.analyzer
+        print("=" * 60)
+        print("LIVE AUDIO TRANSCRIPTION AND ANALYSIS")
+        print("=" * 60)
+        print(
+            f"Reading {'stdin' if source == '-' else source} in "
+            f"{self.window_seconds}s windows (Ctrl+C to stop)\n"
+        )
+
+        windows = queue.Queue()
+        reader = threading.Thread(
+            target=self._read_windows,
+            args=(source, follow, idle_timeout, windows),
+            name="audio-stream",
+            daemon=True,
+        )
+        reader.start()
+
+        stitcher = StreamStitcher(self.overlap_seconds)
+        transcriptions = deque()  # (chunk, cut time, future), in stream order
+        improvements = deque()  # (segments, cut time, future), in stream order
+        summary_future = None
+        unsummarized = []
+        summarized_until = 0.0
+        self.segments = []
+        self.improved = []
+        self.summary = ""
+        self.word_count = 0
+        self.latencies = []
+        audio_seconds = 0.0
+        reading = True
+        stitched = False
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+
+            def submit(stage, func, *args):
+                def run():
+                    with analyzer.metrics.stage(stage):
+                        return func(*args)
+
+                return pool.submit(contextvars.copy_context().run, run)
+
+            def improve(segments, cut_time):
+                if segments:
+                    text = " ".join(segment["text"] for segment in segments)
+                    future = submit("stream_improve", analyzer._improve_chunk, text)
+                    improvements.append((segments, cut_time, future))
+
+            while True:
+                try:
+                    item = windows.get(timeout=0.05) if reading else None
+                    if item is None:
+                        reading = False
+                    elif isinstance(item, Exception):
+                        raise item
+                    else:
+                        chunk, cut_time = item
+                        future = submit(
+                            "stream_transcribe",
+                            analyzer._transcribe_bytes,
+                            chunk.data,
+                            chunk.filename,
+                        )
+                        transcriptions.append((chunk, cut_time, future))
+                except queue.Empty:
+                    pass
+                except KeyboardInterrupt:
+                    print("\nStopping: finishing the audio read so far...")
+                    self.stop()
+                    if source == "-":
+                        reading = False  # a blocked read of stdin cannot be stopped
+
+                # Windows are stitched and improved in stream order
+                while transcriptions and transcriptions[0][2].done():
+                    chunk, cut_time, future = transcriptions.popleft()
+                    improve(stitcher.add(chunk, future.result()), cut_time)
+                    audio_seconds = chunk.end
+                if not reading and not transcriptions and not stitched:
+                    improve(stitcher.finish(), time.perf_counter())
+                    stitched = True
+
+                while improvements and improvements[0][2].done():
+                    segments, cut_time, future = improvements.popleft()
+                    improved = future.result()
+                    self._show(segments, improved, cut_time)
+                    unsummarized.append(improved)
+
+                if summary_future is not None and summary_future.done():
+                    self.summary = summary_future.result()
+                    summary_future = None
+                    print(
+                        f"📝 Rolling summary updated ({len(self.summary)} characters)"
+                    )
+
+                finished = stitched and not improvements
+                spoken = self.segments[-1]["end"] if self.segments else 0.0
+                if (
+                    summary_future is None
+                    and unsummarized
+                    and (finished or spoken - summarized_until >= self.summary_seconds)
+                ):
+                    summary_future = submit(
+                        "stream_summarize",
+                        analyzer.update_summary,
+                        self.summary,
+                        "\n\n".join(unsummarized),
+                    )
+                    unsummarized = []
+                    summarized_until = spoken
+
+                if finished and summary_future is None and not unsummarized:
+                    break
+
+        total_time = time.perf_counter() - started
+        return self._save(source, audio_seconds, output_dir, total_time)
+
+    def _show(self, segments, improved, cut_time):
+        """Add newly improved text to the running statistics and print it"""
+        self.segments.extend(segments)
+        self.improved.append(improved)
+        self.word_count += count_words(improved)
+        self.latencies.append(time.perf_counter() - cut_time)
+
+        spoken = segments[-1]["end"]
+        wpm = words_per_minute(self.word_count, spoken)
+        minutes, seconds = divmod(int(spoken), 60)
+        preview = " ".join(improved.split())
+        preview = preview[:100] + "..." if len(preview) > 100 else preview
+        print(
+            f"[{minutes:02d}:{seconds:02d}] {self.word_count} words, {wpm} WPM "
+            f"(+{self.latencies[-1]:.1f}s) | {preview}"
+        )
+
+    def _save(self, source, duration, output_dir, total_time):
+        """Analyze the whole transcript and save the usual output files"""
+        analyzer = self.analyzer
+        name = "stdin" if source == "-" else source
+        raw_transcript = " ".join(segment["text"] for segment in self.segments)
+        improved_transcript = "\n\n".join(self.improved)
+        if not improved_transcript:
+            raise ValueError("No speech was transcribed from the stream")
+
+        analytics = analyzer.analyze_transcript(
+            improved_transcript, duration, self.segments
+        )
+        files = {
+            "transcription": analyzer.save_transcription(
+                improved_transcript, name, output_dir
+            ),
+            "summary": analyzer.save_summary(self.summary, name, output_dir),
+            "analytics": analyzer.save_analytics(analytics, name, output_dir),
+        }
+
+        latencies = sorted(self.latencies)
+        latency = {
+            "median_seconds": latencies[len(latencies) // 2],
+            "max_seconds": latencies[-1],
+        }
+        print("\n" + "=" * 60)
+        print("RESULTS")
+        print("=" * 60)
+        print(f"\n📊 ANALYTICS:")
+        print(f"   • Word Count: {analytics['word_count']}")
+        print(f"   • Speaking Speed: {analytics['speaking_speed_wpm']} WPM")
+        print(f"   • Duration: {duration:.1f} seconds")
+        print(
+            f"\n⏱️  Text shown {latency['median_seconds']:.1f}s (median) and "
+            f"{latency['max_seconds']:.1f}s (max) after its window was read; "
+            f"total wall time {total_time:.1f}s"
+        )
+
+        return {
+            "raw_transcript": raw_transcript,
+            "improved_transcript": improved_transcript,
+            "summary": self.summary,
+            "analytics": analytics,
+            "duration": duration,
+            "latency": latency,
+            "files": files,
+        }
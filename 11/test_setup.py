@@ -42,6 +42,19 @@ def test_environment():
         )
         return False
 
+    try:
+        sys.path.insert(
+            0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+        )
+        import common.http_client
+
+        print("   ✅ shared common package found")
+    except ImportError:
+        print(
+            "   ❌ common package not found. Run this tool from the repository checkout"
+        )
+        return False
+
     # Test 3: Check .env file
     print("\n3. Checking .env file...")
     load_dotenv()
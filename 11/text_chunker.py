@@ -0,0 +1,75 @@
+"""Split long transcripts into chunks that fit a model's token budget.
+
+Chunks are cut on paragraph boundaries where possible, then on sentence
+boundaries, and only as a last resort between words, so every chunk can be
+edited or summarized on its own. Token counts are estimated at about four
+characters per token, the same estimate the rate limiter uses.
+"""
+
+import re
+
+CHARS_PER_TOKEN = 4
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+
+
+def estimate_text_tokens(text):
+    """Roughly estimate the number of tokens in ``text``."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _split_oversized(text, max_tokens):
+    """Split one paragraph that is over the budget into sentences, then words."""
+    pieces = []
+    for sentence in _SENTENCE_END.split(text):
+        if estimate_text_tokens(sentence) <= max_tokens:
+            pieces.append(sentence)
+            continue
+        words = sentence.split()
+        current = []
+        for word in words:
+            if (
+                current
+                and estimate_text_tokens(" ".join(current + [word])) > max_tokens
+            ):
+                pieces.append(" ".join(current))
+                current = []
+            current.append(word)
+        if current:
+            pieces.append(" ".join(current))
+    return pieces
+
+
+def split_text(text, max_tokens=2000):
+    """Split ``text`` into chunks of at most about ``max_tokens`` tokens each.
+
+    Paragraphs (or sentences, for a transcript without paragraph breaks) are
+    packed greedily into chunks; the paragraph breaks inside a chunk are kept.
+    """
+    text = text.strip()
+    if estimate_text_tokens(text) <= max_tokens:
+        return [text] if text else []
+
+    paragraphs = [p.strip() for p in _PARAGRAPH_BREAK.split(text) if p.strip()]
+    units = []  # (text, separator placed before it when joined)
+    for paragraph in paragraphs:
+        if estimate_text_tokens(paragraph) <= max_tokens:
+            units.append((paragraph, "\n\n"))
+        else:
+            pieces = _split_oversized(paragraph, max_tokens)
+            units.append((pieces[0], "\n\n"))
+            units.extend((piece, " ") for piece in pieces[1:])
+
+    chunks = []
+    current = ""
+    for unit, separator in units:
+        candidate = f"{current}{separator}{unit}" if current else unit
+        if current and estimate_text_tokens(candidate) > max_tokens:
+            chunks.append(current)
+            current = unit
+        else:
+            current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
@@ -0,0 +1,136 @@
+"""Local extraction of frequently mentioned topics from a transcript.
+
+Candidate topics are keyphrases found RAKE-style: the transcript is cut at
+punctuation and stop words, and the runs of content words that remain give
+phrases of one to three words. Words are lemmatized with a few suffix rules
+so that "customer" and "customers" count as the same mention. Phrases are
+ranked by frequency, favoring multi-word phrases, and grouped into clusters
+when one phrase contains the words of another ("onboarding" and "customer
+onboarding"), so the same topic is not reported twice.
+
+The mention counts are exact occurrence counts of each topic phrase in the
+transcript, and no API call is needed.
+"""
+
+import re
+from collections import Counter
+
+# Common English function words plus conversational filler
+STOPWORDS = frozenset("""
+    a about above after again against all also am an and any are aren't as at
+    be because been before being below between both but by can can't cannot
+    could couldn't did didn't do does doesn't doing don't down during each
+    either else even ever every few for from further get gets getting go goes
+    going gone got gotta had hadn't has hasn't have haven't having he he'd
+    he'll he's her here here's hers herself him himself his how how's however
+    i i'd i'll i'm i've if in into is isn't it it's its itself just kind kinda
+    know let let's like lot lots made make makes many may maybe me might mine
+    more most much must mustn't my myself need needs never no nor not now of
+    off oh ok okay on once one only or other ought our ours ourselves out over
+    own per pretty probably quite rather really right said same say says see
+    seem seems shall shan't she she'd she'll she's should shouldn't since so
+    some something sort still such sure take than that that's the their
+    theirs them themselves then there there's these they they'd they'll
+    they're they've thing things think this those though through thus to too
+    under until up upon us use used using very via want wanna was wasn't way
+    we we'd we'll we're we've well were weren't what what's when when's where
+    where's whether which while who who's whom whose why why's will with
+    within without won't would wouldn't yeah yes yet you you'd you'll you're
+    you've your yours yourself yourselves uh um uhm hmm mhm ah actually
+    basically literally anyway anything everything nothing someone something
+    everyone anyone went come came back ago today yesterday tomorrow time
+    times two three four five six seven eight nine ten first last next
+    """.split())
+
+# Sentence and clause punctuation ends a phrase
+_FRAGMENT_SPLIT = re.compile(r"[^\w\s'’-]+|\s-+\s|\n")
+_WORD = re.compile(r"[a-z0-9]+(?:['’][a-z]+)*(?:-[a-z0-9]+)*")
+
+MAX_PHRASE_WORDS = 3
+
+
+def lemmatize(word):
+    """Reduce a lowercase word to a crude lemma (mostly plural forms)."""
+    if len(word) <= 3 or not word.isalpha():
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith(("sses", "shes", "ches", "xes", "zes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def candidate_phrases(text):
+    """Yield (lemma tuple, surface text) of every candidate phrase in ``text``."""
+    for fragment in _FRAGMENT_SPLIT.split(text.lower()):
+        run = []
+        for word in _WORD.findall(fragment.replace("’", "'")) + [None]:
+            if word is not None and word not in STOPWORDS and not word.isdigit():
+                run.append(word)
+                continue
+            # A stop word (or the end of the fragment) closes the current run
+            for size in range(1, min(len(run), MAX_PHRASE_WORDS) + 1):
+                for start in range(len(run) - size + 1):
+                    words = run[start : start + size]
+                    yield tuple(lemmatize(w) for w in words), " ".join(words)
+            run = []
+
+
+def extract_topics(text, max_topics=5, min_mentions=2, with_related=False):
+    """Return the most frequently mentioned topics of ``text``.
+
+    The result has the format of ``frequently_mentioned_topics``: a list of
+    ``{"topic": str, "mentions": int}``, most relevant first. With
+    ``with_related`` each topic also lists the ``related`` phrases that were
+    clustered into it.
+    """
+    counts = Counter()
+    surfaces = {}
+    for lemmas, surface in candidate_phrases(text):
+        counts[lemmas] += 1
+        surface_counts = surfaces.setdefault(lemmas, Counter())
+        surface_counts[surface] += 1
+
+    candidates = [
+        (lemmas, count)
+        for lemmas, count in counts.items()
+        if count >= min_mentions and (len(lemmas) > 1 or len(lemmas[0]) > 2)
+    ]
+    # Frequent phrases first; a longer phrase needs fewer mentions to rank high
+    candidates.sort(
+        key=lambda item: (item[1] * len(item[0]) ** 0.5, item[1]), reverse=True
+    )
+
+    clusters = []  # [label lemmas, word set, mentions, related lemma tuples]
+    for lemmas, count in candidates:
+        words = set(lemmas)
+        for cluster in clusters:
+            if words <= cluster[1] or cluster[1] <= words:
+                cluster[1] |= words
+                cluster[3].append(lemmas)
+                break
+        else:
+            if len(clusters) < max_topics:
+                clusters.append([lemmas, words, count, []])
+
+    topics = []
+    for lemmas, _, count, related in clusters:
+        topic = {"topic": _label(surfaces[lemmas]), "mentions": count}
+        if with_related:
+            topic["related"] = [_label(surfaces[other]) for other in related[:5]]
+        topics.append(topic)
+    return topics
+
+
+def _label(surface_counts):
+    """Title-case the most common form of a phrase in the transcript.
+
+    Two-letter words that are not stop words are mostly acronyms ("AI").
+    """
+    surface = surface_counts.most_common(1)[0][0]
+    return " ".join(
+        word.upper() if len(word) <= 2 else word.capitalize()
+        for word in surface.split()
+    )
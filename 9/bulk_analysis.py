@@ -0,0 +1,261 @@
+"""Bulk generation of service analysis reports.
+
+Services are read from a CSV file (a ``service``, ``name`` or ``description``
+column, or else the first column) or from a text file with one service per
+line. Every report is written to its own markdown file in the output
+directory, and services that already have a report are skipped, so an
+interrupted run can simply be started again.
+
+Two modes are available:
+
+- ``run_concurrent`` sends the requests right away from a bounded pool of
+  worker threads, through the retrying scheduler and its ``RateLimiter``
+- ``run_batch_job`` submits them as OpenAI Batch API jobs and polls until
+  they finish. Submitted job ids are kept in ``batch_jobs.json``, so a
+  restarted run collects the pending jobs instead of submitting them again
+"""
+
+import os
+import re
+import csv
+import sys
+import json
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.metrics import get_default_metrics
+from common.openai_batch import (
+    MAX_BATCH_REQUESTS,
+    download_results,
+    submit_batch,
+    wait_for_batch,
+)
+from common.response_cache import get_default_cache, make_cache_key
+from common.scheduler import create_scheduler, get_default_scheduler
+
+SERVICE_COLUMNS = ("service", "name", "description")
+BATCH_STATE_NAME = "batch_jobs.json"
+
+
+def read_services(path):
+    """Read service names or descriptions from a CSV or newline-delimited file."""
+    services = []
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            rows = list(csv.reader(f))
+            column = 0
+            if rows:
+                header = [cell.strip().lower() for cell in rows[0]]
+                for name in SERVICE_COLUMNS:
+                    if name in header:
+                        column = header.index(name)
+                        rows = rows[1:]
+                        break
+            values = [row[column] for row in rows if len(row) > column]
+        else:
+            values = [line for line in f if not line.lstrip().startswith("#")]
+
+    seen = set()
+    for value in values:
+        value = value.strip()
+        if value and value not in seen:
+            seen.add(value)
+            services.append(value)
+    return services
+
+
+def report_path(output_dir, service):
+    """Return the report file of a service, unique even for similar names."""
+    slug = re.sub(r"[^a-z0-9]+", "-", service.lower()).strip("-")[:50] or "service"
+    suffix = hashlib.sha1(service.encode("utf-8")).hexdigest()[:8]
+    return os.path.join(output_dir, f"{slug}_{suffix}.md")
+
+
+def _write_report(output_dir, service, report):
+    path = report_path(output_dir, service)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(report)
+    return path
+
+
+def _pending_services(services, output_dir):
+    return [s for s in services if not os.path.exists(report_path(output_dir, s))]
+
+
+def _usage_tokens(result):
+    return (result.get("usage") or {}).get("total_tokens", 0)
+
+
+def print_bulk_summary(mode, total, done, failed, elapsed, tokens, output_dir):
+    """Print the throughput summary of a bulk run."""
+    print("\n" + "=" * 60)
+    print(f"BULK SUMMARY ({mode})")
+    print("=" * 60)
+    print(
+        f"   • Reports written: {done}, failed: {failed}, "
+        f"skipped: {total - done - failed}"
+    )
+    print(f"   • Wall time: {elapsed:.1f}s")
+    if elapsed > 0 and done:
+        print(f"   • Throughput: {done / elapsed * 60:.1f} reports/minute")
+    if tokens:
+        print(f"   • Tokens used: {tokens:,}")
+    print(f"   • Reports directory: {output_dir}")
+
+
+def run_concurrent(
+    services, build_request, output_dir, concurrency=8, rate_limiter=None
+):
+    """Generate reports with up to ``concurrency`` requests in flight.
+
+    Returns the number of reports written.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    todo = _pending_services(services, output_dir)
+    print(
+        f"\n📦 Bulk: {len(services)} services, {len(services) - len(todo)} already "
+        f"done, {len(todo)} to analyze with concurrency {concurrency}"
+    )
+
+    client = create_scheduler(rate_limiter)
+    cache = get_default_cache()
+    metrics = get_default_metrics()
+
+    def analyze(service):
+        data = build_request(service)
+        cache_key = make_cache_key(data)
+        with metrics.stage("report"):
+            result = cache.get(cache_key)
+            if result is not None:
+                metrics.record_cache_hit("chat/completions", data["model"], result)
+            else:
+                response = client.post("chat/completions", json=data, timeout=120)
+                response.raise_for_status()
+                result = response.json()
+                cache.set(cache_key, result)
+        _write_report(output_dir, service, result["choices"][0]["message"]["content"])
+        return _usage_tokens(result)
+
+    done = failed = tokens = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {pool.submit(analyze, service): service for service in todo}
+        for future in as_completed(futures):
+            try:
+                tokens += future.result()
+                done += 1
+                print(f"✅ {futures[future]}")
+            except Exception as e:
+                failed += 1
+                print(f"❌ {futures[future]}: {str(e)}")
+    elapsed = time.perf_counter() - started
+
+    print_bulk_summary(
+        "concurrent", len(services), done, failed, elapsed, tokens, output_dir
+    )
+    print(
+        f"   • Retries: {client.counters['retries']} "
+        f"({client.counters['throttled']} rate limited), "
+        f"time spent waiting on rate limits: {client.rate_limiter.waited_seconds:.1f}s"
+    )
+    return done
+
+
+def _load_batch_state(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_batch_state(path, state):
+    if not state:
+        if os.path.exists(path):
+            os.remove(path)  # every job was collected
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, ensure_ascii=False)
+
+
+def run_batch_job(services, build_request, output_dir, poll_interval=30.0):
+    """Generate reports through the Batch API, waiting for the jobs to finish.
+
+    Cached reports are written right away; the rest are submitted in jobs of
+    at most ``MAX_BATCH_REQUESTS`` requests. Returns the number of reports
+    written.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    state_path = os.path.join(output_dir, BATCH_STATE_NAME)
+    state = _load_batch_state(state_path)  # batch id -> {custom id: service}
+    in_flight = {service for jobs in state.values() for service in jobs.values()}
+
+    client = get_default_scheduler()
+    cache = get_default_cache()
+    started = time.perf_counter()
+    done = failed = tokens = 0
+
+    todo = {}
+    for service in _pending_services(services, output_dir):
+        if service in in_flight:
+            continue
+        data = build_request(service)
+        cached = cache.get(make_cache_key(data))
+        if cached is not None:
+            _write_report(
+                output_dir, service, cached["choices"][0]["message"]["content"]
+            )
+            done += 1
+        else:
+            todo[service] = data
+
+    print(
+        f"\n📦 Batch: {len(services)} services, {done} from cache, "
+        f"{len(in_flight)} in submitted jobs, {len(todo)} to submit"
+    )
+
+    pending = list(todo.items())
+    for start in range(0, len(pending), MAX_BATCH_REQUESTS):
+        part = pending[start : start + MAX_BATCH_REQUESTS]
+        ids = {f"svc-{start + i}": service for i, (service, _) in enumerate(part)}
+        batch = submit_batch(
+            client,
+            {custom_id: todo[service] for custom_id, service in ids.items()},
+            metadata={"description": "service analysis reports"},
+        )
+        state[batch["id"]] = ids
+        _save_batch_state(state_path, state)
+        print(f"🚀 Submitted batch {batch['id']} with {len(ids)} requests")
+
+    def report_progress(batch):
+        counts = batch.get("request_counts") or {}
+        print(
+            f"   ⏳ {batch['id']}: {batch['status']} "
+            f"({counts.get('completed', 0)}/{counts.get('total', 0)} completed)"
+        )
+
+    for batch_id, ids in list(state.items()):
+        batch = wait_for_batch(
+            client, batch_id, poll_interval=poll_interval, on_update=report_progress
+        )
+        results = download_results(client, batch)
+        for custom_id, service in ids.items():
+            body, error = results.get(custom_id, (None, f"batch {batch['status']}"))
+            if body is None:
+                failed += 1
+                print(f"❌ {service}: {error}")
+                continue
+            cache.set(make_cache_key(build_request(service)), body)
+            _write_report(output_dir, service, body["choices"][0]["message"]["content"])
+            tokens += _usage_tokens(body)
+            done += 1
+
+        del state[batch_id]
+        _save_batch_state(state_path, state)
+
+    elapsed = time.perf_counter() - started
+    print_bulk_summary(
+        "batch", len(services), done, failed, elapsed, tokens, output_dir
+    )
+    return done
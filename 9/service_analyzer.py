@@ -1,20 +1,25 @@
 import os
 import sys
+import argparse
 import requests
 from dotenv import load_dotenv
 
+# Shared helpers live in the common/ package at the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.http_client import iter_sse_data
+from common.metrics import add_arguments, get_default_metrics, report_at_exit
+from common.rate_limit import RateLimiter
+from common.response_cache import get_default_cache, make_cache_key
+from common.scheduler import get_default_scheduler
+
+from bulk_analysis import read_services, run_batch_job, run_concurrent
+
 # Load environment variables
 load_dotenv()
 
-# Get API key
-API_KEY = os.getenv("OPENAI_API_KEY")
-API_URL = "https://api.openai.com/v1/chat/completions"
-
-
-def generate_analysis_report(input_text):
-    """Generate a comprehensive analysis report using OpenAI API."""
-    print(f"\nSending request to OpenAI API...")
 
+def build_report_request(input_text):
+    """Build the chat completion request for an analysis report."""
     prompt = f"""Analyze the following service/product and generate a comprehensive markdown-formatted report. 
     If the input is a known service name (like 'Spotify' or 'Notion'), use your knowledge about that service.
     If it's a description, analyze the provided text.
@@ -34,8 +39,6 @@ def generate_analysis_report(input_text):
     Format the output in clean markdown with proper headers and bullet points where appropriate.
     """
 
-    headers = {"Authorization": f"Bearer {API_KEY}", "Content-Type": "application/json"}
-
     data = {
         "model": "gpt-4.1-mini",
         "messages": [
@@ -48,14 +51,65 @@ def generate_analysis_report(input_text):
         "temperature": 0.7,
         "max_tokens": 2000,
     }
+    return data
+
+
+def generate_analysis_report(input_text):
+    """Generate a comprehensive analysis report using OpenAI API."""
+    print(f"\nSending request to OpenAI API...")
+
+    data = build_report_request(input_text)
+    cache = get_default_cache()
+    cache_key = make_cache_key(data)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        print("Using cached response.")
+        get_default_metrics().record_cache_hit(
+            "chat/completions", data["model"], cached
+        )
+        return cached["choices"][0]["message"]["content"]
 
     try:
         print("Waiting for API response...")
-        response = requests.post(API_URL, headers=headers, json=data, timeout=30)
+        response = get_default_scheduler().post(
+            "chat/completions", json=data, timeout=30
+        )
         response.raise_for_status()
         print("Received response from API!")
 
         result = response.json()
+        cache.set(cache_key, result)
+        return result["choices"][0]["message"]["content"]
+
+    except requests.exceptions.Timeout:
+        return "Error: Request timed out. Please try again."
+    except requests.exceptions.RequestException as e:
+        print(f"Error occurred: {str(e)}")
+        if hasattr(e, "response") and e.response:
+            print(f"API Error details: {e.response.text}")
+        return f"Error generating report: {str(e)}"
+
+
+async def generate_analysis_report_async(input_text):
+    """Like ``generate_analysis_report``, for callers running an event loop."""
+    data = build_report_request(input_text)
+    cache = get_default_cache()
+    cache_key = make_cache_key(data)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        get_default_metrics().record_cache_hit(
+            "chat/completions", data["model"], cached
+        )
+        return cached["choices"][0]["message"]["content"]
+
+    try:
+        response = await get_default_scheduler().apost(
+            "chat/completions", json=data, timeout=30
+        )
+        response.raise_for_status()
+
+        result = response.json()
+        cache.set(cache_key, result)
         return result["choices"][0]["message"]["content"]
 
     except requests.exceptions.Timeout:
@@ -67,6 +121,86 @@ def generate_analysis_report(input_text):
         return f"Error generating report: {str(e)}"
 
 
+def stream_analysis_report(input_text):
+    """Generate an analysis report, yielding the markdown as it is produced.
+
+    The API streams the completion as server-sent events, so the first words
+    arrive within about a second and the 30 second timeout only applies to the
+    gap between two chunks, not to the whole report. The finished report is
+    cached like a regular response, so either mode can reuse it.
+    """
+    print(f"\nSending streaming request to OpenAI API...")
+
+    data = build_report_request(input_text)
+    cache = get_default_cache()
+    cache_key = make_cache_key(data)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        print("Using cached response.")
+        get_default_metrics().record_cache_hit(
+            "chat/completions", data["model"], cached
+        )
+        yield cached["choices"][0]["message"]["content"]
+        return
+
+    parts = []
+    finish_reason = None
+    usage = None
+    try:
+        response = get_default_scheduler().post(
+            "chat/completions",
+            json={**data, "stream": True, "stream_options": {"include_usage": True}},
+            timeout=30,
+            stream=True,
+        )
+        # The stream is closed however it ends, also on an error status
+        with response:
+            response.raise_for_status()
+            for event in iter_sse_data(response):
+                # The last event carries the token usage of the whole stream
+                usage = event.get("usage") or usage
+                if not event.get("choices"):
+                    continue
+                choice = event["choices"][0]
+                content = choice.get("delta", {}).get("content")
+                if content:
+                    parts.append(content)
+                    yield content
+                finish_reason = choice.get("finish_reason") or finish_reason
+        get_default_metrics().finish_stream(response.call_record, usage)
+
+    except requests.exceptions.Timeout:
+        yield "\n\nError: Request timed out. Please try again."
+        return
+    except requests.exceptions.RequestException as e:
+        print(f"Error occurred: {str(e)}")
+        if hasattr(e, "response") and e.response:
+            print(f"API Error details: {e.response.text}")
+        yield f"\n\nError generating report: {str(e)}"
+        return
+    except ValueError as e:
+        # An event whose data is not valid JSON; the report is incomplete
+        print(f"Error occurred: malformed event in the API stream: {str(e)}")
+        yield f"\n\nError generating report: malformed event in the API stream"
+        return
+
+    # Only a report that streamed to the end is worth reusing
+    if finish_reason is not None:
+        report = "".join(parts)
+        cache.set(
+            cache_key,
+            {
+                "choices": [
+                    {
+                        "message": {"role": "assistant", "content": report},
+                        "finish_reason": finish_reason,
+                    }
+                ],
+                "usage": usage,
+            },
+        )
+
+
 def get_user_input():
     """Get input from user with better handling for single-line vs multi-line input."""
     print("Service Analyzer - Generate comprehensive service analysis reports")
@@ -102,7 +236,119 @@ def get_user_input():
         return first_input
 
 
+def write_streamed_report(input_text, output_file):
+    """Print the report as it streams in and append each piece to the file."""
+    print("\n=== Generated Report ===\n")
+    try:
+        with open(output_file, "w", encoding="utf-8") as f:
+            for piece in stream_analysis_report(input_text):
+                print(piece, end="", flush=True)
+                f.write(piece)
+                f.flush()
+        print(f"\n\nReport has been saved to {output_file}")
+    except IOError as e:
+        print(f"\nError saving file: {e}")
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description="Generate comprehensive service analysis reports"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Print and save the report as it is generated instead of waiting for all of it",
+    )
+    parser.add_argument(
+        "--output",
+        default="analysis_report.md",
+        help="Markdown file to save the report to (default: analysis_report.md)",
+    )
+    parser.add_argument(
+        "--bulk",
+        metavar="FILE",
+        help="Analyze every service in a CSV or newline-delimited file instead of asking for input",
+    )
+    parser.add_argument(
+        "--bulk-mode",
+        choices=["concurrent", "batch"],
+        default="concurrent",
+        help="Bulk mode: concurrent requests now, or an offline Batch API job (default: concurrent)",
+    )
+    parser.add_argument(
+        "--output-dir",
+        default="reports",
+        help="Bulk mode directory for the report files (default: reports)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Concurrent mode: number of requests in flight (default: 8)",
+    )
+    parser.add_argument(
+        "--rpm", type=int, help="Concurrent mode: maximum API requests per minute"
+    )
+    parser.add_argument(
+        "--tpm", type=int, help="Concurrent mode: maximum API tokens per minute"
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=30.0,
+        help="Batch mode: seconds between job status checks (default: 30)",
+    )
+    add_arguments(parser)
+    return parser.parse_args()
+
+
+def run_bulk(args):
+    """Generate a report for every service listed in ``args.bulk``."""
+    try:
+        services = read_services(args.bulk)
+    except (IOError, UnicodeDecodeError) as e:
+        print(f"Error reading {args.bulk}: {e}")
+        sys.exit(1)
+    if not services:
+        print(f"No services found in {args.bulk}. Exiting...")
+        sys.exit(1)
+
+    try:
+        if args.bulk_mode == "batch":
+            run_batch_job(
+                services,
+                build_report_request,
+                args.output_dir,
+                poll_interval=args.poll_interval,
+            )
+        else:
+            rate_limiter = None
+            if args.rpm or args.tpm:
+                rate_limiter = RateLimiter(
+                    requests_per_minute=args.rpm, tokens_per_minute=args.tpm
+                )
+            run_concurrent(
+                services,
+                build_report_request,
+                args.output_dir,
+                concurrency=args.concurrency,
+                rate_limiter=rate_limiter,
+            )
+    except requests.exceptions.RequestException as e:
+        print(f"Error occurred: {str(e)}")
+        if hasattr(e, "response") and e.response is not None:
+            print(f"API Error details: {e.response.text}")
+        sys.exit(1)
+
+
 def main():
+    args = parse_args()
+    report_at_exit(args)
+    if args.bulk:
+        run_bulk(args)
+        return
+
     input_text = get_user_input()
 
     if not input_text.strip():
@@ -112,13 +358,18 @@ def main():
     print(f"\nAnalyzing: {input_text}")
     print("Generating analysis report...\n")
 
-    report = generate_analysis_report(input_text)
+    with get_default_metrics().stage("report"):
+        if args.stream:
+            write_streamed_report(input_text, args.output)
+            return
+
+        report = generate_analysis_report(input_text)
 
     print("\n=== Generated Report ===\n")
     print(report)
 
     # Save to file
-    output_file = "analysis_report.md"
+    output_file = args.output
     try:
         with open(output_file, "w", encoding="utf-8") as f:
             f.write(report)
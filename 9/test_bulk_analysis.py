@@ -0,0 +1,125 @@
+"""Bulk report generation against the local stand-in for the OpenAI API.
+
+Both bulk modes run end to end against ``common/mock_openai_server.py``, so
+no API key or network access is needed:
+
+    python -m pytest 9/test_bulk_analysis.py
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import common.http_client
+import common.response_cache
+import common.scheduler
+from common.mock_openai_server import make_server
+
+from bulk_analysis import (
+    BATCH_STATE_NAME,
+    read_services,
+    report_path,
+    run_batch_job,
+    run_concurrent,
+)
+from service_analyzer import build_report_request
+
+SERVICES = ["Spotify", "Notion", "Slack", "Notion", "", "# a comment", "Figma"]
+
+
+@pytest.fixture
+def mock_api(monkeypatch, tmp_path):
+    """Point the shared client, scheduler and cache at a fresh mock server."""
+    server = make_server(port=0, batch_delay=0.1, profile="instant")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv(
+        "OPENAI_BASE_URL", f"http://127.0.0.1:{server.server_address[1]}/v1"
+    )
+    monkeypatch.setenv("OPENAI_CACHE_PATH", str(tmp_path / "cache.sqlite"))
+    monkeypatch.delenv("OPENAI_CACHE_DISABLED", raising=False)
+    # The shared instances are created from the environment on first use
+    monkeypatch.setattr(common.http_client, "_default_client", None)
+    monkeypatch.setattr(common.scheduler, "_default_scheduler", None)
+    monkeypatch.setattr(common.response_cache, "_default_cache", None)
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def services_file(tmp_path):
+    path = tmp_path / "services.txt"
+    path.write_text("\n".join(SERVICES) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def _reports(output_dir, services):
+    reports = {}
+    for service in services:
+        with open(report_path(output_dir, service), encoding="utf-8") as f:
+            reports[service] = f.read()
+    return reports
+
+
+def test_read_services_skips_duplicates_blanks_and_comments(services_file):
+    assert read_services(services_file) == ["Spotify", "Notion", "Slack", "Figma"]
+
+
+def test_concurrent_mode_writes_each_report_once(mock_api, services_file, tmp_path):
+    services = read_services(services_file)
+    output_dir = str(tmp_path / "reports")
+
+    assert (
+        run_concurrent(services, build_report_request, output_dir, concurrency=3) == 4
+    )
+    assert sorted(os.listdir(output_dir)) == sorted(
+        os.path.basename(report_path(output_dir, service)) for service in services
+    )
+    assert all(report.strip() for report in _reports(output_dir, services).values())
+    assert mock_api.state.counters["requests"] == 4
+
+    # A second run skips the services that already have a report
+    assert run_concurrent(services, build_report_request, output_dir) == 0
+    assert mock_api.state.counters["requests"] == 4
+
+
+def test_batch_mode_writes_each_report_once(mock_api, services_file, tmp_path):
+    services = read_services(services_file)
+    output_dir = str(tmp_path / "reports")
+
+    written = run_batch_job(
+        services, build_report_request, output_dir, poll_interval=0.05
+    )
+    assert written == 4
+    assert len(mock_api.state.batches) == 1
+    assert all(report.strip() for report in _reports(output_dir, services).values())
+    # Every job was collected, so no state is left for a restart
+    assert not os.path.exists(os.path.join(output_dir, BATCH_STATE_NAME))
+
+    # Services with a report are neither submitted nor written again
+    assert run_batch_job(services, build_report_request, output_dir) == 0
+    assert len(mock_api.state.batches) == 1
+
+
+def test_batch_mode_reuses_reports_cached_by_concurrent_mode(
+    mock_api, services_file, tmp_path
+):
+    services = read_services(services_file)
+    run_concurrent(services[:2], build_report_request, str(tmp_path / "first"))
+
+    output_dir = str(tmp_path / "second")
+    written = run_batch_job(
+        services, build_report_request, output_dir, poll_interval=0.05
+    )
+    assert written == 4
+    # Only the two services missing from the cache went into the batch job
+    (batch,) = mock_api.state.batches.values()
+    assert batch["request_counts"]["total"] == 2
@@ -0,0 +1,90 @@
+"""Error handling of streamed reports.
+
+python -m pytest 9/test_stream_report.py
+"""
+
+import os
+import sys
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import common.response_cache
+
+import service_analyzer
+from service_analyzer import stream_analysis_report
+
+
+class FakeStream:
+    """A streamed response with the given status and SSE lines."""
+
+    def __init__(self, status_code, lines):
+        self.status_code = status_code
+        self.lines = lines
+        self.text = ""
+        self.closed = False
+        self.call_record = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.closed = True
+
+    def iter_lines(self):
+        return iter(self.lines)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error")
+
+
+class FakeScheduler:
+    def __init__(self, response):
+        self.response = response
+
+    def post(self, path, **kwargs):
+        return self.response
+
+
+@pytest.fixture
+def stream(monkeypatch):
+    """Answer the next streaming request with ``FakeStream(status, lines)``."""
+    monkeypatch.setenv("OPENAI_CACHE_DISABLED", "1")
+    monkeypatch.setattr(common.response_cache, "_default_cache", None)
+
+    def respond(status_code, lines):
+        response = FakeStream(status_code, lines)
+        monkeypatch.setattr(
+            service_analyzer, "get_default_scheduler", lambda: FakeScheduler(response)
+        )
+        return response
+
+    return respond
+
+
+def test_error_status_closes_the_stream(stream):
+    response = stream(503, [])
+    chunks = list(stream_analysis_report("Notion"))
+    assert chunks == ["\n\nError generating report: 503 Error"]
+    assert response.closed
+
+
+def test_malformed_event_is_reported_as_an_error(stream):
+    response = stream(
+        200,
+        [
+            b'data: {"choices": [{"delta": {"content": "# Notion"}}]}',
+            b"",
+            b"data: {not json",
+            b"data: [DONE]",
+        ],
+    )
+    chunks = list(stream_analysis_report("Notion"))
+    assert chunks[0] == "# Notion"
+    assert chunks[1].startswith("\n\nError generating report: malformed event")
+    assert response.closed
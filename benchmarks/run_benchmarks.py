@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite of the Service Analyzer, Product Search Tool and
+Audio Analyzer.
+
+Starts the mock OpenAI server from common/mock_openai_server.py in-process,
+points the tools at it and drives search_products, generate_analysis_report
+and AudioAnalyzer.process_audio with synthetic catalogs, service
+descriptions and WAV recordings of increasing size. For every input size it
+reports the p50/p95/p99 latency, the throughput and the peak memory of the
+Python allocations. No network access or API key is needed; the response
+cache and stage checkpoints are turned off so every run does the full work.
+
+Usage:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --profile realistic --repeat 20
+    python benchmarks/run_benchmarks.py --json results.json
+    python benchmarks/run_benchmarks.py --baseline results.json --tolerance 0.2
+"""
+
+import io
+import os
+import sys
+import json
+import math
+import time
+import wave
+import random
+import argparse
+import tempfile
+import threading
+import tracemalloc
+from contextlib import redirect_stdout
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from common.mock_openai_server import PROFILES, make_server
+
+SUITES = ("search", "report", "audio")
+DEFAULT_SIZES = {
+    "search": "50,500,2000",  # products in the catalog
+    "report": "200,2000,8000",  # characters of the service description
+    "audio": "30,180,900",  # seconds of audio
+}
+
+CATEGORIES = ["Electronics", "Fitness", "Kitchen", "Books", "Clothing"]
+PRODUCT_WORDS = [
+    "Wireless",
+    "Smart",
+    "Portable",
+    "Premium",
+    "Compact",
+    "Ergonomic",
+    "Digital",
+    "Classic",
+]
+PRODUCT_NOUNS = {
+    "Electronics": ["Headphones", "Laptop", "Smartphone", "Speaker", "Monitor"],
+    "Fitness": ["Treadmill", "Yoga Mat", "Dumbbells", "Resistance Bands"],
+    "Kitchen": ["Blender", "Air Fryer", "Coffee Maker", "Knife Set"],
+    "Books": ["Programming Guide", "Cookbook", "Novel", "History Book"],
+    "Clothing": ["T-Shirt", "Jacket", "Running Shoes", "Jeans"],
+}
+SEARCH_QUERIES = [
+    "I need electronics under $200",
+    "Show me fitness equipment with high ratings",
+    "Find kitchen appliances that are in stock",
+    "I want books about programming",
+]
+
+
+def synthetic_catalog(size, seed=0):
+    """Return ``size`` product dicts in the format of products.json"""
+    rng = random.Random(seed)
+    products = []
+    for number in range(size):
+        category = rng.choice(CATEGORIES)
+        products.append(
+            {
+                "name": f"{rng.choice(PRODUCT_WORDS)} "
+                f"{rng.choice(PRODUCT_NOUNS[category])} {number}",
+                "category": category,
+                "price": round(rng.uniform(5, 2000), 2),
+                "rating": round(rng.uniform(3.0, 5.0), 1),
+                "in_stock": rng.random() < 0.7,
+            }
+        )
+    return products
+
+
+def synthetic_service(size, seed=0):
+    """Return a service description of about ``size`` characters"""
+    rng = random.Random(seed)
+    sentences = [
+        "The service lets teams share notes, tasks and documents in one place.",
+        "It offers a free tier and paid plans billed per user.",
+        "Integrations connect it to calendars, chat tools and storage providers.",
+        "Customers mention the clean interface and the mobile apps.",
+        "Some reviews point out slow search in very large workspaces.",
+    ]
+    parts = ["Service description:"]
+    length = len(parts[0])
+    while length < size:
+        sentence = rng.choice(sentences)
+        parts.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(parts)
+
+
+def synthetic_wav(path, seconds, sample_rate=8000, seed=0):
+    """Write a mono 16-bit WAV of ``seconds`` of noise with a quiet second every 7"""
+    rng = random.Random(seed)
+
+    def noise_second(amplitude):
+        samples = [rng.randint(-amplitude, amplitude) for _ in range(256)]
+        pattern = b"".join(s.to_bytes(2, "little", signed=True) for s in samples)
+        return (pattern * (sample_rate // 256 + 1))[: sample_rate * 2]
+
+    # Speech-like: loud for most seconds, near silence in between
+    loud, quiet = noise_second(6000), noise_second(200)
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        for second in range(int(seconds)):
+            wav.writeframes(quiet if second % 7 == 6 else loud)
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of a sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(fraction * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def measure(run, repeat):
+    """Call ``run(i)`` ``repeat`` times and return latency, throughput and memory
+
+    The latencies are measured without memory tracing, which slows Python
+    down; one extra traced run measures the peak memory.
+    """
+    latencies = []
+    failures = 0
+    started = time.perf_counter()
+    for i in range(repeat):
+        call_started = time.perf_counter()
+        try:
+            with redirect_stdout(io.StringIO()):
+                run(i)
+        except Exception:
+            failures += 1
+        latencies.append(time.perf_counter() - call_started)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    try:
+        with redirect_stdout(io.StringIO()):
+            run(0)
+    except Exception:
+        pass
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "runs": repeat,
+        "failures": failures,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "throughput_per_s": repeat / elapsed if elapsed > 0 else 0.0,
+        "peak_memory_mb": peak_memory / 1e6,
+    }
+
+
+def search_benchmark(size, repeat):
+    from product_search import search_products
+    from catalog import ProductCatalog
+
+    catalog = ProductCatalog.from_products(synthetic_catalog(size))
+    return measure(
+        lambda i: search_products(SEARCH_QUERIES[i % len(SEARCH_QUERIES)], catalog),
+        repeat,
+    )
+
+
+def report_benchmark(size, repeat):
+    from service_analyzer import generate_analysis_report
+
+    # Different descriptions of the same size, like different services
+    services = [synthetic_service(size, seed) for seed in range(repeat)]
+
+    def run(i):
+        report = generate_analysis_report(services[i])
+        if report.startswith("Error"):
+            raise RuntimeError(report)
+
+    return measure(run, repeat)
+
+
+def audio_benchmark(size, repeat, work_dir):
+    from audio_analyzer import AudioAnalyzer
+    from checkpoint_store import CheckpointStore
+
+    audio_path = os.path.join(work_dir, f"benchmark_{size}s.wav")
+    synthetic_wav(audio_path, size)
+    output_dir = os.path.join(work_dir, f"output_{size}s")
+    with redirect_stdout(io.StringIO()):
+        analyzer = AudioAnalyzer(checkpoints=CheckpointStore(enabled=False))
+    return measure(lambda i: analyzer.process_audio(audio_path, output_dir), repeat)
+
+
+def start_mock_server(profile, seed):
+    server = make_server(port=0, profile=profile, seed=seed)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def compare(results, baseline, tolerance):
+    """Return the lines describing p50 regressions beyond ``tolerance``"""
+    previous = {(r["suite"], r["size"]): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        before = previous.get((result["suite"], result["size"]))
+        if not before or not before["p50_ms"]:
+            continue
+        change = result["p50_ms"] / before["p50_ms"] - 1
+        if change > tolerance:
+            regressions.append(
+                f"{result['suite']} size {result['size']}: p50 "
+                f"{before['p50_ms']:.1f} -> {result['p50_ms']:.1f} ms (+{change:.0%})"
+            )
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the tools offline against a local mock OpenAI server"
+    )
+    parser.add_argument(
+        "--suites",
+        default=",".join(SUITES),
+        help=f"Comma-separated suites to run (default: {','.join(SUITES)})",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=sorted(PROFILES),
+        default="fast",
+        help="Mock server latency, throughput and error profile (default: fast)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=10, help="Runs per input size (default: 10)"
+    )
+    for suite, sizes in DEFAULT_SIZES.items():
+        parser.add_argument(
+            f"--{suite}-sizes",
+            default=sizes,
+            help=f"Comma-separated input sizes of the {suite} suite (default: {sizes})",
+        )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="Seed of the mock server (default: 0)"
+    )
+    parser.add_argument("--json", metavar="FILE", help="Write the results as JSON")
+    parser.add_argument(
+        "--baseline",
+        metavar="FILE",
+        help="Compare with the JSON results of an earlier run; exit 1 on regressions",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed p50 latency increase over the baseline (default: 0.2 = 20%%)",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    suites = [suite.strip() for suite in args.suites.split(",") if suite.strip()]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        print(f"Unknown suites: {', '.join(sorted(unknown))}")
+        sys.exit(2)
+
+    server = start_mock_server(args.profile, args.seed)
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+    os.environ["OPENAI_API_KEY"] = "benchmark"
+    os.environ["OPENAI_CACHE_DISABLED"] = "1"
+    os.environ["AUDIO_CHECKPOINTS_DISABLED"] = "1"
+    for folder in ("9", "10", "11"):
+        sys.path.insert(0, os.path.join(ROOT, folder))
+
+    print(f"Mock server profile: {args.profile}, {args.repeat} runs per size")
+    print(
+        f"{'suite':<8} {'size':>8} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} "
+        f"{'ops/s':>8} {'peak MB':>8} {'failed':>7}"
+    )
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for suite in suites:
+            sizes = getattr(args, f"{suite}_sizes").split(",")
+            for size in (int(value) for value in sizes):
+                if suite == "search":
+                    result = search_benchmark(size, args.repeat)
+                elif suite == "report":
+                    result = report_benchmark(size, args.repeat)
+                else:
+                    result = audio_benchmark(size, args.repeat, work_dir)
+                result = {"suite": suite, "size": size, **result}
+                results.append(result)
+                print(
+                    f"{suite:<8} {size:>8,} {result['p50_ms']:>10.1f} "
+                    f"{result['p95_ms']:>10.1f} {result['p99_ms']:>10.1f} "
+                    f"{result['throughput_per_s']:>8.2f} "
+                    f"{result['peak_memory_mb']:>8.1f} {result['failures']:>7}"
+                )
+    server.shutdown()
+
+    print(
+        f"\nMock server: {server.state.counters['requests']} requests, "
+        f"{server.state.counters['errors_injected']} injected errors"
+    )
+    print(
+        "sizes: search = products in the catalog, report = characters of the "
+        "description, audio = seconds of audio"
+    )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(
+                {"profile": args.profile, "repeat": args.repeat, "results": results},
+                f,
+                indent=2,
+            )
+        print(f"Results written to {args.json}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("profile") != args.profile:
+            print(
+                f"\nWarning: the baseline was measured with the "
+                f"{baseline.get('profile')} profile, not {args.profile}"
+            )
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"   • {line}")
+            sys.exit(1)
+        print("\nNo regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+"""Helpers shared by the Python tools in this repository (tasks 9, 10 and 11).
+
+The tools are run as scripts from their own folders, so each one adds the
+repository root to ``sys.path`` before importing from this package.
+"""
@@ -0,0 +1,248 @@
+"""Shared, pooled HTTP clients for the OpenAI API.
+
+``ApiClient`` keeps one ``requests.Session`` per process with a sized
+connection pool, so consecutive calls reuse open TCP+TLS connections instead
+of paying a new handshake each time. ``AsyncApiClient`` is the asyncio
+variant: it uses ``httpx`` (with HTTP/2 when the ``h2`` package is installed)
+if available, and otherwise runs the pooled session in worker threads.
+
+Both clients raise ``requests`` exceptions, so callers handle errors the same
+way regardless of which client they use. ``ApiClient.post(..., stream=True)``
+returns the response before its body is read, and ``iter_sse_data`` decodes
+the server-sent events of a streaming completion as they arrive.
+
+Configuration comes from the environment:
+
+- ``OPENAI_API_KEY``: API key sent as a bearer token
+- ``OPENAI_BASE_URL``: API root (default ``https://api.openai.com/v1``)
+- ``OPENAI_CONNECT_TIMEOUT`` / ``OPENAI_READ_TIMEOUT``: default timeouts in seconds
+- ``OPENAI_POOL_SIZE``: maximum number of pooled connections
+"""
+
+import os
+import json
+import asyncio
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+except ImportError:  # httpx is optional, the async client falls back to threads
+    httpx = None
+
+try:
+    import h2  # noqa: F401  (only needed to enable HTTP/2 in httpx)
+
+    HTTP2_AVAILABLE = httpx is not None
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_READ_TIMEOUT = 60.0
+DEFAULT_POOL_SIZE = 10
+
+
+def _settings_from_env():
+    return {
+        "api_key": os.getenv("OPENAI_API_KEY"),
+        "base_url": os.getenv("OPENAI_BASE_URL", DEFAULT_BASE_URL),
+        "connect_timeout": float(
+            os.getenv("OPENAI_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT)
+        ),
+        "read_timeout": float(os.getenv("OPENAI_READ_TIMEOUT", DEFAULT_READ_TIMEOUT)),
+        "pool_size": int(os.getenv("OPENAI_POOL_SIZE", DEFAULT_POOL_SIZE)),
+    }
+
+
+class ApiClient:
+    """Blocking API client with keep-alive connection pooling."""
+
+    def __init__(
+        self,
+        api_key,
+        base_url=DEFAULT_BASE_URL,
+        connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+        read_timeout=DEFAULT_READ_TIMEOUT,
+        pool_size=DEFAULT_POOL_SIZE,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+
+        self.session = requests.Session()
+        self.session.headers["Authorization"] = f"Bearer {api_key}"
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def url(self, path):
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def post(self, path, json=None, files=None, data=None, timeout=None, stream=False):
+        """POST to an API path such as ``chat/completions``.
+
+        ``timeout`` is either one number for the read timeout or a
+        ``(connect, read)`` tuple; it defaults to the client's timeouts. With
+        ``stream=True`` the read timeout applies to each chunk of the body
+        rather than to the whole response.
+        """
+        if isinstance(timeout, (int, float)):
+            timeout = (self.timeout[0], timeout)
+        return self.session.post(
+            self.url(path),
+            json=json,
+            files=files,
+            data=data,
+            timeout=timeout or self.timeout,
+            stream=stream,
+        )
+
+    def get(self, path, timeout=None):
+        """GET an API path such as ``batches/<id>``."""
+        if isinstance(timeout, (int, float)):
+            timeout = (self.timeout[0], timeout)
+        return self.session.get(self.url(path), timeout=timeout or self.timeout)
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncApiClient:
+    """Asyncio API client with the same interface as ``ApiClient``."""
+
+    def __init__(
+        self,
+        api_key,
+        base_url=DEFAULT_BASE_URL,
+        connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+        read_timeout=DEFAULT_READ_TIMEOUT,
+        pool_size=DEFAULT_POOL_SIZE,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self._sync_client = None
+        self._client = None
+
+        if httpx is not None:
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                headers={"Authorization": f"Bearer {api_key}"},
+                limits=httpx.Limits(
+                    max_connections=pool_size, max_keepalive_connections=pool_size
+                ),
+            )
+        else:
+            self._sync_client = ApiClient(
+                api_key, base_url, connect_timeout, read_timeout, pool_size
+            )
+
+    def url(self, path):
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    async def post(self, path, json=None, files=None, data=None, timeout=None):
+        """POST to an API path without blocking the event loop."""
+        if self._sync_client is not None:
+            return await asyncio.to_thread(
+                self._sync_client.post, path, json, files, data, timeout
+            )
+
+        if isinstance(timeout, (int, float)):
+            timeout = (self.timeout[0], timeout)
+        connect_timeout, read_timeout = timeout or self.timeout
+        try:
+            response = await self._client.post(
+                self.url(path),
+                json=json,
+                files=files,
+                data=data,
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            )
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+        return _HttpxResponse(response)
+
+    async def get(self, path, timeout=None):
+        """GET an API path without blocking the event loop."""
+        if self._sync_client is not None:
+            return await asyncio.to_thread(self._sync_client.get, path, timeout)
+
+        if isinstance(timeout, (int, float)):
+            timeout = (self.timeout[0], timeout)
+        connect_timeout, read_timeout = timeout or self.timeout
+        try:
+            response = await self._client.get(
+                self.url(path),
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            )
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+        return _HttpxResponse(response)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+        if self._sync_client is not None:
+            self._sync_client.close()
+
+
+class _HttpxResponse:
+    """Wrap an ``httpx.Response`` so errors surface as ``requests`` exceptions."""
+
+    def __init__(self, response):
+        self._response = response
+        self.status_code = response.status_code
+        self.ok = response.status_code < 400
+        self.text = response.text
+        self.headers = response.headers
+
+    def json(self):
+        return self._response.json()
+
+    def close(self):
+        pass  # the body has been read, so the connection is already released
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            error = requests.exceptions.HTTPError(
+                f"{self.status_code} Error for url: {self._response.url}"
+            )
+            error.response = self
+            raise error
+
+
+def iter_sse_data(response):
+    """Yield the JSON payload of each server-sent event of a streaming response.
+
+    Stops at the ``[DONE]`` sentinel that ends an OpenAI stream.
+    """
+    for line in response.iter_lines():
+        if not line.startswith(b"data:"):
+            continue  # blank separators, comments and other SSE fields
+        payload = line[len(b"data:") :].strip()
+        if payload == b"[DONE]":
+            break
+        yield json.loads(payload)
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client():
+    """Return the process-wide pooled client configured from the environment."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = ApiClient(**_settings_from_env())
+        return _default_client
+
+
+def create_async_client():
+    """Create an async client configured from the environment."""
+    return AsyncApiClient(**_settings_from_env())
@@ -0,0 +1,583 @@
+"""Latency, token and cost metrics of API calls and pipeline stages.
+
+Every call sent through the scheduler is recorded with its wall time, the
+part of it spent queued (waiting for the rate limiter or a retry backoff),
+the prompt and completion tokens reported by the API and an estimated cost.
+Answers served from the response cache are recorded as cache hits, with the
+cost they saved.
+
+Code marks the work it does with ``with metrics.stage(name):``. Calls are
+attributed to the innermost stage, and stages nest, so the recorded stages
+and calls form a trace. The stage is kept in a context variable; work handed
+to a thread pool keeps its stage when it is submitted with
+``contextvars.copy_context().run``.
+
+The metrics can be written as Prometheus text (``.prom``), JSON lines
+(``.jsonl``) or an OpenTelemetry (OTLP/JSON) trace file (``.json``), and
+``print_profile`` prints a per-stage breakdown.
+"""
+
+import os
+import json
+import time
+import atexit
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+
+# Estimated prices in USD per million prompt, completion and cached prompt tokens
+TOKEN_PRICES = {
+    "gpt-4.1": (2.00, 8.00, 0.50),
+    "gpt-4.1-mini": (0.40, 1.60, 0.10),
+    "gpt-4.1-nano": (0.10, 0.40, 0.025),
+    "gpt-4o": (2.50, 10.00, 1.25),
+    "gpt-4o-mini": (0.15, 0.60, 0.075),
+}
+# Estimated prices in USD per minute of audio
+AUDIO_PRICES = {"whisper-1": 0.006}
+
+_current_stage = contextvars.ContextVar("metrics_stage", default=None)
+
+
+def _price(prices, model):
+    """Look up a model's price, also for dated snapshots like gpt-4.1-mini-2025-04-14."""
+    if not model:
+        return None
+    matches = [name for name in prices if model == name or model.startswith(name + "-")]
+    return prices[max(matches, key=len)] if matches else None
+
+
+def estimate_cost(
+    model, prompt_tokens=0, completion_tokens=0, audio_seconds=0.0, cached_tokens=0
+):
+    """Return the estimated cost of a call in USD (0 for unknown models).
+
+    ``cached_tokens`` of the prompt tokens were served from the API's prompt
+    cache and are billed at the lower cached price.
+    """
+    token_price = _price(TOKEN_PRICES, model)
+    if token_price is not None:
+        return (
+            (prompt_tokens - cached_tokens) * token_price[0]
+            + cached_tokens * token_price[2]
+            + completion_tokens * token_price[1]
+        ) / 1_000_000
+    audio_price = _price(AUDIO_PRICES, model)
+    if audio_price is not None:
+        return audio_seconds / 60 * audio_price
+    return 0.0
+
+
+def usage_from_result(result):
+    """Return (prompt, completion, cached prompt tokens, audio seconds) of a result."""
+    if not isinstance(result, dict):
+        return 0, 0, 0, 0.0
+    usage = result.get("usage") or {}
+    details = usage.get("prompt_tokens_details") or {}
+    return (
+        usage.get("prompt_tokens") or 0,
+        usage.get("completion_tokens") or 0,
+        details.get("cached_tokens") or 0,
+        float(result.get("duration") or 0.0) if "text" in result else 0.0,
+    )
+
+
+def _new_id(size):
+    return os.urandom(size).hex()
+
+
+class MetricsRecorder:
+    """Thread-safe collection of call records and stage spans."""
+
+    def __init__(self, service_name="edu-ai-challenge"):
+        self.service_name = service_name
+        self.trace_id = _new_id(16)
+        self.calls = []
+        self.stages = []
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def keep_last(self, count):
+        """Keep only the last ``count`` call records and stage spans.
+
+        For long-running processes: the Prometheus counters still cover every
+        call, while the profile, JSON lines and trace cover the kept records.
+        """
+        with self._lock:
+            self.calls = deque(self.calls, maxlen=count)
+            self.stages = deque(self.stages, maxlen=count)
+
+    @contextmanager
+    def stage(self, name):
+        """Attribute the calls made inside the block to the stage ``name``."""
+        parent = _current_stage.get()
+        span = {
+            "type": "stage",
+            "stage": name,
+            "span_id": _new_id(8),
+            "parent_span_id": parent["span_id"] if parent else None,
+            "start_time": time.time(),
+            "wall_seconds": 0.0,
+            "error": False,
+        }
+        token = _current_stage.set(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException:
+            span["error"] = True
+            raise
+        finally:
+            span["wall_seconds"] = time.perf_counter() - started
+            _current_stage.reset(token)
+            with self._lock:
+                self.stages.append(span)
+                self._count_stage(span)
+
+    def _new_record(self, endpoint, model, start_time):
+        stage = _current_stage.get()
+        return {
+            "type": "call",
+            "stage": stage["stage"] if stage else endpoint,
+            "endpoint": endpoint,
+            "model": model,
+            "span_id": _new_id(8),
+            "parent_span_id": stage["span_id"] if stage else None,
+            "start_time": start_time,
+            "wall_seconds": 0.0,
+            "queue_seconds": 0.0,
+            "status": None,
+            "retries": 0,
+            "cache_hit": False,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "cached_prompt_tokens": 0,
+            "audio_seconds": 0.0,
+            "cost_usd": 0.0,
+            "saved_cost_usd": 0.0,
+        }
+
+    def _add_usage(self, record, result):
+        prompt_tokens, completion_tokens, cached_tokens, audio_seconds = (
+            usage_from_result(result)
+        )
+        record["prompt_tokens"] = prompt_tokens
+        record["completion_tokens"] = completion_tokens
+        record["cached_prompt_tokens"] = cached_tokens
+        record["audio_seconds"] = audio_seconds
+        return estimate_cost(
+            record["model"],
+            prompt_tokens,
+            completion_tokens,
+            audio_seconds,
+            cached_tokens,
+        )
+
+    def record_call(
+        self,
+        endpoint,
+        model,
+        start_time,
+        wall_seconds,
+        queue_seconds=0.0,
+        retries=0,
+        response=None,
+        stream=False,
+    ):
+        """Record a call to the API and return its record.
+
+        The usage is read from the body of a successful ``response``. A
+        streamed response has not been read yet; its usage is added by
+        ``finish_stream`` once the stream has ended.
+        """
+        record = self._new_record(endpoint, model, start_time)
+        record["wall_seconds"] = wall_seconds
+        record["queue_seconds"] = queue_seconds
+        record["retries"] = retries
+        record["status"] = response.status_code if response is not None else "error"
+        if response is not None and response.ok and not stream:
+            try:
+                result = response.json()
+            except ValueError:  # e.g. the JSONL content of a batch file
+                result = None
+            if model is None and isinstance(result, dict):
+                record["model"] = result.get("model")
+            record["cost_usd"] = self._add_usage(record, result)
+        with self._lock:
+            self.calls.append(record)
+            self._count_call(record)
+        return record
+
+    def finish_stream(self, record, usage=None):
+        """Complete the record of a streamed call when its stream has ended."""
+        with self._lock:
+            self._count_call(record, -1)
+            record["first_byte_seconds"] = record["wall_seconds"]
+            record["wall_seconds"] = time.time() - record["start_time"]
+            if usage:
+                record["cost_usd"] = self._add_usage(record, {"usage": usage})
+            self._count_call(record)
+
+    def record_cache_hit(self, endpoint, model, result):
+        """Record an API call answered from the response cache."""
+        record = self._new_record(endpoint, model, time.time())
+        record["cache_hit"] = True
+        record["saved_cost_usd"] = self._add_usage(record, result)
+        with self._lock:
+            self.calls.append(record)
+            self._count_call(record)
+        return record
+
+    def summary(self):
+        """Aggregate the calls and stages by stage name, in first-seen order."""
+        rows = {}
+
+        def row(name):
+            return rows.setdefault(
+                name,
+                {
+                    "runs": 0,
+                    "stage_seconds": 0.0,
+                    "calls": 0,
+                    "cache_hits": 0,
+                    "errors": 0,
+                    "retries": 0,
+                    "call_seconds": 0.0,
+                    "queue_seconds": 0.0,
+                    "prompt_tokens": 0,
+                    "completion_tokens": 0,
+                    "cached_prompt_tokens": 0,
+                    "cost_usd": 0.0,
+                    "saved_cost_usd": 0.0,
+                },
+            )
+
+        with self._lock:
+            events = sorted(
+                list(self.stages) + list(self.calls), key=lambda e: e["start_time"]
+            )
+        for event in events:
+            totals = row(event["stage"])
+            if event["type"] == "stage":
+                totals["runs"] += 1
+                totals["stage_seconds"] += event["wall_seconds"]
+                continue
+            if event["cache_hit"]:
+                # The tokens of a cached answer were not spent again
+                totals["cache_hits"] += 1
+                totals["saved_cost_usd"] += event["saved_cost_usd"]
+                continue
+            totals["calls"] += 1
+            if event["status"] == "error" or event["status"] >= 400:
+                totals["errors"] += 1
+            for key in (
+                "retries",
+                "queue_seconds",
+                "prompt_tokens",
+                "completion_tokens",
+                "cached_prompt_tokens",
+                "cost_usd",
+            ):
+                totals[key] += event[key]
+            totals["call_seconds"] += event["wall_seconds"]
+        return rows
+
+    def print_profile(self):
+        """Print the per-stage breakdown of time, tokens and cost."""
+        rows = self.summary()
+        if not rows:
+            return
+        print("\n" + "=" * 96)
+        print("PROFILE")
+        print("=" * 96)
+        print(
+            f"{'stage':<20} {'runs':>5} {'stage s':>8} {'calls':>6} {'cached':>7} "
+            f"{'api s':>8} {'queued s':>9} {'prompt tok':>11} {'compl tok':>10} "
+            f"{'cost $':>9}"
+        )
+        total_calls = total_hits = total_errors = total_prompt = total_cached = 0
+        total_cost = saved_cost = 0.0
+        for name, totals in rows.items():
+            print(
+                f"{name[:20]:<20} {totals['runs']:>5} {totals['stage_seconds']:>8.2f} "
+                f"{totals['calls']:>6} {totals['cache_hits']:>7} "
+                f"{totals['call_seconds']:>8.2f} {totals['queue_seconds']:>9.2f} "
+                f"{totals['prompt_tokens']:>11,} {totals['completion_tokens']:>10,} "
+                f"{totals['cost_usd']:>9.4f}"
+            )
+            total_calls += totals["calls"]
+            total_hits += totals["cache_hits"]
+            total_errors += totals["errors"]
+            total_prompt += totals["prompt_tokens"]
+            total_cached += totals["cached_prompt_tokens"]
+            total_cost += totals["cost_usd"]
+            saved_cost += totals["saved_cost_usd"]
+        print("-" * 96)
+        print(
+            f"API calls: {total_calls} ({total_errors} failed), cache hits: {total_hits}, "
+            f"estimated cost: ${total_cost:.4f} (${saved_cost:.4f} saved by the cache)"
+        )
+        if total_cached:
+            print(
+                f"Prompt tokens served from the API's prompt cache: {total_cached:,} "
+                f"of {total_prompt:,} ({total_cached / total_prompt:.0%})"
+            )
+        print(
+            "Stage and API times of concurrent work overlap; "
+            "queued = waiting for the rate limiter or a retry"
+        )
+
+    def _count_call(self, record, sign=1):
+        """Add a call record to (or with ``sign=-1`` remove it from) the counters.
+
+        Called with the lock held.
+        """
+        counters = self._counters
+        labels = (
+            ("stage", record["stage"]),
+            ("endpoint", record["endpoint"]),
+            ("model", record["model"] or ""),
+        )
+        call_labels = labels + (
+            ("cache", "hit" if record["cache_hit"] else "miss"),
+            ("status", str(record["status"] or "")),
+        )
+        _add(counters, "openai_calls_total", call_labels, sign)
+        _add(counters, "openai_retries_total", labels, sign * record["retries"])
+        if not record["cache_hit"]:
+            _add(
+                counters,
+                "openai_call_seconds_sum",
+                labels,
+                sign * record["wall_seconds"],
+            )
+            _add(counters, "openai_call_seconds_count", labels, sign)
+            _add(
+                counters,
+                "openai_queue_seconds_total",
+                labels,
+                sign * record["queue_seconds"],
+            )
+        for kind in ("prompt", "completion"):
+            _add(
+                counters,
+                "openai_tokens_total",
+                labels
+                + (
+                    ("type", kind),
+                    ("cache", "hit" if record["cache_hit"] else "miss"),
+                ),
+                sign * record[f"{kind}_tokens"],
+            )
+        _add(
+            counters,
+            "openai_cached_prompt_tokens_total",
+            labels,
+            sign * record["cached_prompt_tokens"],
+        )
+        _add(counters, "openai_cost_usd_total", labels, sign * record["cost_usd"])
+        _add(
+            counters,
+            "openai_saved_cost_usd_total",
+            labels,
+            sign * record["saved_cost_usd"],
+        )
+
+    def _count_stage(self, span):
+        labels = (("stage", span["stage"]),)
+        _add(self._counters, "pipeline_stage_seconds_sum", labels, span["wall_seconds"])
+        _add(self._counters, "pipeline_stage_seconds_count", labels, 1)
+
+    def prometheus_text(self):
+        """Return the metrics in the Prometheus text exposition format.
+
+        The counters cover every call since the start, also those whose
+        records are no longer kept (see ``keep_last``).
+        """
+        with self._lock:
+            counters = dict(self._counters)
+
+        help_text = {
+            "openai_calls_total": ("counter", "API calls, including cache hits"),
+            "openai_retries_total": ("counter", "Retried attempts of API calls"),
+            "openai_call_seconds": ("summary", "Wall time of API calls"),
+            "openai_queue_seconds_total": (
+                "counter",
+                "Time API calls waited for the rate limiter or a retry backoff",
+            ),
+            "openai_tokens_total": ("counter", "Prompt and completion tokens"),
+            "openai_cached_prompt_tokens_total": (
+                "counter",
+                "Prompt tokens served from the API's prompt cache",
+            ),
+            "openai_cost_usd_total": ("counter", "Estimated cost of API calls in USD"),
+            "openai_saved_cost_usd_total": (
+                "counter",
+                "Estimated cost of the calls answered from the cache in USD",
+            ),
+            "pipeline_stage_seconds": ("summary", "Wall time of pipeline stages"),
+        }
+        lines = []
+        for family, (kind, text) in help_text.items():
+            samples = sorted(
+                (name, labels)
+                for name, labels in counters
+                if name == family or name.rsplit("_", 1)[0] == family
+            )
+            if not samples:
+                continue
+            lines.append(f"# HELP {family} {text}")
+            lines.append(f"# TYPE {family} {kind}")
+            for name, labels in samples:
+                rendered = ",".join(
+                    f'{key}="{_escape(value)}"' for key, value in labels
+                )
+                lines.append(f"{name}{{{rendered}}} {counters[name, labels]:g}")
+        return "\n".join(lines) + "\n"
+
+    def json_lines(self):
+        """Return every stage span and call record as one JSON object per line."""
+        with self._lock:
+            events = sorted(
+                list(self.stages) + list(self.calls), key=lambda e: e["start_time"]
+            )
+        return "".join(json.dumps(event) + "\n" for event in events)
+
+    def otel_trace(self):
+        """Return the stages and calls as an OTLP/JSON trace."""
+        spans = []
+        with self._lock:
+            events = list(self.stages) + list(self.calls)
+        for event in events:
+            start = int(event["start_time"] * 1e9)
+            attributes = {
+                key: value
+                for key, value in event.items()
+                if key not in ("type", "span_id", "parent_span_id", "start_time")
+                and value is not None
+            }
+            span = {
+                "traceId": self.trace_id,
+                "spanId": event["span_id"],
+                "name": (
+                    event["stage"]
+                    if event["type"] == "stage"
+                    else f"POST {event['endpoint']}"
+                ),
+                "kind": 1 if event["type"] == "stage" else 3,  # internal / client
+                "startTimeUnixNano": str(start),
+                "endTimeUnixNano": str(start + int(event["wall_seconds"] * 1e9)),
+                "attributes": [
+                    {"key": key, "value": _otel_value(value)}
+                    for key, value in attributes.items()
+                ],
+            }
+            if event["parent_span_id"]:
+                span["parentSpanId"] = event["parent_span_id"]
+            failed = event.get("error") or (
+                event["type"] == "call"
+                and (event["status"] == "error" or (event["status"] or 0) >= 400)
+            )
+            span["status"] = {"code": 2 if failed else 1}
+            spans.append(span)
+        spans.sort(key=lambda span: int(span["startTimeUnixNano"]))
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {
+                                "key": "service.name",
+                                "value": {"stringValue": self.service_name},
+                            }
+                        ]
+                    },
+                    "scopeSpans": [
+                        {"scope": {"name": "common.metrics"}, "spans": spans}
+                    ],
+                }
+            ]
+        }
+
+    def export(self, path):
+        """Write the metrics to ``path``, in the format given by its extension."""
+        if path.endswith(".prom") or path.endswith(".txt"):
+            content = self.prometheus_text()
+        elif path.endswith(".jsonl"):
+            content = self.json_lines()
+        elif path.endswith(".json"):
+            content = json.dumps(self.otel_trace(), indent=2)
+        else:
+            raise ValueError(
+                f"Unknown metrics format for {path}: use .prom, .jsonl or .json"
+            )
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+
+def _add(counters, name, labels, value):
+    counters[name, labels] = counters.get((name, labels), 0) + value
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _otel_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def add_arguments(parser):
+    """Add the ``--profile`` and ``--metrics`` options to a tool's parser."""
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print a per-stage breakdown of API time, tokens and estimated cost at exit",
+    )
+    parser.add_argument(
+        "--metrics",
+        metavar="FILE",
+        action="append",
+        default=[],
+        help="Write the call metrics at exit: .prom (Prometheus text), .jsonl "
+        "(JSON lines) or .json (OpenTelemetry trace); can be repeated",
+    )
+
+
+def report_at_exit(args):
+    """Print the profile and write the metrics files when the program exits."""
+    if not args.profile and not args.metrics:
+        return
+
+    def report():
+        metrics = get_default_metrics()
+        if args.profile:
+            metrics.print_profile()
+        for path in args.metrics:
+            try:
+                metrics.export(path)
+                print(f"Metrics written to {path}")
+            except (IOError, ValueError) as e:
+                print(f"Error writing metrics: {e}")
+
+    atexit.register(report)
+
+
+_default_metrics = None
+_default_metrics_lock = threading.Lock()
+
+
+def get_default_metrics():
+    """Return the process-wide metrics recorder."""
+    global _default_metrics
+    with _default_metrics_lock:
+        if _default_metrics is None:
+            _default_metrics = MetricsRecorder()
+        return _default_metrics
@@ -0,0 +1,512 @@
+"""Local stand-in for the parts of the OpenAI API used by the tools.
+
+Run it and point a tool at it to try bulk runs, batch jobs or streaming
+without an API key or cost:
+
+    python common/mock_openai_server.py --port 8765
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=test python 9/service_analyzer.py ...
+
+Supported endpoints: ``chat/completions`` (including ``stream``),
+``audio/transcriptions``, ``files`` (upload and content) and ``batches``
+(create and retrieve). Chat replies are canned markdown that echoes the end of
+the last user message; requests with ``functions`` get a call of the first
+function with empty arguments. Transcriptions are filler speech as long as
+the uploaded audio. A batch is processed in a background thread after
+``--batch-delay`` seconds.
+
+A performance profile (``--profile``) makes the server behave like a real
+API under load: a base latency with jitter, prompt processing and token
+generation rates, transcription speed and a rate of injected 429 and 5xx
+errors. The replies are deterministic for a given ``--seed``.
+"""
+
+import io
+import json
+import time
+import uuid
+import wave
+import random
+import argparse
+import threading
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Performance profiles. Rates of 0 mean "instant"; completion_tokens is the
+# length of chat replies (None keeps the short canned reply).
+PROFILES = {
+    "instant": {
+        "latency_ms": 0,
+        "jitter_ms": 0,
+        "prompt_tokens_per_second": 0,
+        "tokens_per_second": 0,
+        "audio_speedup": 0,
+        "error_rate": 0.0,
+        "completion_tokens": None,
+    },
+    "fast": {
+        "latency_ms": 20,
+        "jitter_ms": 5,
+        "prompt_tokens_per_second": 200000,
+        "tokens_per_second": 2000,
+        "audio_speedup": 500,
+        "error_rate": 0.0,
+        "completion_tokens": 200,
+    },
+    "realistic": {
+        "latency_ms": 300,
+        "jitter_ms": 100,
+        "prompt_tokens_per_second": 20000,
+        "tokens_per_second": 100,
+        "audio_speedup": 60,
+        "error_rate": 0.01,
+        "completion_tokens": 400,
+    },
+    "flaky": {
+        "latency_ms": 300,
+        "jitter_ms": 200,
+        "prompt_tokens_per_second": 20000,
+        "tokens_per_second": 100,
+        "audio_speedup": 60,
+        "error_rate": 0.15,
+        "completion_tokens": 400,
+    },
+}
+
+FILLER_SENTENCES = [
+    "The team reviewed the customer onboarding plan for the next quarter.",
+    "We agreed that the delivery schedule needs another review.",
+    "Customer feedback on the mobile app was mostly positive.",
+    "The roadmap includes better reporting and faster search.",
+]
+
+
+def filler_text(words):
+    """Return about ``words`` words of plausible, repetitive prose."""
+    parts = []
+    count = 0
+    while count < words:
+        sentence = FILLER_SENTENCES[len(parts) % len(FILLER_SENTENCES)]
+        parts.append(sentence)
+        count += len(sentence.split())
+    return " ".join(parts)
+
+
+def function_call_message(body):
+    """Return an assistant message calling the request's first function.
+
+    Every argument is null, or an empty list for arrays, which reads as "no
+    filter" / "no match" to the tools.
+    """
+    function = body["functions"][0]
+    properties = function.get("parameters", {}).get("properties", {})
+    arguments = {
+        name: [] if schema.get("type") == "array" else None
+        for name, schema in properties.items()
+    }
+    return {
+        "role": "assistant",
+        "content": None,
+        "function_call": {"name": function["name"], "arguments": json.dumps(arguments)},
+    }
+
+
+def chat_reply(body, completion_tokens=None):
+    """Return a canned chat completion for a request body.
+
+    With ``completion_tokens`` the reply is padded with filler prose to about
+    that many tokens (at most the request's ``max_tokens``).
+    """
+    messages = body.get("messages") or [{}]
+    content = (messages[-1].get("content") or "").strip()
+    text = f"# Mock Report\n\nGenerated for: {' '.join(content.split())[-80:]}\n"
+    if completion_tokens:
+        target = min(completion_tokens, body.get("max_tokens") or completion_tokens)
+        text += "\n" + filler_text(max(target - len(text) // 4, 0) * 3 // 4) + "\n"
+    message = {"role": "assistant", "content": text}
+    if body.get("functions"):
+        message = function_call_message(body)
+        text = message["function_call"]["arguments"]
+    prompt_tokens = sum(len(m.get("content") or "") for m in messages) // 4
+    prompt_tokens += len(json.dumps(body.get("functions") or [])) // 4
+    completion_tokens = len(text) // 4
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "mock"),
+        "choices": [
+            {
+                "index": 0,
+                "message": message,
+                "finish_reason": "function_call" if body.get("functions") else "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def audio_duration(audio_bytes):
+    """Return the duration of an uploaded recording in seconds.
+
+    WAV files are measured exactly; anything else is assumed to be a 128 kbps
+    MP3.
+    """
+    try:
+        with wave.open(io.BytesIO(audio_bytes)) as wav:
+            return wav.getnframes() / float(wav.getframerate())
+    except (wave.Error, EOFError):
+        return len(audio_bytes) * 8 / 128000
+
+
+def transcription_reply(audio_bytes):
+    """Return a verbose_json transcription of filler speech at 150 words/minute."""
+    duration = audio_duration(audio_bytes)
+    segments = []
+    start = 0.0
+    while start < duration:
+        end = min(start + 10.0, duration)
+        segments.append(
+            {"start": start, "end": end, "text": filler_text((end - start) * 2.5)}
+        )
+        start = end
+    return {
+        "text": " ".join(segment["text"] for segment in segments),
+        "duration": duration,
+        "segments": segments,
+    }
+
+
+class MockState:
+    """Uploaded files, batch jobs and the performance profile, shared by all
+    request handlers."""
+
+    def __init__(self, batch_delay=1.0, profile=None, seed=0):
+        self.batch_delay = batch_delay
+        self.profile = dict(PROFILES["instant"], **(profile or {}))
+        self.files = {}
+        self.batches = {}
+        self.lock = threading.Lock()
+        self.random = random.Random(seed)
+        self.counters = {"requests": 0, "errors_injected": 0}
+
+    def _uniform(self, low, high):
+        with self.lock:
+            return self.random.uniform(low, high)
+
+    def injected_error(self):
+        """Return the status code of an error to inject, or None."""
+        with self.lock:
+            self.counters["requests"] += 1
+            if self.random.random() >= self.profile["error_rate"]:
+                return None
+            self.counters["errors_injected"] += 1
+            return self.random.choice([429, 429, 500, 503])
+
+    def latency(self):
+        """Seconds before the first byte of a response."""
+        profile = self.profile
+        jitter = self._uniform(-profile["jitter_ms"], profile["jitter_ms"])
+        return max(profile["latency_ms"] + jitter, 0) / 1000
+
+    def chat_delay(self, prompt_tokens, completion_tokens):
+        """Seconds to process a prompt and generate a completion, after the latency."""
+        profile = self.profile
+        seconds = 0.0
+        if profile["prompt_tokens_per_second"]:
+            seconds += prompt_tokens / profile["prompt_tokens_per_second"]
+        return seconds + self.token_delay(completion_tokens)
+
+    def token_delay(self, tokens):
+        rate = self.profile["tokens_per_second"]
+        return tokens / rate if rate else 0.0
+
+    def audio_delay(self, duration):
+        speedup = self.profile["audio_speedup"]
+        return duration / speedup if speedup else 0.0
+
+    def add_file(self, content, purpose):
+        file_id = f"file-{uuid.uuid4().hex[:12]}"
+        with self.lock:
+            self.files[file_id] = content
+        return {
+            "id": file_id,
+            "object": "file",
+            "bytes": len(content),
+            "purpose": purpose,
+        }
+
+    def create_batch(self, request):
+        batch_id = f"batch_{uuid.uuid4().hex[:12]}"
+        batch = {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": request.get("endpoint"),
+            "input_file_id": request.get("input_file_id"),
+            "status": "validating",
+            "created_at": int(time.time()),
+            "output_file_id": None,
+            "error_file_id": None,
+            "request_counts": {"total": 0, "completed": 0, "failed": 0},
+            "metadata": request.get("metadata") or {},
+        }
+        with self.lock:
+            self.batches[batch_id] = batch
+        threading.Thread(target=self._run_batch, args=(batch_id,), daemon=True).start()
+        return batch
+
+    def _run_batch(self, batch_id):
+        batch = self.batches[batch_id]
+        lines = self.files.get(batch["input_file_id"], b"").decode().splitlines()
+        requests_ = [json.loads(line) for line in lines if line.strip()]
+        with self.lock:
+            batch["status"] = "in_progress"
+            batch["request_counts"]["total"] = len(requests_)
+        time.sleep(self.batch_delay)
+
+        output = []
+        for request in requests_:
+            output.append(
+                {
+                    "id": f"batch_req_{uuid.uuid4().hex[:12]}",
+                    "custom_id": request["custom_id"],
+                    "response": {
+                        "status_code": 200,
+                        "body": chat_reply(
+                            request["body"], self.profile["completion_tokens"]
+                        ),
+                    },
+                    "error": None,
+                }
+            )
+        content = "\n".join(json.dumps(line) for line in output).encode()
+        output_file = self.add_file(content, "batch_output")
+        with self.lock:
+            batch["request_counts"]["completed"] = len(output)
+            batch["output_file_id"] = output_file["id"]
+            batch["status"] = "completed"
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state = None  # set by make_server
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, body, status=200):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status, message, headers=None):
+        data = json.dumps({"error": {"message": message, "type": "mock_error"}})
+        data = data.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _inject_error(self):
+        """Answer with an injected error per the profile; True if it did."""
+        status = self.state.injected_error()
+        if status is None:
+            return False
+        if status == 429:
+            self._send_error(
+                429, "Rate limit reached (injected)", {"retry-after-ms": "200"}
+            )
+        else:
+            self._send_error(status, "Server error (injected)")
+        return True
+
+    def _read_body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def _form_fields(self, raw):
+        """Parse a multipart/form-data body into {name: bytes}."""
+        header = f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode()
+        message = BytesParser(policy=default_policy).parsebytes(header + raw)
+        fields = {}
+        for part in message.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            fields[name] = part.get_payload(decode=True)
+        return fields
+
+    def _stream_chat(self, body):
+        reply = chat_reply(body, self.state.profile["completion_tokens"])
+        time.sleep(
+            self.state.latency()
+            + self.state.chat_delay(reply["usage"]["prompt_tokens"], 0)
+        )
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def send_event(payload):
+            data = f"data: {payload}\n\n".encode()
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+
+        for word in reply["choices"][0]["message"]["content"].split(" "):
+            # Tokens are generated at the profile's rate, about a word each
+            time.sleep(self.state.token_delay(1))
+            delta = {"choices": [{"index": 0, "delta": {"content": word + " "}}]}
+            send_event(json.dumps(delta))
+        finish = {"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+        send_event(json.dumps(finish))
+        if (body.get("stream_options") or {}).get("include_usage"):
+            send_event(json.dumps({"choices": [], "usage": reply["usage"]}))
+        send_event("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def do_POST(self):
+        path = self.path.split("?")[0].rstrip("/")
+        raw = self._read_body()
+
+        if path.endswith("/chat/completions"):
+            if self._inject_error():
+                return
+            body = json.loads(raw or b"{}")
+            if body.get("stream"):
+                self._stream_chat(body)
+                return
+            reply = chat_reply(body, self.state.profile["completion_tokens"])
+            usage = reply["usage"]
+            time.sleep(
+                self.state.latency()
+                + self.state.chat_delay(
+                    usage["prompt_tokens"], usage["completion_tokens"]
+                )
+            )
+            self._send_json(reply)
+        elif path.endswith("/audio/transcriptions"):
+            if self._inject_error():
+                return
+            fields = self._form_fields(raw)
+            reply = transcription_reply(fields.get("file") or b"")
+            time.sleep(self.state.latency() + self.state.audio_delay(reply["duration"]))
+            self._send_json(reply)
+        elif path.endswith("/files"):
+            fields = self._form_fields(raw)
+            if "file" not in fields:
+                self._send_error(400, "missing file")
+                return
+            purpose = (fields.get("purpose") or b"").decode()
+            self._send_json(self.state.add_file(fields["file"], purpose))
+        elif path.endswith("/batches"):
+            request = json.loads(raw or b"{}")
+            if request.get("input_file_id") not in self.state.files:
+                self._send_error(400, "unknown input_file_id")
+                return
+            self._send_json(self.state.create_batch(request))
+        else:
+            self._send_error(404, f"unknown path {self.path}")
+
+    def do_GET(self):
+        parts = self.path.split("?")[0].strip("/").split("/")
+        if len(parts) >= 3 and parts[-3] == "files" and parts[-1] == "content":
+            content = self.state.files.get(parts[-2])
+            if content is None:
+                self._send_error(404, "file not found")
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+        elif len(parts) >= 2 and parts[-2] == "batches":
+            with self.state.lock:
+                batch = self.state.batches.get(parts[-1])
+                batch = json.loads(json.dumps(batch)) if batch else None
+            if batch is None:
+                self._send_error(404, "batch not found")
+                return
+            self._send_json(batch)
+        else:
+            self._send_error(404, f"unknown path {self.path}")
+
+
+def make_server(host="127.0.0.1", port=8765, batch_delay=1.0, profile=None, seed=0):
+    """Create the mock server; call ``serve_forever`` on it to run it.
+
+    ``profile`` is the name of one of the ``PROFILES`` or a dict overriding
+    some of their settings. The handlers' ``MockState`` is available as
+    ``server.state``.
+    """
+    if isinstance(profile, str):
+        profile = PROFILES[profile]
+    state = MockState(batch_delay, profile, seed)
+    handler = type("Handler", (MockHandler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.state = state
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the OpenAI API")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument(
+        "--batch-delay",
+        type=float,
+        default=1.0,
+        help="Seconds a batch job stays in progress (default: 1)",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=sorted(PROFILES),
+        default="instant",
+        help="Latency, throughput and error profile (default: instant)",
+    )
+    parser.add_argument(
+        "--latency-ms", type=float, help="Override the profile's base latency"
+    )
+    parser.add_argument(
+        "--tokens-per-second",
+        type=float,
+        help="Override the profile's completion token rate (0 = instant)",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        help="Override the profile's share of requests answered with 429/5xx",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="Seed of the jitter and errors"
+    )
+    args = parser.parse_args()
+
+    profile = dict(PROFILES[args.profile])
+    overrides = {
+        "latency_ms": args.latency_ms,
+        "tokens_per_second": args.tokens_per_second,
+        "error_rate": args.error_rate,
+    }
+    profile.update({k: v for k, v in overrides.items() if v is not None})
+
+    server = make_server(args.host, args.port, args.batch_delay, profile, args.seed)
+    print(
+        f"Mock OpenAI API listening on http://{args.host}:{args.port}/v1 "
+        f"(profile: {args.profile})"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
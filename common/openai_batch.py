@@ -0,0 +1,92 @@
+"""Offline jobs with the OpenAI Batch API.
+
+A batch job is a JSON Lines file of requests that is uploaded once and
+processed by the API within the completion window (at half the price of
+regular requests and outside the per-minute rate limits). ``submit_batch``
+uploads the requests and creates the job, ``wait_for_batch`` polls it until
+it finishes and ``download_results`` collects the responses by ``custom_id``.
+
+All functions take an ``ApiClient`` and raise ``requests`` exceptions on HTTP
+errors, like the client itself.
+"""
+
+import json
+import time
+
+CHAT_COMPLETIONS_URL = "/v1/chat/completions"
+MAX_BATCH_REQUESTS = 50000  # API limit on the number of requests in one batch
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def submit_batch(client, requests_by_id, url=CHAT_COMPLETIONS_URL, metadata=None):
+    """Upload ``{custom_id: request body}`` as a batch job and return the job.
+
+    The returned dict is the API's batch object, with the job ``id`` and
+    its ``status``.
+    """
+    lines = [
+        json.dumps({"custom_id": custom_id, "method": "POST", "url": url, "body": body})
+        for custom_id, body in requests_by_id.items()
+    ]
+    upload = client.post(
+        "files",
+        files={"file": ("batch.jsonl", "\n".join(lines).encode("utf-8"))},
+        data={"purpose": "batch"},
+    )
+    upload.raise_for_status()
+
+    response = client.post(
+        "batches",
+        json={
+            "input_file_id": upload.json()["id"],
+            "endpoint": url,
+            "completion_window": "24h",
+            "metadata": metadata or {},
+        },
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def wait_for_batch(client, batch_id, poll_interval=10.0, on_update=None):
+    """Poll a batch job until it reaches a terminal status and return it.
+
+    ``on_update`` is called with the batch object after every poll, e.g. to
+    report progress from ``batch["request_counts"]``.
+    """
+    while True:
+        response = client.get(f"batches/{batch_id}")
+        response.raise_for_status()
+        batch = response.json()
+        if on_update is not None:
+            on_update(batch)
+        if batch["status"] in TERMINAL_STATUSES:
+            return batch
+        time.sleep(poll_interval)
+
+
+def _read_jsonl_file(client, file_id):
+    response = client.get(f"files/{file_id}/content")
+    response.raise_for_status()
+    return [json.loads(line) for line in response.text.splitlines() if line.strip()]
+
+
+def download_results(client, batch):
+    """Return ``{custom_id: (response body, error)}`` for a finished batch.
+
+    Exactly one of the two is None for every request in the batch's output
+    and error files.
+    """
+    results = {}
+    for file_key in ("output_file_id", "error_file_id"):
+        file_id = batch.get(file_key)
+        if not file_id:
+            continue
+        for line in _read_jsonl_file(client, file_id):
+            response = line.get("response") or {}
+            if line.get("error") is None and response.get("status_code") == 200:
+                results[line["custom_id"]] = (response["body"], None)
+            else:
+                error = line.get("error") or response.get("body", {}).get("error")
+                results[line["custom_id"]] = (None, error or "unknown error")
+    return results
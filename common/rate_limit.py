@@ -0,0 +1,112 @@
+"""Client-side rate limiting for API calls.
+
+``RateLimiter`` keeps two token buckets, one for requests per minute and one
+for tokens per minute, that refill continuously. ``acquire`` blocks until both
+buckets can cover the call, so many concurrent workers together stay under
+the account's limits instead of running into 429 responses. ``pause`` holds
+every caller back for a while, e.g. when the API asks to retry later.
+"""
+
+import time
+import asyncio
+import threading
+
+
+def estimate_tokens(payload):
+    """Roughly estimate the tokens a chat completion request will use.
+
+    Counts about four characters per prompt token plus the completion budget
+    (``max_tokens``), which is what the API reserves against the limit.
+    """
+    characters = sum(
+        len(message.get("content") or "") for message in payload.get("messages", [])
+    )
+    return characters // 4 + payload.get("max_tokens", 0)
+
+
+class TokenBucket:
+    """Bucket of ``capacity`` units that refills at ``capacity`` per minute."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.available = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        elapsed = now - self.updated
+        self.available = min(self.capacity, self.available + elapsed * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        """Seconds until ``amount`` units are available (0 if they are now)."""
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / self.rate
+
+    def take(self, amount):
+        self.available -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """Blocking limiter for requests per minute and tokens per minute.
+
+    Either limit can be None to leave that dimension unlimited.
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None):
+        self.requests = (
+            TokenBucket(requests_per_minute) if requests_per_minute else None
+        )
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self.waited_seconds = 0.0
+
+    def pause(self, seconds):
+        """Make every ``acquire`` wait until ``seconds`` from now."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _try_acquire(self, tokens, waited):
+        """Take one request and ``tokens`` tokens, or return the delay to wait."""
+        with self._lock:
+            now = time.monotonic()
+            delay = max(0.0, self._paused_until - now)
+            if self.requests is not None:
+                self.requests.refill(now)
+                delay = max(delay, self.requests.wait_time(1))
+            if self.tokens is not None:
+                self.tokens.refill(now)
+                delay = max(delay, self.tokens.wait_time(tokens))
+            if delay == 0.0:
+                if self.requests is not None:
+                    self.requests.take(1)
+                if self.tokens is not None:
+                    self.tokens.take(tokens)
+                self.waited_seconds += waited
+            return delay
+
+    def acquire(self, tokens=0):
+        """Block until one request and ``tokens`` tokens fit in the limits.
+
+        Returns the number of seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            delay = self._try_acquire(tokens, waited)
+            if delay == 0.0:
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+    async def acquire_async(self, tokens=0):
+        """Like ``acquire``, but waits without blocking the event loop."""
+        waited = 0.0
+        while True:
+            delay = self._try_acquire(tokens, waited)
+            if delay == 0.0:
+                return waited
+            await asyncio.sleep(delay)
+            waited += delay
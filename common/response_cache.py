@@ -0,0 +1,216 @@
+"""Persistent, content-addressed cache for OpenAI API responses.
+
+Responses are keyed by the SHA-256 of the canonical JSON request payload
+(model, messages, temperature, function schema, ...), so identical requests
+share one entry no matter which tool sends them. Lookups go through a small
+in-memory LRU first and a SQLite file second. Entries expire after a TTL, and
+the SQLite tier is trimmed to a maximum number of entries and bytes, least
+recently used first.
+
+The default cache is configured through environment variables:
+
+- ``OPENAI_CACHE_DISABLED=1`` turns caching off
+- ``OPENAI_CACHE_PATH`` sets the SQLite file (default under ``~/.cache``)
+- ``OPENAI_CACHE_TTL`` sets the time to live in seconds (default one week)
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "edu-ai-challenge", "responses.sqlite"
+)
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+
+
+def make_cache_key(payload, endpoint="chat/completions"):
+    """Return the content address of a request payload sent to ``endpoint``."""
+    canonical = json.dumps(
+        {"endpoint": endpoint, "payload": payload},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """Return the SHA-256 hex digest of a file, for keying uploads."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """Two-tier (memory LRU + SQLite) cache of JSON API responses."""
+
+    def __init__(
+        self,
+        path=DEFAULT_CACHE_PATH,
+        ttl_seconds=DEFAULT_TTL_SECONDS,
+        max_memory_entries=256,
+        max_disk_entries=10000,
+        max_disk_bytes=256 * 1024 * 1024,
+        enabled=True,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.enabled = enabled
+
+        self._memory = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._db = None
+        self.counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+        }
+
+        if enabled and path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS responses_last_access "
+                "ON responses (last_access)"
+            )
+            self._db.commit()
+
+    def get(self, key):
+        """Return the cached response for ``key``, or None on a miss."""
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.counters["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    text, expires_at = row
+                    if expires_at > now:
+                        self._db.execute(
+                            "UPDATE responses SET last_access = ? WHERE key = ?",
+                            (now, key),
+                        )
+                        self._db.commit()
+                        value = json.loads(text)
+                        self._remember(key, expires_at, value)
+                        self.counters["disk_hits"] += 1
+                        return value
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self.counters["misses"] += 1
+            return None
+
+    def set(self, key, value):
+        """Store a JSON-serializable response under ``key``."""
+        if not self.enabled:
+            return
+
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        with self._lock:
+            self._remember(key, expires_at, value)
+            self.counters["stores"] += 1
+            if self._db is not None:
+                text = json.dumps(value, ensure_ascii=False)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses "
+                    "(key, value, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                    (key, text, len(text), expires_at, now),
+                )
+                self._evict(now)
+                self._db.commit()
+
+    def _remember(self, key, expires_at, value):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self, now):
+        """Drop expired entries, then the least recently used ones over the limits."""
+        deleted = self._db.execute(
+            "DELETE FROM responses WHERE expires_at <= ?", (now,)
+        ).rowcount
+        count, size = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if count <= self.max_disk_entries and size <= self.max_disk_bytes:
+            self.counters["evictions"] += deleted
+            return
+
+        victims = []
+        rows = self._db.execute("SELECT key, size FROM responses ORDER BY last_access")
+        for key, entry_size in rows:
+            if count <= self.max_disk_entries and size <= self.max_disk_bytes:
+                break
+            victims.append((key,))
+            count -= 1
+            size -= entry_size
+        if victims:
+            self._db.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self.counters["evictions"] += deleted + len(victims)
+
+    def clear(self):
+        """Remove every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def stats(self):
+        """Return the hit/miss counters and the hit rate."""
+        hits = self.counters["memory_hits"] + self.counters["disk_hits"]
+        lookups = hits + self.counters["misses"]
+        return {
+            **self.counters,
+            "hits": hits,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    """Return the process-wide cache configured from the environment."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache(
+                path=os.getenv("OPENAI_CACHE_PATH", DEFAULT_CACHE_PATH),
+                ttl_seconds=float(os.getenv("OPENAI_CACHE_TTL", DEFAULT_TTL_SECONDS)),
+                enabled=os.getenv("OPENAI_CACHE_DISABLED", "").lower()
+                not in ("1", "true", "yes"),
+            )
+        return _default_cache
@@ -0,0 +1,370 @@
+"""Retrying, rate-limited scheduler in front of the API client.
+
+``ApiScheduler`` has the same ``post``/``get`` interface as ``ApiClient`` and
+adds what every caller needs under load:
+
+- a ``RateLimiter`` (requests and tokens per minute) that every call
+  acquires before it is sent, shared by all threads that use the scheduler
+- retries of 429 and 5xx responses, timeouts and connection errors, with
+  jittered exponential backoff. A ``Retry-After`` header is honored and, on a
+  429, pauses the whole limiter so that concurrent workers back off together
+  instead of stampeding
+- a circuit breaker: after several consecutive calls have failed (each
+  after using up its retries), new calls fail fast with ``CircuitOpenError``
+  for a cool-down period, then one trial call decides whether to close it
+  again
+
+Responses that are still unsuccessful after the last retry are returned as
+they are, so callers keep their own error handling. ``apost`` is the asyncio
+variant of ``post``: it sends through ``AsyncApiClient`` (HTTP/2 with
+``httpx[http2]``) under the same limiter, retries and breaker. The default scheduler is
+configured through environment variables:
+
+- ``OPENAI_RPM`` / ``OPENAI_TPM``: requests and tokens per minute (unlimited)
+- ``OPENAI_MAX_RETRIES``: retries per call (default 5)
+
+Every call is recorded in the ``MetricsRecorder`` (see ``common/metrics.py``)
+with its wall time, the time it spent queued and its token usage.
+"""
+
+import os
+import time
+import asyncio
+import random
+import threading
+
+import requests
+
+from common.http_client import create_async_client, get_default_client
+from common.metrics import get_default_metrics
+from common.rate_limit import RateLimiter, estimate_tokens
+
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+DEFAULT_MAX_RETRIES = 5
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of calling the API while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failed calls.
+
+    Failures are counted per call outcome, not per attempt, so the retries of
+    one call cannot open the circuit on their own and cut its retry budget
+    short. While open, ``before_call`` raises ``CircuitOpenError``. After
+    ``reset_seconds`` one trial call is let through (half-open): success
+    closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_seconds=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.times_opened = 0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            remaining = self.opened_at + self.reset_seconds - time.monotonic()
+            if remaining > 0 or self.trial_running:
+                raise CircuitOpenError(
+                    f"API circuit breaker is open after {self.failures} consecutive "
+                    f"failed calls; retry in {max(remaining, 0):.0f}s"
+                )
+            self.trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.trial_running or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self.trial_running:
+                    self.times_opened += 1
+                self.opened_at = time.monotonic()
+                self.trial_running = False
+
+
+def retry_after_seconds(response):
+    """Return the delay requested by a response's headers, or None."""
+    headers = response.headers or {}
+    value = headers.get("retry-after-ms")
+    if value is not None:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value is not None:
+        try:
+            return float(value)
+        except ValueError:
+            pass  # an HTTP date; fall back to the backoff
+    return None
+
+
+class ApiScheduler:
+    """Send API calls through a rate limiter, retries and a circuit breaker."""
+
+    def __init__(
+        self,
+        client,
+        rate_limiter=None,
+        max_retries=DEFAULT_MAX_RETRIES,
+        base_delay=0.5,
+        max_delay=60.0,
+        breaker=None,
+        metrics=None,
+    ):
+        self.client = client
+        self.async_client = None
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker or CircuitBreaker()
+        self.metrics = metrics or get_default_metrics()
+        self._lock = threading.Lock()
+        self.counters = {"calls": 0, "retries": 0, "throttled": 0, "failures": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def backoff(self, attempt):
+        """Full-jitter exponential backoff for the given retry attempt."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def post(
+        self,
+        path,
+        json=None,
+        files=None,
+        data=None,
+        timeout=None,
+        stream=False,
+        tokens=None,
+    ):
+        """POST like ``ApiClient.post``, with rate limiting and retries.
+
+        ``tokens`` is the number of tokens to reserve against the tokens per
+        minute limit; it is estimated from a chat payload by default.
+
+        The metrics record of the call is attached to the response as
+        ``call_record``; for a streamed response, pass it to
+        ``MetricsRecorder.finish_stream`` when the stream ends.
+        """
+        if tokens is None:
+            tokens = estimate_tokens(json) if isinstance(json, dict) else 0
+        model = (json if isinstance(json, dict) else data or {}).get("model")
+        return self._send(
+            lambda: self.client.post(
+                path, json=json, files=files, data=data, timeout=timeout, stream=stream
+            ),
+            tokens,
+            path,
+            model,
+            stream,
+        )
+
+    def get(self, path, timeout=None):
+        """GET like ``ApiClient.get``, with rate limiting and retries."""
+        return self._send(lambda: self.client.get(path, timeout=timeout), 0, path)
+
+    async def apost(self, path, json=None, timeout=None, tokens=None):
+        """POST like ``post`` through ``AsyncApiClient``, for asyncio callers.
+
+        Uses the same limiter, retries, circuit breaker and metrics as
+        ``post``, but waits with ``asyncio.sleep`` instead of blocking the
+        event loop. The async client is created on first use.
+        """
+        if tokens is None:
+            tokens = estimate_tokens(json) if isinstance(json, dict) else 0
+        model = (json or {}).get("model") if isinstance(json, dict) else None
+        if self.async_client is None:
+            self.async_client = create_async_client()
+        client = self.async_client
+
+        self._count("calls")
+        timing = {"queue_seconds": 0.0, "retries": 0}
+        start_time = time.time()
+        started = time.perf_counter()
+        response = None
+        try:
+            self.breaker.before_call()
+            attempt = 0
+            while True:
+                timing["queue_seconds"] += await self.rate_limiter.acquire_async(tokens)
+                try:
+                    response = await client.post(path, json=json, timeout=timeout)
+                except (
+                    requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout,
+                ):
+                    delay = self._error_delay(attempt)
+                    if delay is None:
+                        raise
+                except Exception:
+                    self.breaker.record_failure()
+                    raise
+                else:
+                    delay = self._retry_delay(response, attempt)
+                    if delay is None:
+                        return response
+                    response = None
+                attempt += 1
+                timing["retries"] += 1
+                await asyncio.sleep(delay)
+                timing["queue_seconds"] += delay
+        finally:
+            self._record(path, model, start_time, started, timing, response, False)
+
+    def _send(self, call, tokens, path, model=None, stream=False):
+        self._count("calls")
+        timing = {"queue_seconds": 0.0, "retries": 0}
+        start_time = time.time()
+        started = time.perf_counter()
+        response = None
+        try:
+            response = self._send_with_retries(call, tokens, timing)
+            return response
+        finally:
+            self._record(path, model, start_time, started, timing, response, stream)
+
+    def _record(self, path, model, start_time, started, timing, response, stream):
+        record = self.metrics.record_call(
+            path,
+            model,
+            start_time,
+            time.perf_counter() - started,
+            queue_seconds=timing["queue_seconds"],
+            retries=timing["retries"],
+            response=response,
+            stream=stream,
+        )
+        if response is not None:
+            response.call_record = record
+
+    def _send_with_retries(self, call, tokens, timing):
+        # Only a new call is stopped by an open circuit; the breaker learns
+        # the outcome of the call once it has succeeded or used up its retries
+        self.breaker.before_call()
+        attempt = 0
+        while True:
+            timing["queue_seconds"] += self.rate_limiter.acquire(tokens)
+
+            try:
+                response = call()
+            except (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout,
+            ):
+                delay = self._error_delay(attempt)
+                if delay is None:
+                    raise
+            except Exception:
+                self.breaker.record_failure()
+                raise
+            else:
+                delay = self._retry_delay(response, attempt)
+                if delay is None:
+                    return response
+
+            timing["retries"] += 1
+            attempt += 1
+            time.sleep(delay)
+            timing["queue_seconds"] += delay
+
+    def _error_delay(self, attempt):
+        """Return the delay before retrying a failed connection, or None."""
+        if attempt >= self.max_retries:
+            self.breaker.record_failure()
+            self._count("failures")
+            return None
+        self._count("retries")
+        return self.backoff(attempt)
+
+    def _retry_delay(self, response, attempt):
+        """Return the delay before retrying ``response``, or None if it is final."""
+        if response.status_code not in RETRY_STATUSES:
+            # Client errors such as 400/401 are the caller's problem, not a
+            # sign that the API is unhealthy
+            self.breaker.record_success()
+            return None
+
+        if attempt >= self.max_retries:
+            if response.status_code == 429:
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+            self._count("failures")
+            return None
+
+        retry_after = retry_after_seconds(response)
+        delay = self.backoff(attempt)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        if response.status_code == 429:
+            # Being throttled is not an outage: instead of tripping the
+            # breaker, hold back every caller of the limiter, which the
+            # retry then waits for as well
+            self._count("throttled")
+            self.rate_limiter.pause(delay)
+            delay = 0.0
+        response.close()
+        self._count("retries")
+        return delay
+
+    def close(self):
+        self.client.close()
+
+    async def aclose(self):
+        """Close the async client, if ``apost`` has created one."""
+        if self.async_client is not None:
+            await self.async_client.close()
+            self.async_client = None
+
+
+def create_scheduler(rate_limiter=None):
+    """Return a scheduler with its own ``rate_limiter``, or the default one."""
+    if rate_limiter is None:
+        return get_default_scheduler()
+    return ApiScheduler(
+        get_default_client(),
+        rate_limiter=rate_limiter,
+        max_retries=int(os.getenv("OPENAI_MAX_RETRIES", DEFAULT_MAX_RETRIES)),
+    )
+
+
+_default_scheduler = None
+_default_scheduler_lock = threading.Lock()
+
+
+def _optional_int(name):
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+def get_default_scheduler():
+    """Return the process-wide scheduler around the default pooled client."""
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = ApiScheduler(
+                get_default_client(),
+                rate_limiter=RateLimiter(
+                    requests_per_minute=_optional_int("OPENAI_RPM"),
+                    tokens_per_minute=_optional_int("OPENAI_TPM"),
+                ),
+                max_retries=int(os.getenv("OPENAI_MAX_RETRIES", DEFAULT_MAX_RETRIES)),
+            )
+        return _default_scheduler
@@ -0,0 +1,674 @@
+#!/usr/bin/env python3
+"""
+Long-running HTTP service exposing the Service Analyzer (task 9), the
+Product Search Tool (task 10) and the Audio Analyzer (task 11).
+
+The server loads everything once at start-up and keeps it warm between
+requests: the environment, the product catalog and its indexes, the
+response cache and the pooled HTTP connections to the API. It runs on
+asyncio; the search and audio tools are blocking, so each request runs them
+on a thread pool while the event loop keeps serving other connections.
+``/analyze-service`` calls the API from the event loop itself through the
+scheduler's ``apost`` and ``AsyncApiClient`` (HTTP/2 when ``httpx[http2]``
+is installed).
+
+Endpoints (JSON in, JSON out):
+
+- ``POST /search`` ``{"query": "...", "mode": "catalog"}``: one page of
+  ranked matching products, with a cursor for the next page
+- ``POST /analyze-service`` ``{"service": "..."}``: a markdown report
+- ``POST /audio/jobs``: upload a recording (raw body with ``?filename=`` or
+  multipart ``file`` field); returns a job id at once, the job is processed
+  by a background queue
+- ``GET /audio/jobs/<id>``: status and, when done, the results of a job
+- ``GET /audio/jobs``: all jobs since the server started
+- ``GET /health`` and ``GET /metrics`` (Prometheus text)
+
+Simple search queries are parsed locally by the query router and answered
+from the catalog without an API call. Identical requests that arrive while
+the same query is being processed are coalesced: they wait for the one running computation instead of starting
+their own. Uploads of a recording that is already queued or running return
+the existing job.
+
+Usage:
+    python server/tool_server.py --port 8000
+    curl -s localhost:8000/search -d '{"query": "electronics under $200"}'
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+import argparse
+import threading
+from http import HTTPStatus
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from urllib.parse import parse_qs, urlsplit
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+for folder in ("9", "10", "11"):
+    sys.path.insert(0, os.path.join(ROOT, folder))
+
+from common.http_client import get_default_client
+from common.metrics import get_default_metrics
+from common.scheduler import get_default_scheduler
+from common.response_cache import get_default_cache
+
+from product_search import (
+    SEARCH_MODES,
+    load_products,
+    matching_rows,
+    search_rows,
+    search_rows_semantic,
+    search_rows_with_filters,
+)
+from catalog_watch import LiveCatalog
+from query_router import QueryRouter
+from ranking import DEFAULT_PAGE_SIZE, SORT_ORDERS, get_page
+from semantic_index import SemanticIndex, changed_rows, load_index
+from service_analyzer import generate_analysis_report_async
+from audio_analyzer import AudioAnalyzer
+
+MAX_HEADER_LINES = 100
+# Call records kept in memory; the counters served at /metrics cover every call
+METRICS_RECORDS_KEPT = 10000
+# Largest page of /search results
+MAX_PAGE_SIZE = 100
+
+Request = namedtuple("Request", ["method", "path", "query", "headers", "body"])
+
+
+class HttpError(Exception):
+    """An error answered with ``status`` and a JSON ``{"error": message}`` body."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+async def read_request(reader, max_body_bytes):
+    """Read one HTTP/1.1 request, or return None when the client closed."""
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    try:
+        method, target, _ = line.decode("latin-1").split()
+    except ValueError:
+        raise HttpError(400, "Malformed request line")
+
+    headers = {}
+    for _ in range(MAX_HEADER_LINES):
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise HttpError(431, "Too many request headers")
+
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        raise HttpError(411, "Chunked request bodies are not supported")
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise HttpError(400, "Invalid Content-Length")
+    if length > max_body_bytes:
+        raise HttpError(413, f"Request body larger than {max_body_bytes} bytes")
+    body = await reader.readexactly(length) if length else b""
+
+    url = urlsplit(target)
+    query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+    return Request(method.upper(), url.path.rstrip("/") or "/", query, headers, body)
+
+
+def encode_response(status, body, content_type="application/json", keep_alive=True):
+    """Return the bytes of an HTTP/1.1 response."""
+    if not isinstance(body, bytes):
+        body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+def json_body(request):
+    """Parse the JSON object in a request body."""
+    try:
+        payload = json.loads(request.body or b"{}")
+    except ValueError:
+        raise HttpError(400, "Request body is not valid JSON")
+    if not isinstance(payload, dict):
+        raise HttpError(400, "Request body must be a JSON object")
+    return payload
+
+
+def required_text(payload, field):
+    value = payload.get(field)
+    if not isinstance(value, str) or not value.strip():
+        raise HttpError(400, f"'{field}' must be a non-empty string")
+    return value
+
+
+def uploaded_audio(request):
+    """Return (filename, bytes) of the recording in an upload request."""
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        header = f"Content-Type: {content_type}\r\n\r\n".encode("latin-1")
+        message = BytesParser(policy=default_policy).parsebytes(header + request.body)
+        for part in message.iter_parts():
+            if part.get_param("name", header="content-disposition") == "file":
+                return part.get_filename() or "audio.mp3", part.get_payload(decode=True)
+        raise HttpError(400, "Multipart upload without a 'file' field")
+    if not request.body:
+        raise HttpError(400, "Upload the recording as the request body")
+    return request.query.get("filename") or "audio.mp3", request.body
+
+
+class ToolServer:
+    """Warm state of the three tools, served over HTTP."""
+
+    def __init__(
+        self,
+        catalog_path="products.json",
+        search_mode="catalog",
+        workers=16,
+        audio_workers=2,
+        jobs_dir="audio_jobs",
+        max_upload_bytes=100 * 1024 * 1024,
+        use_router=True,
+        watch_catalog=False,
+        catalog_changes=None,
+        watch_interval=1.0,
+        preprocess_audio=False,
+    ):
+        self.catalog_path = catalog_path
+        self.search_mode = search_mode
+        self.use_router = use_router
+        self.watch_catalog = watch_catalog
+        self.catalog_changes = catalog_changes
+        self.watch_interval = watch_interval
+        self.jobs_dir = jobs_dir
+        self.max_upload_bytes = max_upload_bytes
+        self.audio_workers = audio_workers
+        self.preprocess_audio = preprocess_audio
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        # Audio jobs have their own threads, so long jobs never hold up searches
+        self.audio_executor = ThreadPoolExecutor(max_workers=audio_workers)
+        self.started = time.time()
+        self.inflight = {}
+        self.jobs = {}
+        self.job_queue = None
+        self.counters = {"requests": 0, "coalesced": 0, "errors": 0}
+        self._index = None
+        self._index_catalog = None
+        self._index_lock = threading.Lock()
+
+    def warm_up(self):
+        """Load the catalog, cache, connection pool and audio analyzer once."""
+        catalog = load_products(self.catalog_path)
+        if not catalog:
+            raise ValueError(f"No products could be loaded from {self.catalog_path}")
+        self.live = LiveCatalog(
+            catalog,
+            path=self.catalog_path if self.watch_catalog else None,
+            changes_path=self.catalog_changes,
+            interval=self.watch_interval,
+        )
+        if self.search_mode == "semantic":
+            self.index()
+        self.router = QueryRouter(self.catalog) if self.use_router else None
+        if self.router is not None:
+            self.live.on_update(
+                lambda old, new, changes: self.router.update(new, changes)
+            )
+        self.live.on_update(self._update_index, rebuild=self._rebuild_index)
+        if self.watch_catalog or self.catalog_changes:
+            self.live.start()
+        self.cache = get_default_cache()
+        self.metrics = get_default_metrics()
+        self.metrics.keep_last(METRICS_RECORDS_KEPT)
+        get_default_client()
+        self.analyzer = AudioAnalyzer(preprocess=self.preprocess_audio)
+        os.makedirs(self.jobs_dir, exist_ok=True)
+
+    @property
+    def catalog(self):
+        """The current catalog; a request should read it once and keep it."""
+        return self.live.catalog
+
+    def _update_index(self, old, new, changes):
+        with self._index_lock:
+            # An index built while this update was applied may already be new
+            if self._index is not None and self._index_catalog is old:
+                self._index = self._index.updated(
+                    old, new, changed_rows(old, new, changes)
+                )
+                self._index_catalog = new
+
+    def _rebuild_index(self, new):
+        with self._index_lock:
+            if self._index is not None:
+                self._index = SemanticIndex.build(new)
+                self._index_catalog = new
+
+    def index(self):
+        """The semantic index, built (or loaded) on first use."""
+        with self._index_lock:
+            if self._index is None:
+                self._index_catalog = self.catalog
+                self._index = load_index(self.catalog_path, self._index_catalog)
+            return self._index
+
+    async def run_blocking(self, stage, func, *args, executor=None):
+        """Run a blocking tool function on a worker thread, as a metrics stage."""
+
+        def call():
+            with self.metrics.stage(stage):
+                return func(*args)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor or self.executor, call)
+
+    async def run_async(self, stage, func, *args):
+        """Await a coroutine function on the event loop, as a metrics stage."""
+        with self.metrics.stage(stage):
+            return await func(*args)
+
+    async def coalesced(self, key, stage, func, *args):
+        """Run ``func`` once for all concurrent requests with the same ``key``.
+
+        ``func`` may be a coroutine function, which runs on the event loop
+        instead of a worker thread. The shared computation is shielded, so a
+        client that disconnects does not cancel it for the others.
+        """
+        future = self.inflight.get(key)
+        if future is not None:
+            self.counters["coalesced"] += 1
+        else:
+            if asyncio.iscoroutinefunction(func):
+                run = self.run_async(stage, func, *args)
+            else:
+                run = self.run_blocking(stage, func, *args)
+            future = asyncio.ensure_future(run)
+            self.inflight[key] = future
+            future.add_done_callback(lambda _: self.inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    # Endpoints
+
+    def _search(self, query, mode, catalog):
+        """Return the (catalog, rows, scores) of a search that needs the model."""
+        if mode == "filters":
+            return catalog, search_rows_with_filters(query, catalog), None
+        if mode == "semantic":
+            return catalog, *search_rows_semantic(query, catalog, self.index())
+        return catalog, search_rows(query, catalog), None
+
+    async def search(self, request):
+        payload = json_body(request)
+        query = " ".join(required_text(payload, "query").split())
+        mode = payload.get("mode") or self.search_mode
+        if mode not in SEARCH_MODES:
+            raise HttpError(400, f"'mode' must be one of {', '.join(SEARCH_MODES)}")
+        sort = payload.get("sort") or "relevance"
+        if sort not in SORT_ORDERS:
+            raise HttpError(400, f"'sort' must be one of {', '.join(SORT_ORDERS)}")
+        page_size = payload.get("page_size", DEFAULT_PAGE_SIZE)
+        if (
+            not isinstance(page_size, int)
+            or isinstance(page_size, bool)
+            or not 1 <= page_size <= MAX_PAGE_SIZE
+        ):
+            raise HttpError(400, f"'page_size' must be between 1 and {MAX_PAGE_SIZE}")
+        cursor = payload.get("cursor")
+
+        # The whole request uses the catalog that is current when it starts
+        catalog = self.catalog
+        # Parsing takes well under a millisecond, so it runs on the event loop
+        started = time.perf_counter()
+        filters = self.router.parse(query) if self.router is not None else None
+        if filters is not None:
+            route, scores = "local", None
+            rows = await self.run_blocking(
+                "search_local", matching_rows, catalog, filters
+            )
+        else:
+            route = "model"
+            catalog, rows, scores = await self.coalesced(
+                ("search", mode, query),
+                f"search_{mode}",
+                self._search,
+                query,
+                mode,
+                catalog,
+            )
+        if self.router is not None:
+            self.router.record(route, time.perf_counter() - started)
+
+        # Only the requested page is ranked (top-k) and turned into products
+        loop = asyncio.get_running_loop()
+        try:
+            page = await loop.run_in_executor(
+                self.executor,
+                get_page,
+                catalog,
+                rows,
+                sort,
+                page_size,
+                cursor,
+                scores,
+            )
+        except ValueError as e:
+            raise HttpError(400, str(e))
+        return 200, {
+            "query": query,
+            "mode": mode,
+            "route": route,
+            "sort": sort,
+            "total": len(rows),
+            "count": len(page["products"]),
+            "products": page["products"],
+            "next_cursor": page["next_cursor"],
+        }
+
+    async def analyze_service(self, request):
+        service = required_text(json_body(request), "service").strip()
+        report = await self.coalesced(
+            ("analyze-service", service),
+            "report",
+            generate_analysis_report_async,
+            service,
+        )
+        if report.startswith("Error"):
+            return 502, {"error": report}
+        return 200, {"service": service, "report": report}
+
+    async def create_audio_job(self, request):
+        filename, audio = uploaded_audio(request)
+        digest = hashlib.sha256(audio).hexdigest()
+        for job in self.jobs.values():
+            if job["sha256"] == digest and job["status"] in ("queued", "running"):
+                self.counters["coalesced"] += 1
+                return 202, self._job_view(job)
+
+        job_id = uuid.uuid4().hex[:16]
+        job_dir = os.path.join(self.jobs_dir, job_id)
+        os.makedirs(job_dir)
+        safe_name = re.sub(r"[^\w.-]+", "_", os.path.basename(filename)) or "audio"
+        path = os.path.join(job_dir, safe_name)
+        with open(path, "wb") as f:
+            f.write(audio)
+
+        job = {
+            "id": job_id,
+            "status": "queued",
+            "filename": safe_name,
+            "sha256": digest,
+            "path": path,
+            "created": time.time(),
+            "started": None,
+            "finished": None,
+            "result": None,
+            "error": None,
+        }
+        self.jobs[job_id] = job
+        await self.job_queue.put(job)
+        return 202, self._job_view(job)
+
+    def _job_view(self, job):
+        view = {key: value for key, value in job.items() if key != "path"}
+        view["url"] = f"/audio/jobs/{job['id']}"
+        if job["status"] == "queued":
+            view["queue_position"] = sum(
+                1
+                for other in self.jobs.values()
+                if other["status"] == "queued" and other["created"] <= job["created"]
+            )
+        return view
+
+    async def audio_worker(self):
+        """Process queued audio jobs one at a time."""
+        while True:
+            job = await self.job_queue.get()
+            job["status"] = "running"
+            job["started"] = time.time()
+            try:
+                results = await self.run_blocking(
+                    "audio_job",
+                    self.analyzer.process_audio,
+                    job["path"],
+                    os.path.dirname(job["path"]),
+                    executor=self.audio_executor,
+                )
+                job["result"] = {
+                    "summary": results["summary"],
+                    "analytics": results["analytics"],
+                    "duration": results["duration"],
+                    "transcript": results["improved_transcript"],
+                    "timings": results["timings"],
+                    "files": results["files"],
+                }
+                job["status"] = "done"
+            except Exception as e:
+                job["error"] = str(e)
+                job["status"] = "failed"
+            finally:
+                job["finished"] = time.time()
+                self.job_queue.task_done()
+
+    async def health(self, request):
+        return 200, {
+            "status": "ok",
+            "uptime_seconds": round(time.time() - self.started, 1),
+            "catalog_products": len(self.catalog),
+            "catalog_updates": self.live.stats,
+            "requests": self.counters["requests"],
+            "coalesced": self.counters["coalesced"],
+            "errors": self.counters["errors"],
+            "in_flight": len(self.inflight),
+            "audio_jobs_queued": self.job_queue.qsize(),
+            "response_cache": self.cache.stats(),
+            "query_router": self.router.stats() if self.router is not None else None,
+        }
+
+    async def dispatch(self, request):
+        """Route a request to its endpoint; returns (status, body, content type)."""
+        path, method = request.path, request.method
+        if path == "/audio/jobs":
+            if method == "POST":
+                return (*await self.create_audio_job(request), "application/json")
+            if method == "GET":
+                jobs = [self._job_view(job) for job in self.jobs.values()]
+                return 200, {"jobs": jobs}, "application/json"
+        elif path.startswith("/audio/jobs/"):
+            if method == "GET":
+                job = self.jobs.get(path.rsplit("/", 1)[1])
+                if job is None:
+                    raise HttpError(404, "Unknown audio job")
+                return 200, self._job_view(job), "application/json"
+        elif path == "/metrics":
+            if method == "GET":
+                text = self.metrics.prometheus_text().encode("utf-8")
+                return 200, text, "text/plain; version=0.0.4"
+        else:
+            routes = {
+                "/search": ("POST", self.search),
+                "/analyze-service": ("POST", self.analyze_service),
+                "/health": ("GET", self.health),
+            }
+            if path not in routes:
+                raise HttpError(404, f"Unknown path {path}")
+            if method == routes[path][0]:
+                return (*await routes[path][1](request), "application/json")
+        raise HttpError(405, f"{method} is not allowed on {path}")
+
+    async def handle_connection(self, reader, writer):
+        """Serve the requests of one keep-alive connection."""
+        try:
+            while True:
+                keep_alive = True
+                try:
+                    request = await read_request(reader, self.max_upload_bytes)
+                    if request is None:
+                        break
+                    self.counters["requests"] += 1
+                    keep_alive = (
+                        request.headers.get("connection", "").lower() != "close"
+                    )
+                    status, body, content_type = await self.dispatch(request)
+                except HttpError as e:
+                    self.counters["errors"] += 1
+                    status, body, content_type = (
+                        e.status,
+                        {"error": e.message},
+                        "application/json",
+                    )
+                    # The rest of a rejected request may still be unread
+                    keep_alive = keep_alive and e.status not in (400, 411, 413, 431)
+                except asyncio.IncompleteReadError:
+                    break
+                except Exception as e:
+                    self.counters["errors"] += 1
+                    print(f"Error handling request: {e}")
+                    status, body, content_type = (
+                        500,
+                        {"error": str(e)},
+                        "application/json",
+                    )
+
+                writer.write(encode_response(status, body, content_type, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        self.job_queue = asyncio.Queue()
+        for _ in range(self.audio_workers):
+            asyncio.create_task(self.audio_worker())
+        server = await asyncio.start_server(
+            self.handle_connection, host, port, limit=1 << 16
+        )
+        print(f"Serving on http://{host}:{port} (search mode: {self.search_mode})")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await get_default_scheduler().aclose()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Serve the service analyzer, product search and audio analyzer over HTTP"
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument(
+        "--port", type=int, default=8000, help="Port to listen on (default: 8000)"
+    )
+    parser.add_argument(
+        "--catalog",
+        default=os.path.join(ROOT, "10", "products.json"),
+        help="Product file for /search (default: 10/products.json)",
+    )
+    parser.add_argument(
+        "--search-mode",
+        choices=SEARCH_MODES,
+        default="catalog",
+        help="Default search mode of /search (default: catalog)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=16,
+        help="Threads running searches and reports (default: 16)",
+    )
+    parser.add_argument(
+        "--audio-workers",
+        type=int,
+        default=2,
+        help="Audio jobs processed at the same time (default: 2)",
+    )
+    parser.add_argument(
+        "--jobs-dir",
+        default="audio_jobs",
+        help="Directory for uploaded recordings and their results (default: audio_jobs)",
+    )
+    parser.add_argument(
+        "--max-upload-mb",
+        type=int,
+        default=100,
+        help="Largest accepted request body in MB (default: 100)",
+    )
+    parser.add_argument(
+        "--preprocess-audio",
+        action="store_true",
+        help="Shrink uploaded recordings (mono, 16 kHz, silence trimmed) before transcription",
+    )
+    parser.add_argument(
+        "--watch-catalog",
+        action="store_true",
+        help="Apply changes of the product file without a restart",
+    )
+    parser.add_argument(
+        "--catalog-changes",
+        metavar="FILE",
+        help="Apply product changes appended to this JSON Lines change feed",
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=1.0,
+        help="Seconds between checks for catalog changes (default: 1)",
+    )
+    parser.add_argument(
+        "--no-router",
+        action="store_true",
+        help="Send every search to the model instead of answering simple ones locally",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    tool_server = ToolServer(
+        catalog_path=args.catalog,
+        search_mode=args.search_mode,
+        workers=args.workers,
+        audio_workers=args.audio_workers,
+        jobs_dir=args.jobs_dir,
+        max_upload_bytes=args.max_upload_mb * 1024 * 1024,
+        use_router=not args.no_router,
+        watch_catalog=args.watch_catalog,
+        catalog_changes=args.catalog_changes,
+        watch_interval=args.watch_interval,
+        preprocess_audio=args.preprocess_audio,
+    )
+    try:
+        tool_server.warm_up()
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    try:
+        asyncio.run(tool_server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\nServer stopped")
+
+
+if __name__ == "__main__":
+    main()